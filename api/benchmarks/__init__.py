@@ -0,0 +1,4 @@
+"""
+Benchmarks for Random Corp API
+Run from the api/ directory, e.g. python -m benchmarks.bench_serialization
+"""
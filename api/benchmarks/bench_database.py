@@ -0,0 +1,189 @@
+"""
+DatabaseManager micro-benchmarks for Random Corp API
+Measures the Python-side CPU time and memory of each method against the fake ODBC layer
+
+Usage (from api/):
+    python -m benchmarks.bench_database [--iterations 2000] [--output results.json]
+
+    # Fail (exit 1) if any case uses more CPU or memory than the tracked baseline allows
+    python -m benchmarks.bench_database --compare benchmarks/baselines/bench_database.json --threshold 25
+
+    # Refresh the tracked baseline after an intentional change
+    python -m benchmarks.bench_database --output benchmarks/baselines/bench_database.json
+"""
+
+import gc
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import platform
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from benchmarks import fake_odbc
+
+fake_odbc.install()
+
+from submission_rows import SubmissionFilters, page_json  # noqa: E402  (after the fake driver is installed)
+
+# Row counts we actually serve: batches are capped at 10, the reporting page uses 10-100 rows
+BATCH_SIZES = [1, 10]
+PAGE_SIZES = [10, 50, 100]
+
+
+def submission_data(index: int) -> Dict:
+    return {
+        "submission_id": f"sub_{index}_1700000000",
+        "first_name": f"First{index}",
+        "last_name": f"Last{index}",
+        "message": fake_odbc.MESSAGES[index % len(fake_odbc.MESSAGES)],
+        "batch_id": None,
+        "external_data": {"name_length": 12, "processed_at": "2024-01-01T00:00:00+00:00", "external_id": "ext_1234"},
+        "processing_time": 0.187,
+        "idempotency_key": None
+    }
+
+
+def build_cases(manager) -> Dict[str, Callable]:
+    """Case name -> zero-argument coroutine factory"""
+    cases = {
+        "save_submission": lambda: manager.save_submission(submission_data(1)),
+        "get_statistics": lambda: manager.get_statistics(),
+        "get_submissions_count": lambda: manager.get_submissions_count(),
+        "get_batch_summary": lambda: manager.get_batch_summary("batch_1"),
+        "increment_statistics": lambda: manager.increment_statistics(
+            {"submissions_processed": 5}, {"last_submission_at": "2024-01-01T00:00:00+00:00"}),
+        "is_database_available": lambda: manager.is_database_available(),
+        "search_submissions[prefix]": lambda: manager.search_submissions("fir", limit=10),
+        "search_submissions[full_name]": lambda: manager.search_submissions("first last", limit=10),
+    }
+    for size in BATCH_SIZES:
+        batch = [submission_data(i) for i in range(size)]
+        cases[f"save_batch_submissions[{size}]"] = lambda batch=batch: manager.save_batch_submissions(batch)
+    for size in PAGE_SIZES:
+        cases[f"get_recent_submissions[{size}]"] = lambda size=size: manager.get_recent_submissions(limit=size)
+        cases[f"get_paginated_submissions[{size}]"] = \
+            lambda size=size: manager.get_paginated_submissions(limit=size, offset=0)
+        cases[f"submissions_page_json[{size}]"] = lambda size=size: submissions_page(manager, size)
+        cases[f"get_paginated_submissions[{size},filtered]"] = lambda size=size: manager.get_paginated_submissions(
+            limit=size, offset=0, filters=SubmissionFilters(batch_id="batch_1", has_message=True))
+    return cases
+
+
+async def submissions_page(manager, size: int) -> bytes:
+    """What /api/submissions does in database mode: page query, count and response body"""
+    rows = await manager.get_paginated_submissions(limit=size, offset=0)
+    return page_json(rows, await manager.get_submissions_count(), size, 0)
+
+
+async def measure_cpu(factory: Callable, iterations: int, repeats: int) -> float:
+    """Mean CPU seconds per call, best of several rounds to filter scheduler noise.
+
+    process_time excludes any simulated latency, so only Python-side work
+    counts. The cyclic GC is paused while timing, as timeit does.
+    """
+    for _ in range(min(100, iterations)):
+        await factory()
+    best = float("inf")
+    for _ in range(repeats):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.process_time()
+            for _ in range(iterations):
+                await factory()
+            best = min(best, (time.process_time() - start) / iterations)
+        finally:
+            gc.enable()
+    return best
+
+
+async def measure_memory(factory: Callable, iterations: int) -> Dict[str, float]:
+    """Peak traced bytes during a single call and bytes retained per call"""
+    await factory()
+    tracemalloc.start()
+    try:
+        peak_total = 0
+        baseline, _ = tracemalloc.get_traced_memory()
+        for _ in range(iterations):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            await factory()
+            peak_total += tracemalloc.get_traced_memory()[1] - before
+        retained = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+    return {"peak_bytes": peak_total // iterations, "retained_bytes": round(retained / iterations, 1)}
+
+
+async def run(iterations: int, repeats: int, latency: float) -> List[Dict]:
+    pool = fake_odbc.FakePool(rows=fake_odbc.make_rows(max(PAGE_SIZES)), latency=latency)
+    manager = fake_odbc.fake_manager(pool)
+    results = []
+    for name, factory in build_cases(manager).items():
+        cpu = await measure_cpu(factory, iterations, repeats)
+        memory = await measure_memory(factory, max(1, iterations // 10))
+        results.append({"case": name, "cpu_us": round(cpu * 1_000_000, 2), **memory})
+    return results
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """Cases whose CPU time or peak memory grew by more than threshold percent"""
+    before = {result["case"]: result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        reference = before.get(result["case"])
+        if reference is None:
+            continue
+        for metric in ("cpu_us", "peak_bytes"):
+            if reference[metric] > 0:
+                change = (result[metric] - reference[metric]) / reference[metric] * 100
+                if change > threshold:
+                    regressions.append(f"{result['case']} {metric}: {reference[metric]} -> "
+                                       f"{result[metric]} (+{change:.1f}%)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=5, help="Rounds per case; the fastest is reported")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="Simulated per-statement latency (does not count towards cpu_us)")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="Fail on regressions against this report")
+    parser.add_argument("--threshold", type=float, default=25.0, help="Allowed regression in percent")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+    results = asyncio.run(run(args.iterations, args.repeats, args.latency_ms / 1000))
+    report = {
+        "benchmark": "database_manager",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "iterations": args.iterations,
+        "repeats": args.repeats,
+        "latency_ms": args.latency_ms,
+        "results": results
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        print(json.dumps({"threshold_pct": args.threshold, "passed": not regressions,
+                          "regressions": regressions}, indent=2))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
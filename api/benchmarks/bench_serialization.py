@@ -0,0 +1,157 @@
+"""
+Serialization benchmarks for Random Corp API responses
+Compares FastAPI's default response pipeline with the fast_json rendering path
+
+Usage (from api/):
+    python -m benchmarks.bench_serialization [--iterations 2000] [--output results.json]
+"""
+
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+import fast_json
+from main import BatchSubmissionResponse, LatestSubmission, StatsResponse, SubmissionResponse, POSITIVE_MESSAGES
+
+# Sizes we actually serve: batches are capped at 10, the reporting page uses 10-100 rows
+BATCH_SIZES = [1, 10]
+PAGE_SIZES = [10, 50, 100]
+
+
+def submission_fields(index: int) -> Dict:
+    return {
+        "firstName": f"First{index}",
+        "lastName": f"Last{index}",
+        "message": random.choice(POSITIVE_MESSAGES),
+        "submissionId": f"sub_{random.randint(10000, 99999)}_{index}",
+        "timestamp": datetime.now(timezone.utc),
+        "processingTime": random.uniform(0.1, 0.3)
+    }
+
+
+def batch_fields(size: int) -> Dict:
+    return {
+        "total_processed": size,
+        "processing_time": 0.25,
+        "results": [submission_fields(i) for i in range(size)],
+        "batch_id": "batch_12345_1700000000"
+    }
+
+
+def stats_fields() -> Dict:
+    now = datetime.now(timezone.utc)
+    return {
+        "total_messages": len(POSITIVE_MESSAGES),
+        "total_submissions": 123456,
+        "recent_submissions": 4321,
+        "avg_processing_time": 0.187,
+        "latest_submission": {"id": "sub_1", "name": "First Last", "timestamp": now.isoformat()},
+        "api_version": "2.1.0",
+        "status": "operational",
+        "debug_mode": False,
+        "last_submission": now,
+        "uptime_seconds": 3600.0
+    }
+
+
+def page_payload(size: int) -> Dict:
+    submissions = [{
+        "submission_id": f"sub_{i}",
+        "first_name": f"First{i}",
+        "last_name": f"Last{i}",
+        "message": random.choice(POSITIVE_MESSAGES),
+        "batch_id": None if i % 3 else "batch_12345_1700000000",
+        "processing_time": random.uniform(0.1, 0.3),
+        "created_at": datetime.now(timezone.utc).isoformat()
+    } for i in range(size)]
+    return {"submissions": submissions, "count": size, "total": 100000, "limit": size, "offset": 0, "has_more": True}
+
+
+async def default_path(model, build_fields: Callable[[], Dict]) -> Callable:
+    """Validated model construction + FastAPI's serialize_response + stdlib JSONResponse"""
+    field = create_response_field(name="response", type_=model, mode="serialization") if model else None
+    fields = build_fields()
+
+    async def run():
+        content = model(**fields) if model else fields
+        encoded = await serialize_response(field=field, response_content=content)
+        return JSONResponse(encoded).body
+    return run
+
+
+async def fast_path(model, build_fields: Callable[[], Dict]) -> Callable:
+    """model_construct (no validation) + fast_json.dumps"""
+    fields = build_fields()
+
+    async def run():
+        content = fields
+        if model is BatchSubmissionResponse:
+            content = {**fields, "results": [SubmissionResponse.model_construct(**r) for r in fields["results"]]}
+        elif model is StatsResponse:
+            content = {**fields, "latest_submission": LatestSubmission.model_construct(**fields["latest_submission"])}
+        if model:
+            content = model.model_construct(**content)
+        return fast_json.dumps(content)
+    return run
+
+
+async def measure(run: Callable, iterations: int) -> float:
+    """Mean CPU microseconds per call"""
+    for _ in range(min(200, iterations)):
+        await run()
+    start = time.process_time_ns()
+    for _ in range(iterations):
+        await run()
+    return (time.process_time_ns() - start) / iterations / 1000
+
+
+async def run_benchmarks(iterations: int) -> List[Dict]:
+    cases = [("submit", SubmissionResponse, lambda: submission_fields(0)),
+             ("stats", StatsResponse, stats_fields)]
+    cases += [(f"batch[{size}]", BatchSubmissionResponse, lambda size=size: batch_fields(size)) for size in BATCH_SIZES]
+    cases += [(f"submissions_page[{size}]", None, lambda size=size: page_payload(size)) for size in PAGE_SIZES]
+
+    results = []
+    for name, model, build_fields in cases:
+        # Fixtures are built once per case; each call times model construction plus rendering
+        baseline = await measure(await default_path(model, build_fields), iterations)
+        fast = await measure(await fast_path(model, build_fields), iterations)
+        results.append({
+            "case": name,
+            "default_us": round(baseline, 2),
+            "fast_us": round(fast, 2),
+            "saved_us": round(baseline - fast, 2),
+            "speedup": round(baseline / fast, 2) if fast else None
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    report = {
+        "benchmark": "serialization",
+        "encoder": "orjson" if fast_json.orjson is not None else "stdlib json",
+        "iterations": args.iterations,
+        "results": asyncio.run(run_benchmarks(args.iterations))
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,26 @@
+"""
+Demo-mode API server for the load benchmark
+Runs main:app under uvicorn, with the fake ODBC driver standing in when aioodbc cannot be imported
+
+Usage (from api/; load.py starts it for you):
+    python -m benchmarks.demo_server --port 8000
+"""
+
+import argparse
+import uvicorn
+from benchmarks import fake_odbc
+
+# database.py imports aioodbc at module level, so this must run before uvicorn imports main
+fake_odbc.install()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    uvicorn.run("main:app", host=args.host, port=args.port, access_log=False)
+
+
+if __name__ == "__main__":
+    main()
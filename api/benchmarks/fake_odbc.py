@@ -0,0 +1,178 @@
+"""
+Fake aioodbc layer for Random Corp API benchmarks
+In-process pool, connection and cursor with configurable latency and canned result rows
+"""
+
+import sys
+import types
+import random
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence, Tuple
+
+MESSAGES = [
+    "Have a wonderful day!",
+    "You're awesome!",
+    "Thanks for stopping by!",
+    "Keep being amazing!",
+]
+
+
+def make_rows(count: int, seed: int = 42) -> List[Tuple]:
+    """Rows shaped like the submissions SELECTs: id, first, last, message, batch, time, created_at"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return [(
+        f"sub_{rng.randint(10000, 99999)}_{i}",
+        f"First{i}",
+        f"Last{i}",
+        rng.choice(MESSAGES),
+        None if i % 3 else f"batch_{rng.randint(10000, 99999)}_{i // 10}",
+        rng.uniform(0.1, 0.3),
+        now - timedelta(seconds=i)
+    ) for i in range(count)]
+
+
+class FakeCursor:
+    """Answers the queries DatabaseManager issues from canned data.
+
+    Each execute() awaits the pool latency (asyncio.sleep, so it costs no
+    CPU) and records the statement; results are picked by inspecting the SQL.
+    """
+
+    def __init__(self, pool: "FakePool"):
+        self.pool = pool
+        self._one: Optional[Tuple] = None
+        self._all: List[Tuple] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def execute(self, sql: str, params: Sequence = ()):
+        self.pool.statements += 1
+        if self.pool.latency:
+            await asyncio.sleep(self.pool.latency)
+        normalized = " ".join(sql.split()).upper()
+        rows = self.pool.rows
+        if "MIN(CREATED_AT)" in normalized:
+            # Batch summary: count, with message, first/last created_at, avg/total processing time
+            created = [row[6] for row in rows]
+            self._one = (len(rows), len(rows), min(created), max(created), 0.187, 0.187 * len(rows)) \
+                if rows else (0, None, None, None, None, None)
+        elif "COUNT(*)" in normalized:
+            self._one = (self.pool.total_rows,)
+        elif "AVG(" in normalized:
+            self._one = (0.187,)
+        elif "SELECT 1" == normalized:
+            self._one = (1,)
+        elif "TOP 1 " in normalized:
+            self._one = rows[0][:3] + (rows[0][6],) if rows else None
+        elif normalized.startswith("SELECT"):
+            self._all = rows[:_requested_rows(normalized, len(rows))]
+        else:
+            self._one, self._all = None, []
+
+    async def fetchone(self) -> Optional[Tuple]:
+        return self._one
+
+    async def fetchall(self) -> List[Tuple]:
+        return self._all
+
+    async def close(self):
+        pass
+
+
+def _requested_rows(normalized_sql: str, default: int) -> int:
+    """Honour TOP n / FETCH NEXT n so fetchall returns what the real query would"""
+    for marker in ("TOP ", "FETCH NEXT "):
+        if marker in normalized_sql:
+            value = normalized_sql.split(marker, 1)[1].split(" ", 1)[0]
+            if value.isdigit():
+                return int(value)
+    return default
+
+
+class FakeConnection:
+    def __init__(self, pool: "FakePool"):
+        self.pool = pool
+
+    def cursor(self) -> FakeCursor:
+        return FakeCursor(self.pool)
+
+    async def commit(self):
+        if self.pool.latency:
+            await asyncio.sleep(self.pool.latency)
+
+    async def close(self):
+        pass
+
+
+class FakePool:
+    """Stand-in for aioodbc.Pool with a bounded number of connections"""
+
+    def __init__(self, rows: Optional[List[Tuple]] = None, latency: float = 0.0,
+                 maxsize: int = 10, total_rows: int = 100000):
+        self.rows = rows if rows is not None else make_rows(100)
+        self.latency = latency
+        self.total_rows = total_rows
+        self.maxsize = maxsize
+        self.statements = 0
+        self._free = asyncio.Queue()
+        for _ in range(maxsize):
+            self._free.put_nowait(FakeConnection(self))
+
+    @property
+    def size(self) -> int:
+        return self.maxsize
+
+    @property
+    def freesize(self) -> int:
+        return self._free.qsize()
+
+    async def acquire(self) -> FakeConnection:
+        return await self._free.get()
+
+    async def release(self, conn: FakeConnection):
+        self._free.put_nowait(conn)
+
+    def close(self):
+        pass
+
+    async def wait_closed(self):
+        pass
+
+
+async def create_pool(rows: Optional[List[Tuple]] = None, latency: float = 0.0, maxsize: int = 10,
+                      **kwargs) -> FakePool:
+    return FakePool(rows=rows, latency=latency, maxsize=maxsize)
+
+
+async def connect(**kwargs) -> FakeConnection:
+    return FakeConnection(FakePool(maxsize=1))
+
+
+def install():
+    """Register this module as aioodbc when the real driver (or libodbc) is unavailable.
+
+    Lets database.py be imported on machines without the ODBC driver; with a
+    working aioodbc installed nothing is replaced.
+    """
+    try:
+        import aioodbc  # noqa: F401
+    except ImportError:
+        module = types.ModuleType("aioodbc")
+        module.create_pool = create_pool
+        module.connect = connect
+        sys.modules["aioodbc"] = module
+
+
+def fake_manager(pool: FakePool):
+    """A DatabaseManager wired to a fake pool, as if initialize() had succeeded"""
+    from database import DatabaseManager
+    manager = DatabaseManager()
+    manager.connection_string = "DRIVER={Fake};SERVER=fake,1433;DATABASE=RandomCorpDB;"
+    manager.pool = pool
+    return manager
@@ -0,0 +1,262 @@
+"""
+HTTP load benchmark for Random Corp API
+Drives the API with a weighted request mix and reports throughput and latency percentiles
+
+Usage (from api/):
+    # Start the app locally in demo mode (in-memory storage) and benchmark it
+    python -m benchmarks.load run --duration 30 --concurrency 32 --output current.json
+
+    # Benchmark an already running server
+    python -m benchmarks.load run --url http://localhost:8000 --mix submit=60,stats=20,submissions=20
+
+    # Fail (exit 1) if current.json regressed more than 10% against baseline.json
+    python -m benchmarks.load compare baseline.json current.json --threshold 10
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import platform
+import subprocess
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import httpx
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MIX = "submit=50,batch=10,stats=20,submissions=20"
+
+FIRST_NAMES = ["Ada", "Grace", "Alan", "Linus", "Margaret", "Ken", "Barbara", "Dennis"]
+LAST_NAMES = ["Lovelace", "Hopper", "Turing", "Torvalds", "Hamilton", "Thompson", "Liskov", "Ritchie"]
+
+
+def _name() -> Dict[str, str]:
+    return {"firstName": random.choice(FIRST_NAMES), "lastName": random.choice(LAST_NAMES)}
+
+
+# Endpoint name -> (method, path, body factory)
+ENDPOINTS = {
+    "submit": ("POST", "/api/submit", _name),
+    "batch": ("POST", "/api/submit/batch", lambda: {"submissions": [_name() for _ in range(random.randint(2, 10))]}),
+    "stats": ("GET", "/api/stats", None),
+    "submissions": ("GET", "/api/submissions?limit=50&offset=0", None),
+}
+
+
+def parse_mix(spec: str) -> List[Tuple[str, float]]:
+    mix = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, weight = item.partition("=")
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint in mix: {name} (choose from {', '.join(ENDPOINTS)})")
+        mix.append((name, float(weight or 1)))
+    return mix
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2) if ordered else 0.0,
+    }
+
+
+async def drive(url: str, mix: List[Tuple[str, float]], concurrency: int,
+                duration: float, warmup: float) -> Dict:
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, int] = {name: 0 for name in names}
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30.0) as client:
+        start = time.perf_counter()
+        measure_from = start + warmup
+        stop_at = measure_from + duration
+
+        async def worker():
+            while True:
+                now = time.perf_counter()
+                if now >= stop_at:
+                    return
+                name = random.choices(names, weights)[0]
+                method, path, body = ENDPOINTS[name]
+                sent = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=body() if body else None)
+                    failed = response.status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                done = time.perf_counter()
+                if sent < measure_from:
+                    continue
+                if failed:
+                    errors[name] += 1
+                else:
+                    latencies[name].append(done - sent)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - measure_from
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "overall": summarize(all_latencies, sum(errors.values()), elapsed),
+        "endpoints": {name: summarize(latencies[name], errors[name], elapsed) for name in names},
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_local_server(port: int, extra_env: Dict[str, str]) -> subprocess.Popen:
+    """Run the API in demo mode (no DB_HOST) so submissions go to the in-memory store.
+
+    demo_server installs the fake ODBC driver when aioodbc cannot be
+    imported, so this works on machines without libodbc.
+    """
+    env = {key: value for key, value in os.environ.items() if key != "DB_HOST"}
+    env.update({"LOG_LEVEL": "WARNING", "SUBMISSION_LOG_PATH": os.devnull, "TRACE_SAMPLE_RATE": "0"})
+    env.update(extra_env)
+    return subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.demo_server", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=API_DIR, env=env
+    )
+
+
+async def wait_until_healthy(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url, timeout=2.0) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become healthy within {timeout:.0f}s")
+
+
+def command_run(args) -> int:
+    mix = parse_mix(args.mix)
+    server = None
+    url = args.url
+    if not url:
+        port = _free_port()
+        url = f"http://127.0.0.1:{port}"
+        extra_env = dict(item.split("=", 1) for item in args.env)
+        server = start_local_server(port, extra_env)
+
+    try:
+        asyncio.run(wait_until_healthy(url))
+        results = asyncio.run(drive(url, mix, args.concurrency, args.duration, args.warmup))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    report = {
+        "benchmark": "http_load",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "target": args.url or "local demo-mode server",
+        "python": platform.python_version(),
+        "config": {
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "mix": dict(mix),
+        },
+        **results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+    return 0
+
+
+def compare_reports(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """Regressions beyond threshold percent: higher latency percentiles or lower throughput"""
+    regressions = []
+    sections = [("overall", baseline.get("overall"), current.get("overall"))]
+    for name, stats in baseline.get("endpoints", {}).items():
+        sections.append((name, stats, current.get("endpoints", {}).get(name)))
+
+    for name, before, after in sections:
+        if not before or not after:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if before[metric] > 0:
+                change = (after[metric] - before[metric]) / before[metric] * 100
+                if change > threshold:
+                    regressions.append(f"{name} {metric}: {before[metric]} -> {after[metric]} (+{change:.1f}%)")
+        if before["throughput_rps"] > 0:
+            change = (after["throughput_rps"] - before["throughput_rps"]) / before["throughput_rps"] * 100
+            if change < -threshold:
+                regressions.append(f"{name} throughput_rps: {before['throughput_rps']} -> "
+                                   f"{after['throughput_rps']} ({change:.1f}%)")
+        if after["errors"] > before["errors"]:
+            regressions.append(f"{name} errors: {before['errors']} -> {after['errors']}")
+    return regressions
+
+
+def command_compare(args) -> int:
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    regressions = compare_reports(baseline, current, args.threshold)
+    print(json.dumps({"threshold_pct": args.threshold, "passed": not regressions,
+                      "regressions": regressions}, indent=2))
+    return 1 if regressions else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run a load benchmark")
+    run.add_argument("--url", help="Target server; omitted = start a local demo-mode server")
+    run.add_argument("--duration", type=float, default=20.0, help="Measured seconds")
+    run.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds before measuring")
+    run.add_argument("--concurrency", type=int, default=32)
+    run.add_argument("--mix", default=DEFAULT_MIX, help=f"Weighted endpoint mix (default: {DEFAULT_MIX})")
+    run.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                     help="Extra environment for the local server, e.g. --env FAST_JSON=true")
+    run.add_argument("--output", help="Also write the JSON report to this file")
+    run.set_defaults(func=command_run)
+
+    compare = commands.add_parser("compare", help="Compare two reports and fail on regressions")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=10.0, help="Allowed regression in percent")
+    compare.set_defaults(func=command_compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
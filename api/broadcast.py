@@ -0,0 +1,213 @@
+"""
+Live event broadcast for Random Corp API
+In-process hub behind the /api/stream/submissions Server-Sent Events feed
+"""
+
+import os
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+from fast_json import dumps
+
+logger = logging.getLogger(__name__)
+
+# Stats fields that change on every tick and are not worth an event on their own
+VOLATILE_STATS_FIELDS = frozenset({"uptime_seconds"})
+
+StatsProvider = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+class Subscriber:
+    """One stream's bounded buffer of pre-encoded events.
+
+    The hub appends and the stream drains; when the buffer is full the
+    subscriber is evicted instead of growing (or slowing the publisher
+    down), and its stream ends so the client reconnects with Last-Event-ID.
+    """
+
+    __slots__ = ("buffer", "max_events", "evicted", "closed", "_wakeup")
+
+    def __init__(self, max_events: int):
+        self.buffer: Deque[bytes] = deque()
+        self.max_events = max_events
+        self.evicted = False
+        self.closed = False
+        self._wakeup = asyncio.Event()
+
+    def push(self, frame: bytes) -> bool:
+        """Queue a frame; False if the buffer is full"""
+        if len(self.buffer) >= self.max_events:
+            return False
+        self.buffer.append(frame)
+        self._wakeup.set()
+        return True
+
+    def close(self):
+        self.closed = True
+        self._wakeup.set()
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait until there is something to send or the stream should end; False on timeout"""
+        if self.buffer or self.closed:
+            return True
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def drain(self) -> List[bytes]:
+        frames = list(self.buffer)
+        self.buffer.clear()
+        return frames
+
+
+class BroadcastHub:
+    """Fans new submissions and stats changes out to every open stream.
+
+    publish() encodes an event once as an SSE frame and appends it to each
+    subscriber's buffer, so the submit path pays one encode plus an O(1)
+    append per subscriber and never awaits. Event ids are
+    "<epoch>-<sequence>"; the last `replay_size` frames are kept so a
+    client reconnecting with Last-Event-ID gets what it missed. If the id
+    is from another process or has already left the ring, the client gets
+    a "reset" event and should refetch. While anyone is subscribed a single
+    task polls the stats provider and publishes only the fields that
+    changed.
+
+    The hub is per process: with several workers a stream carries the
+    submissions saved by the worker serving it, and stats events (read
+    from the database or the shared store) cover all of them.
+    """
+
+    def __init__(self, replay_size: int = 512, subscriber_buffer: int = 256,
+                 max_subscribers: int = 1000, stats_interval: float = 5.0,
+                 heartbeat_interval: float = 15.0):
+        self.epoch = format(int(time.time() * 1000), "x")
+        self.subscriber_buffer = subscriber_buffer
+        self.max_subscribers = max_subscribers
+        self.stats_interval = stats_interval
+        self.heartbeat_interval = heartbeat_interval
+        self._sequence = 0
+        self._replay: Deque[Tuple[int, bytes]] = deque(maxlen=replay_size)
+        self._subscribers: Set[Subscriber] = set()
+        self._stats_provider: Optional[StatsProvider] = None
+        self._stats_task: Optional[asyncio.Task] = None
+        self._last_stats: Optional[Dict[str, Any]] = None
+        self._closed = False
+
+        self.events_published = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def last_event_id(self) -> str:
+        return f"{self.epoch}-{self._sequence}"
+
+    def set_stats_provider(self, provider: StatsProvider):
+        self._stats_provider = provider
+
+    def publish(self, event: str, data: Any) -> str:
+        """Encode an event once and queue it for every subscriber"""
+        self._sequence += 1
+        event_id = f"{self.epoch}-{self._sequence}"
+        frame = b"id: %s\nevent: %s\ndata: %s\n\n" % (event_id.encode(), event.encode(), dumps(data))
+        self._replay.append((self._sequence, frame))
+        self.events_published += 1
+
+        slow = [subscriber for subscriber in self._subscribers if not subscriber.push(frame)]
+        for subscriber in slow:
+            self._evict(subscriber)
+        return event_id
+
+    def _evict(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+        subscriber.evicted = True
+        subscriber.close()
+        self.evictions += 1
+        logger.warning(f"🐢 Evicted slow stream subscriber ({subscriber.max_events} events buffered)")
+
+    def _replay_after(self, last_event_id: Optional[str]) -> Optional[List[bytes]]:
+        """Frames after last_event_id, or None if the client cannot resume from it"""
+        epoch, _, sequence = (last_event_id or "").partition("-")
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+        sequence = int(sequence)
+        if sequence > self._sequence:
+            return None
+        oldest = self._replay[0][0] if self._replay else self._sequence + 1
+        if sequence + 1 < oldest:
+            # Events in between have already been dropped from the ring
+            return None
+        return [frame for event_sequence, frame in self._replay if event_sequence > sequence]
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Optional[Subscriber]:
+        """Register a stream; None if the hub is full or shutting down"""
+        if self._closed or len(self._subscribers) >= self.max_subscribers:
+            return None
+        subscriber = Subscriber(self.subscriber_buffer)
+        if last_event_id:
+            missed = self._replay_after(last_event_id)
+            if missed is None or len(missed) > self.subscriber_buffer:
+                subscriber.push(b"id: %s\nevent: reset\ndata: {}\n\n" % self.last_event_id.encode())
+            else:
+                subscriber.buffer.extend(missed)
+        self._subscribers.add(subscriber)
+        if self._stats_provider is not None and (self._stats_task is None or self._stats_task.done()):
+            self._stats_task = asyncio.create_task(self._publish_stats(), name="stream-stats")
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+
+    async def _publish_stats(self):
+        """Publish changed stats fields every interval while anyone is listening"""
+        while self._subscribers and not self._closed:
+            try:
+                stats = await self._stats_provider()
+                previous = self._last_stats or {}
+                changed = {key: value for key, value in stats.items()
+                           if key not in VOLATILE_STATS_FIELDS and previous.get(key) != value}
+                if changed and self._last_stats is not None:
+                    changed.update({key: stats[key] for key in VOLATILE_STATS_FIELDS if key in stats})
+                    self.publish("stats", changed)
+                self._last_stats = stats
+            except Exception as e:
+                logger.error(f"❌ Failed to collect stats for stream subscribers: {str(e)}")
+            await asyncio.sleep(self.stats_interval)
+        # Nobody listening: the next subscriber starts from a fresh baseline
+        self._last_stats = None
+
+    def close(self):
+        """End every stream and refuse new ones; clients reconnect with Last-Event-ID"""
+        if self._closed:
+            return
+        self._closed = True
+        for subscriber in list(self._subscribers):
+            subscriber.close()
+        self._subscribers.clear()
+        if self._stats_task is not None:
+            self._stats_task.cancel()
+        logger.info("📡 Broadcast hub closed")
+
+
+# Global broadcast hub instance - initialized lazily
+broadcast_hub = None
+
+def get_broadcast_hub() -> BroadcastHub:
+    """Get or create the broadcast hub instance"""
+    global broadcast_hub
+    if broadcast_hub is None:
+        broadcast_hub = BroadcastHub(
+            replay_size=int(os.getenv('STREAM_REPLAY_EVENTS', '512')),
+            subscriber_buffer=int(os.getenv('STREAM_SUBSCRIBER_BUFFER', '256')),
+            max_subscribers=int(os.getenv('STREAM_MAX_SUBSCRIBERS', '1000')),
+            stats_interval=float(os.getenv('STREAM_STATS_INTERVAL_SECONDS', '5')),
+            heartbeat_interval=float(os.getenv('STREAM_HEARTBEAT_SECONDS', '15'))
+        )
+    return broadcast_hub
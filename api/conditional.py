@@ -0,0 +1,59 @@
+"""
+Conditional GET support for Random Corp API
+Weak ETags from a data watermark so unchanged reads get a 304 before any query runs
+"""
+
+import os
+import time
+from typing import Dict, Optional
+from fastapi import Response
+from shared_state import get_worker_state
+
+# Writes handled by other replicas do not move this process's watermark, so the
+# ETag also rolls over every MAX_STALENESS_SECONDS (0 disables this: single replica only)
+MAX_STALENESS_SECONDS = float(os.getenv('ETAG_MAX_STALENESS_SECONDS', '5'))
+
+# 0 makes browsers revalidate every read (If-None-Match); above 0 they may reuse a response that long
+CACHE_MAX_AGE = int(os.getenv('HTTP_CACHE_MAX_AGE', '0'))
+CACHE_CONTROL = f"max-age={CACHE_MAX_AGE}, must-revalidate" if CACHE_MAX_AGE > 0 else "no-cache"
+
+
+def mark_data_changed():
+    """Called for every stored submission; invalidates all outstanding ETags"""
+    get_worker_state().bump_data_version()
+
+
+def current_etag(resource: str) -> str:
+    """Weak ETag for a resource as of now: server instance, data version and staleness bucket.
+
+    The instance part (the shared start time) keeps validators from one
+    replica or restart from ever matching another's.
+    """
+    state = get_worker_state()
+    instance = format(int(state.start_time.timestamp() * 1_000_000), "x")
+    bucket = int(time.time() // MAX_STALENESS_SECONDS) if MAX_STALENESS_SECONDS > 0 else 0
+    return f'W/"{resource}-{instance}-{state.data_version()}-{bucket}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against etag (RFC 9110 section 13.1.2)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
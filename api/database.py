@@ -7,12 +7,91 @@ import os
 import logging
 import aioodbc
 import asyncio
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime, timezone
 import json
+from contextlib import asynccontextmanager
+from metrics import DB_POOL_IN_USE, DB_POOL_WAITERS, DB_RECONNECT_ATTEMPTS, timed_query
+from submission_rows import SUBMISSION_COLUMNS, SubmissionFilters, SubmissionRecord
+from name_index import SUBSTRING, match_rank, name_trigrams, normalize_query, trigrams
 
 logger = logging.getLogger(__name__)
 
+INSERT_SUBMISSION_SQL = """
+    INSERT INTO submissions 
+    (submission_id, first_name, last_name, message, batch_id, external_data, processing_time, idempotency_key)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Listing indexes (name, key columns, INCLUDE columns): covering, so filtered and
+# unfiltered pages are index seeks without key lookups; batch_id is also keyed on
+# created_at for its newest-first order. migrate.py converts older plain indexes
+COVERING_INDEXES = (
+    ('idx_created_at', 'created_at',
+     'submission_id, first_name, last_name, message, batch_id, processing_time'),
+    ('idx_batch_id', 'batch_id, created_at',
+     'submission_id, first_name, last_name, message, processing_time'),
+)
+
+def _submission_params(submission_id: str, submission_data: Dict) -> tuple:
+    """Build INSERT_SUBMISSION_SQL parameters from a submission dict"""
+    return (
+        submission_id,
+        submission_data.get('first_name', ''),
+        submission_data.get('last_name', ''),
+        submission_data.get('message', ''),
+        submission_data.get('batch_id'),
+        json.dumps(submission_data.get('external_data', {})) if submission_data.get('external_data') else None,
+        submission_data.get('processing_time', 0.0),
+        submission_data.get('idempotency_key')
+    )
+
+def _trigram_insert_sql(count: int) -> str:
+    """Insert (trigram, submission_id) pairs keyed by row id (DISTINCT folds collation-equal grams)"""
+    values = ", ".join(["(?, ?)"] * count)
+    return f"""
+        INSERT INTO submission_name_trigrams (trigram, submission_pk)
+        SELECT DISTINCT v.trigram, s.id
+        FROM (VALUES {values}) AS v(trigram, submission_id)
+        JOIN submissions s ON s.submission_id = v.submission_id
+    """
+
+def _like_escape(term: str) -> str:
+    """Escape LIKE wildcards in user input (used with ESCAPE '\\')"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_").replace("[", "\\[")
+
+def _filter_sql(filters: Optional[SubmissionFilters]) -> Tuple[str, list]:
+    """WHERE clause and parameters for listing filters ('' when there are none)"""
+    if filters is None:
+        return "", []
+    clauses, params = [], []
+    if filters.batch_id is not None:
+        clauses.append("batch_id = ?")
+        params.append(filters.batch_id)
+    # created_at is stored as naive UTC (GETUTCDATE())
+    if filters.created_from is not None:
+        clauses.append("created_at >= ?")
+        params.append(filters.created_from.astimezone(timezone.utc).replace(tzinfo=None))
+    if filters.created_to is not None:
+        clauses.append("created_at < ?")
+        params.append(filters.created_to.astimezone(timezone.utc).replace(tzinfo=None))
+    if filters.has_message is True:
+        clauses.append("message IS NOT NULL AND message <> ''")
+    elif filters.has_message is False:
+        clauses.append("(message IS NULL OR message = '')")
+    return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+IDEMPOTENCY_KEY_INDEX = "ux_submissions_idempotency_key"
+
+def _is_duplicate_key_error(error: Exception) -> bool:
+    """Check for SQL Server unique constraint/index violations (errors 2627 and 2601)"""
+    error_msg = str(error).lower()
+    return '2627' in error_msg or '2601' in error_msg or 'duplicate key' in error_msg
+
+def _is_idempotent_replay(error: Exception) -> bool:
+    """A duplicate key on the idempotency key index (named in the error message), not any other unique constraint"""
+    return _is_duplicate_key_error(error) and IDEMPOTENCY_KEY_INDEX in str(error).lower()
+
 class DatabaseManager:
     def __init__(self):
         self.host = os.getenv('DB_HOST')
@@ -111,10 +190,25 @@ class DatabaseManager:
                     logger.error("💥 All database initialization attempts failed!")
                     raise Exception(f"Failed to initialize database after {max_retries} attempts: {str(e)}")
     
+    @asynccontextmanager
+    async def _acquire(self):
+        """Acquire a pool connection, tracking waiters and in-use connections for /metrics"""
+        DB_POOL_WAITERS.inc()
+        try:
+            conn = await self.pool.acquire()
+        finally:
+            DB_POOL_WAITERS.dec()
+        DB_POOL_IN_USE.inc()
+        try:
+            yield conn
+        finally:
+            DB_POOL_IN_USE.dec()
+            await self.pool.release(conn)
+    
     async def _test_connection_pool(self):
         """Test the connection pool to ensure it's working"""
         try:
-            async with self.pool.acquire() as conn:
+            async with self._acquire() as conn:
                 async with conn.cursor() as cursor:
                     await cursor.execute("SELECT 1")
                     result = await cursor.fetchone()
@@ -173,11 +267,14 @@ class DatabaseManager:
     async def _create_tables(self):
         """Create necessary database tables"""
         try:
-            async with self.pool.acquire() as conn:
+            async with self._acquire() as conn:
                 async with conn.cursor() as cursor:
-                    # Create submissions table
+                    # Create submissions table. Indexes added later are created here
+                    # too for a new (empty) table; on an existing table they are built
+                    # by migrate.py, never at startup
                     await cursor.execute("""
                         IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='submissions' AND xtype='U')
+                        BEGIN
                         CREATE TABLE submissions (
                             id BIGINT IDENTITY(1,1) PRIMARY KEY,
                             submission_id NVARCHAR(100) UNIQUE NOT NULL,
@@ -188,9 +285,38 @@ class DatabaseManager:
                             external_data NVARCHAR(MAX),
                             processing_time FLOAT,
                             created_at DATETIME2 DEFAULT GETUTCDATE(),
-                            INDEX idx_submission_id (submission_id),
-                            INDEX idx_created_at (created_at),
-                            INDEX idx_batch_id (batch_id)
+                            INDEX idx_submission_id (submission_id)
+                        );
+                        CREATE INDEX idx_first_name ON submissions (first_name);
+                        CREATE INDEX idx_last_name ON submissions (last_name);
+                    """ + "".join(
+                        f"CREATE INDEX {index_name} ON submissions ({key_columns}) INCLUDE ({included});"
+                        for index_name, key_columns, included in COVERING_INDEXES
+                    ) + """
+                        END
+                    """)
+
+                    # Idempotency key column with a unique filtered index as a
+                    # backstop against duplicate rows from retried requests
+                    await cursor.execute("""
+                        IF COL_LENGTH('submissions', 'idempotency_key') IS NULL
+                        ALTER TABLE submissions ADD idempotency_key NVARCHAR(200) NULL
+                    """)
+                    await cursor.execute("""
+                        IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name='ux_submissions_idempotency_key')
+                        CREATE UNIQUE INDEX ux_submissions_idempotency_key
+                        ON submissions (idempotency_key)
+                        WHERE idempotency_key IS NOT NULL
+                    """)
+
+                    # Name search: substring matches go through the trigram table, filled
+                    # on insert; rows stored before it existed are backfilled by migrate.py
+                    await cursor.execute("""
+                        IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='submission_name_trigrams' AND xtype='U')
+                        CREATE TABLE submission_name_trigrams (
+                            trigram NCHAR(3) NOT NULL,
+                            submission_pk BIGINT NOT NULL,
+                            CONSTRAINT pk_submission_name_trigrams PRIMARY KEY (trigram, submission_pk)
                         )
                     """)
                       # Create app_statistics table (avoiding 'statistics' reserved keyword)
@@ -213,10 +339,22 @@ class DatabaseManager:
             logger.error(f"❌ Failed to create tables: {str(e)}")
             raise
     
+    async def _index_names(self, cursor, inserted: List[tuple]):
+        """Add name trigrams of the inserted (submission_id, submission_data) pairs in one statement,
+        in the insert's transaction, for substring search"""
+        params = []
+        for submission_id, submission_data in inserted:
+            for gram in sorted(name_trigrams(submission_data.get('first_name', ''),
+                                             submission_data.get('last_name', ''))):
+                params += (gram, submission_id)
+        if params:
+            await cursor.execute(_trigram_insert_sql(len(params) // 2), params)
+    
+    @timed_query("save_submission")
     async def save_submission(self, submission_data: Dict) -> str:
         """Save a single submission to the database"""
         try:
-            async with self.pool.acquire() as conn:
+            async with self._acquire() as conn:
                 async with conn.cursor() as cursor:
                     # Generate unique submission ID if not provided
                     submission_id = submission_data.get('submission_id')
@@ -225,19 +363,14 @@ class DatabaseManager:
                         submission_id = str(uuid.uuid4())[:8]
                     
                     # Insert submission
-                    await cursor.execute("""
-                        INSERT INTO submissions 
-                        (submission_id, first_name, last_name, message, batch_id, external_data, processing_time)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        submission_id,
-                        submission_data.get('first_name', ''),
-                        submission_data.get('last_name', ''),
-                        submission_data.get('message', ''),
-                        submission_data.get('batch_id'),
-                        json.dumps(submission_data.get('external_data', {})) if submission_data.get('external_data') else None,
-                        submission_data.get('processing_time', 0.0)
-                    ))
+                    try:
+                        await cursor.execute(INSERT_SUBMISSION_SQL, _submission_params(submission_id, submission_data))
+                    except Exception as e:
+                        if not _is_idempotent_replay(e) or not submission_data.get('idempotency_key'):
+                            raise
+                        logger.info(f"🔑 Skipped duplicate submission for idempotency key: {submission_data['idempotency_key']}")
+                    else:
+                        await self._index_names(cursor, [(submission_id, submission_data)])
                     
                     await conn.commit()
                     logger.debug(f"💾 Saved submission: {submission_id}")
@@ -251,11 +384,13 @@ class DatabaseManager:
                 logger.error(f"❌ Database error saving submission: {str(e)}")
             raise
     
+    @timed_query("save_batch_submissions")
     async def save_batch_submissions(self, submissions: List[Dict]) -> List[str]:
         """Save multiple submissions to the database"""
         try:
             submission_ids = []
-            async with self.pool.acquire() as conn:
+            inserted = []
+            async with self._acquire() as conn:
                 async with conn.cursor() as cursor:
                     for submission_data in submissions:
                         # Generate unique submission ID if not provided
@@ -267,32 +402,30 @@ class DatabaseManager:
                         submission_ids.append(submission_id)
                         
                         # Insert submission
-                        await cursor.execute("""
-                            INSERT INTO submissions 
-                            (submission_id, first_name, last_name, message, batch_id, external_data, processing_time)
-                            VALUES (?, ?, ?, ?, ?, ?, ?)
-                        """, (
-                            submission_id,
-                            submission_data.get('first_name', ''),
-                            submission_data.get('last_name', ''),
-                            submission_data.get('message', ''),
-                            submission_data.get('batch_id'),
-                            json.dumps(submission_data.get('external_data', {})) if submission_data.get('external_data') else None,
-                            submission_data.get('processing_time', 0.0)
-                        ))
+                        try:
+                            await cursor.execute(INSERT_SUBMISSION_SQL, _submission_params(submission_id, submission_data))
+                        except Exception as e:
+                            if not _is_idempotent_replay(e) or not submission_data.get('idempotency_key'):
+                                raise
+                            logger.info(f"🔑 Skipped duplicate submission for idempotency key: {submission_data['idempotency_key']}")
+                        else:
+                            inserted.append((submission_id, submission_data))
                     
+                    await self._index_names(cursor, inserted)
                     await conn.commit()
-                    logger.info(f"💾 Saved batch of {len(submissions)} submissions")
+                    logger.info("💾 Saved batch of %d submissions", len(submissions),
+                                extra={"event": "batch.saved"})
                     return submission_ids
                     
         except Exception as e:
             logger.error(f"❌ Failed to save batch submissions: {str(e)}")
             raise
     
+    @timed_query("get_statistics")
     async def get_statistics(self) -> Dict:
         """Get current statistics from the database"""
         try:
-            async with self.pool.acquire() as conn:
+            async with self._acquire() as conn:
                 async with conn.cursor() as cursor:
                     # Get total submissions
                     await cursor.execute("SELECT COUNT(*) FROM submissions")
@@ -344,91 +477,159 @@ class DatabaseManager:
                 logger.error(f"❌ Database error getting statistics: {str(e)}")
             raise
     
-    async def get_recent_submissions(self, limit: int = 10) -> List[Dict]:
+    async def _fetch_submissions(self, query: str, params: tuple = ()) -> List[SubmissionRecord]:
+        """Run a submissions SELECT (columns in SUBMISSION_COLUMNS order) and return compact records"""
+        async with self._acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query, params)
+                return list(map(SubmissionRecord._make, await cursor.fetchall()))
+    
+    @timed_query("get_recent_submissions")
+    async def get_recent_submissions(self, limit: int = 10) -> List[SubmissionRecord]:
         """Get recent submissions from the database"""
         try:
-            async with self.pool.acquire() as conn:
-                async with conn.cursor() as cursor:
-                    await cursor.execute(f"""
-                        SELECT TOP {limit} 
-                            submission_id, first_name, last_name, message, 
-                            batch_id, processing_time, created_at
-                        FROM submissions 
-                        ORDER BY created_at DESC
-                    """)
-                    
-                    results = await cursor.fetchall()
-                    submissions = []
-                    
-                    for row in results:
-                        submissions.append({
-                            'submission_id': row[0],
-                            'first_name': row[1],
-                            'last_name': row[2],
-                            'message': row[3],
-                            'batch_id': row[4],
-                            'processing_time': float(row[5]) if row[5] else 0.0,
-                            'created_at': row[6].isoformat() if row[6] else None
-                        })
-                    
-                    return submissions
-                    
+            return await self._fetch_submissions(f"""
+                SELECT TOP {limit} {SUBMISSION_COLUMNS}
+                FROM submissions 
+                ORDER BY created_at DESC
+            """)
         except Exception as e:
             logger.error(f"❌ Failed to get recent submissions: {str(e)}")
             raise
     
-    async def get_paginated_submissions(self, limit: int = 10, offset: int = 0) -> List[Dict]:
-        """Get paginated submissions from the database"""
+    @timed_query("get_paginated_submissions")
+    async def get_paginated_submissions(self, limit: int = 10, offset: int = 0,
+                                        filters: Optional[SubmissionFilters] = None) -> List[SubmissionRecord]:
+        """Get paginated submissions from the database, optionally filtered (see _filter_sql)"""
         try:
-            async with self.pool.acquire() as conn:
-                async with conn.cursor() as cursor:
-                    await cursor.execute(f"""
-                        SELECT 
-                            submission_id, first_name, last_name, message, 
-                            batch_id, processing_time, created_at
-                        FROM submissions 
-                        ORDER BY created_at DESC
-                        OFFSET {offset} ROWS
-                        FETCH NEXT {limit} ROWS ONLY
-                    """)
-                    
-                    results = await cursor.fetchall()
-                    submissions = []
-                    
-                    for row in results:
-                        submissions.append({
-                            'submission_id': row[0],
-                            'first_name': row[1],
-                            'last_name': row[2],
-                            'message': row[3],
-                            'batch_id': row[4],
-                            'processing_time': float(row[5]) if row[5] else 0.0,
-                            'created_at': row[6].isoformat() if row[6] else None
-                        })
-                    
-                    return submissions
-                    
+            where, params = _filter_sql(filters)
+            return await self._fetch_submissions(f"""
+                SELECT {SUBMISSION_COLUMNS}
+                FROM submissions 
+                {where}
+                ORDER BY created_at DESC
+                OFFSET {offset} ROWS
+                FETCH NEXT {limit} ROWS ONLY
+            """, tuple(params))
         except Exception as e:
             logger.error(f"❌ Failed to get paginated submissions: {str(e)}")
             raise
     
-    async def get_submissions_count(self) -> int:
-        """Get total count of submissions"""
+    @timed_query("search_submissions")
+    async def search_submissions(self, query: str, limit: int = 10) -> List[SubmissionRecord]:
+        """Find submissions by name: exact, then prefix, then substring matches, newest first within each.
+
+        Prefixes are TOP-limited seeks on idx_first_name / idx_last_name.
+        Substrings (terms of 3+ characters, only when prefixes did not fill
+        the page) intersect the term's trigrams in submission_name_trigrams,
+        so the work follows the posting lists of those trigrams rather than
+        the table size.
+        """
+        terms = normalize_query(query)
+        if not terms:
+            return []
+        try:
+            if len(terms) == 2:
+                matches = await self._fetch_submissions(f"""
+                    SELECT TOP {limit} {SUBMISSION_COLUMNS}
+                    FROM submissions
+                    WHERE first_name LIKE ? ESCAPE '\\' AND last_name LIKE ? ESCAPE '\\'
+                    ORDER BY first_name, last_name
+                """, (_like_escape(terms[0]) + '%', _like_escape(terms[1]) + '%'))
+            else:
+                term = terms[0]
+                prefix = _like_escape(term) + '%'
+                matches = await self._fetch_submissions(f"""
+                    SELECT {SUBMISSION_COLUMNS} FROM (
+                        SELECT TOP {limit} {SUBMISSION_COLUMNS} FROM submissions
+                        WHERE first_name LIKE ? ESCAPE '\\' ORDER BY first_name
+                    ) AS first_name_matches
+                    UNION
+                    SELECT {SUBMISSION_COLUMNS} FROM (
+                        SELECT TOP {limit} {SUBMISSION_COLUMNS} FROM submissions
+                        WHERE last_name LIKE ? ESCAPE '\\' ORDER BY last_name
+                    ) AS last_name_matches
+                """, (prefix, prefix))
+
+                grams = sorted(trigrams(term))
+                if grams and len(matches) < limit:
+                    contains = '%' + _like_escape(term) + '%'
+                    placeholders = ", ".join(["?"] * len(grams))
+                    matches += await self._fetch_submissions(f"""
+                        SELECT TOP {limit} {SUBMISSION_COLUMNS}
+                        FROM submissions
+                        WHERE id IN (
+                            SELECT submission_pk FROM submission_name_trigrams
+                            WHERE trigram IN ({placeholders})
+                            GROUP BY submission_pk
+                            HAVING COUNT(*) = {len(grams)}
+                        )
+                        AND (first_name LIKE ? ESCAPE '\\' OR last_name LIKE ? ESCAPE '\\')
+                        ORDER BY id DESC
+                    """, (*grams, contains, contains))
+
+            ranked = {}
+            for record in matches:
+                rank = match_rank(terms, record.first_name, record.last_name)
+                ranked.setdefault(record.submission_id, (SUBSTRING if rank is None else rank, record))
+            ordered = sorted(ranked.values(), key=lambda match: (
+                match[0], -(match[1].created_at.timestamp() if match[1].created_at else 0.0)))
+            return [record for _, record in ordered[:limit]]
+        except Exception as e:
+            logger.error(f"❌ Failed to search submissions: {str(e)}")
+            raise
+    
+    @timed_query("get_submissions_count")
+    async def get_submissions_count(self, filters: Optional[SubmissionFilters] = None) -> int:
+        """Get total count of submissions, optionally filtered"""
         try:
-            async with self.pool.acquire() as conn:
+            where, params = _filter_sql(filters)
+            async with self._acquire() as conn:
                 async with conn.cursor() as cursor:
-                    await cursor.execute("SELECT COUNT(*) FROM submissions")
+                    await cursor.execute(f"SELECT COUNT(*) FROM submissions {where}", tuple(params))
                     result = await cursor.fetchone()
                     return int(result[0]) if result else 0
                     
         except Exception as e:
             logger.error(f"❌ Failed to get submissions count: {str(e)}")
             raise
+
+    @timed_query("get_batch_summary")
+    async def get_batch_summary(self, batch_id: str) -> Optional[Dict]:
+        """Aggregate one batch from a seek on idx_batch_id; None if the batch has no rows"""
+        try:
+            async with self._acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute("""
+                        SELECT COUNT(*),
+                               SUM(CASE WHEN message IS NOT NULL AND message <> '' THEN 1 ELSE 0 END),
+                               MIN(created_at), MAX(created_at),
+                               AVG(processing_time), SUM(processing_time)
+                        FROM submissions
+                        WHERE batch_id = ?
+                    """, (batch_id,))
+                    count, with_message, first_at, last_at, avg_time, total_time = await cursor.fetchone()
+                    if not count:
+                        return None
+                    return {
+                        'batch_id': batch_id,
+                        'submissions': int(count),
+                        'with_message': int(with_message or 0),
+                        'first_submission_at': first_at.replace(tzinfo=timezone.utc).isoformat() if first_at else None,
+                        'last_submission_at': last_at.replace(tzinfo=timezone.utc).isoformat() if last_at else None,
+                        'avg_processing_time': round(float(avg_time or 0.0), 3),
+                        'total_processing_time': round(float(total_time or 0.0), 3)
+                    }
+
+        except Exception as e:
+            logger.error(f"❌ Failed to get batch summary: {str(e)}")
+            raise
     
+    @timed_query("update_statistics")
     async def update_statistics(self, stats: Dict):
         """Update statistics in the database"""
         try:
-            async with self.pool.acquire() as conn:
+            async with self._acquire() as conn:
                 async with conn.cursor() as cursor:
                     for stat_name, stat_value in stats.items():
                         # Convert value to JSON string for storage
@@ -451,6 +652,303 @@ class DatabaseManager:
             logger.error(f"❌ Failed to update statistics: {str(e)}")
             raise
     
+    @timed_query("increment_statistics")
+    async def increment_statistics(self, counters: Dict[str, int], values: Optional[Dict[str, str]] = None):
+        """Add deltas to counter statistics and set plain values in a single MERGE statement"""
+        values = values or {}
+        if not counters and not values:
+            return
+
+        rows = []
+        params = []
+        for stat_name, delta in counters.items():
+            rows.append("(CAST(? AS NVARCHAR(100)), CAST(? AS BIGINT), CAST(NULL AS NVARCHAR(MAX)))")
+            params.extend([stat_name, delta])
+        for stat_name, stat_value in values.items():
+            rows.append("(CAST(? AS NVARCHAR(100)), CAST(NULL AS BIGINT), CAST(? AS NVARCHAR(MAX)))")
+            params.extend([stat_name, stat_value])
+
+        try:
+            async with self._acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(f"""
+                        MERGE app_statistics AS target
+                        USING (VALUES {', '.join(rows)}) AS source (stat_name, delta, stat_value)
+                        ON target.stat_name = source.stat_name
+                        WHEN MATCHED THEN
+                            UPDATE SET stat_value = CASE
+                                WHEN source.delta IS NULL THEN source.stat_value
+                                ELSE CAST(ISNULL(TRY_CAST(target.stat_value AS BIGINT), 0) + source.delta AS NVARCHAR(MAX))
+                            END,
+                            updated_at = GETUTCDATE()
+                        WHEN NOT MATCHED THEN
+                            INSERT (stat_name, stat_value)
+                            VALUES (source.stat_name, COALESCE(source.stat_value, CAST(source.delta AS NVARCHAR(MAX))));
+                    """, params)
+
+                    await conn.commit()
+                    logger.debug(f"📊 Incremented {len(counters)} and set {len(values)} statistics")
+
+        except Exception as e:
+            logger.error(f"❌ Failed to increment statistics: {str(e)}")
+            raise
+
+    @timed_query("get_statistics_by_prefix")
+    async def get_statistics_by_prefix(self, prefix: str) -> Dict[str, str]:
+        """Raw values of every statistic whose name starts with prefix (a seek on the stat_name index)"""
+        try:
+            async with self._acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute("""
+                        SELECT stat_name, stat_value FROM app_statistics
+                        WHERE stat_name LIKE ? ESCAPE '\\'
+                    """, (_like_escape(prefix) + "%",))
+                    return {row[0]: row[1] for row in await cursor.fetchall()}
+
+        except Exception as e:
+            logger.error(f"❌ Failed to get statistics by prefix: {str(e)}")
+            raise
+
+    @timed_query("fold_stale_statistics")
+    async def fold_stale_statistics(self, prefix: str, archive_name: str, max_age_seconds: int,
+                                    fold: Callable[[Optional[str], List[str]], str]) -> int:
+        """Delete statistics under prefix not updated for max_age_seconds and fold their values into archive_name.
+
+        The archive row is read under UPDLOCK/HOLDLOCK (a key-range lock when it
+        does not exist yet), so concurrent folds serialize and no value is
+        counted twice or lost; returns the number of rows folded.
+        """
+        try:
+            async with self._acquire() as conn:
+                async with conn.cursor() as cursor:
+                    try:
+                        await cursor.execute("""
+                            SELECT stat_value FROM app_statistics WITH (UPDLOCK, HOLDLOCK)
+                            WHERE stat_name = ?
+                        """, (archive_name,))
+                        archive = await cursor.fetchone()
+                        await cursor.execute("""
+                            DELETE FROM app_statistics
+                            OUTPUT DELETED.stat_value
+                            WHERE stat_name LIKE ? ESCAPE '\\' AND stat_name <> ?
+                              AND updated_at < DATEADD(second, -?, GETUTCDATE())
+                        """, (_like_escape(prefix) + "%", archive_name, max_age_seconds))
+                        stale = [row[0] for row in await cursor.fetchall() if row[0]]
+                        if stale:
+                            await cursor.execute("""
+                                MERGE app_statistics AS target
+                                USING (SELECT ? AS stat_name, ? AS stat_value) AS source
+                                ON target.stat_name = source.stat_name
+                                WHEN MATCHED THEN
+                                    UPDATE SET stat_value = source.stat_value, updated_at = GETUTCDATE()
+                                WHEN NOT MATCHED THEN
+                                    INSERT (stat_name, stat_value) VALUES (source.stat_name, source.stat_value);
+                            """, (archive_name, fold(archive[0] if archive else None, stale)))
+                        await conn.commit()
+                    except Exception:
+                        await conn.rollback()
+                        raise
+                    if stale:
+                        logger.debug(f"📊 Folded {len(stale)} stale statistics into {archive_name}")
+                    return len(stale)
+
+        except Exception as e:
+            logger.error(f"❌ Failed to fold stale statistics: {str(e)}")
+            raise
+
+    @timed_query("merge_statistics")
+    async def merge_statistics(self, names: List[str],
+                               merge: Callable[[str, Optional[str]], str]) -> Dict[str, str]:
+        """Read-modify-write statistics under UPDLOCK/HOLDLOCK: each stored value is replaced by merge(name, value).
+
+        Concurrent callers serialize on the rows (or the key range, for rows
+        not created yet); returns the values written.
+        """
+        if not names:
+            return {}
+        placeholders = ", ".join(["?"] * len(names))
+        try:
+            async with self._acquire() as conn:
+                async with conn.cursor() as cursor:
+                    try:
+                        await cursor.execute(f"""
+                            SELECT stat_name, stat_value FROM app_statistics WITH (UPDLOCK, HOLDLOCK)
+                            WHERE stat_name IN ({placeholders})
+                        """, names)
+                        stored = {row[0]: row[1] for row in await cursor.fetchall()}
+                        merged = {name: merge(name, stored.get(name)) for name in names}
+                        for name, value in merged.items():
+                            await cursor.execute("""
+                                MERGE app_statistics AS target
+                                USING (SELECT ? AS stat_name, ? AS stat_value) AS source
+                                ON target.stat_name = source.stat_name
+                                WHEN MATCHED THEN
+                                    UPDATE SET stat_value = source.stat_value, updated_at = GETUTCDATE()
+                                WHEN NOT MATCHED THEN
+                                    INSERT (stat_name, stat_value) VALUES (source.stat_name, source.stat_value);
+                            """, (name, value))
+                        await conn.commit()
+                    except Exception:
+                        await conn.rollback()
+                        raise
+                    logger.debug(f"📊 Merged {len(merged)} statistics")
+                    return merged
+
+        except Exception as e:
+            logger.error(f"❌ Failed to merge statistics: {str(e)}")
+            raise
+
+    @timed_query("delete_statistics")
+    async def delete_statistics(self, names: List[str]):
+        """Delete statistics by name"""
+        if not names:
+            return
+        try:
+            async with self._acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(
+                        f"DELETE FROM app_statistics WHERE stat_name IN ({', '.join(['?'] * len(names))})", names)
+                    await conn.commit()
+                    logger.debug(f"📊 Deleted {len(names)} statistics")
+
+        except Exception as e:
+            logger.error(f"❌ Failed to delete statistics: {str(e)}")
+            raise
+
+    @timed_query("acquire_session_lock")
+    async def acquire_session_lock(self, resource: str):
+        """Try to take an exclusive session-owned application lock (sp_getapplock) without waiting.
+
+        Returns the dedicated autocommit connection that holds it, or None if
+        another session does; closing that connection (or losing it) releases
+        the lock.
+        """
+        conn = await aioodbc.connect(dsn=self.connection_string, autocommit=True)
+        try:
+            cursor = await conn.cursor()
+            await cursor.execute("""
+                SET NOCOUNT ON;
+                DECLARE @result INT;
+                EXEC @result = sp_getapplock @Resource = ?, @LockMode = 'Exclusive',
+                                             @LockOwner = 'Session', @LockTimeout = 0;
+                SELECT @result;
+            """, (resource,))
+            result = (await cursor.fetchone())[0]
+            await cursor.close()
+        except BaseException:
+            # Including cancellation or a caller's timeout: once sp_getapplock has
+            # run, this connection may hold the lock and must not be leaked
+            await conn.close()
+            raise
+        if result >= 0:
+            return conn
+        await conn.close()
+        return None
+
+    @timed_query("session_lock_held")
+    async def session_lock_held(self, conn, resource: str) -> bool:
+        """Whether conn (from acquire_session_lock) still holds the lock; raises if the connection is gone"""
+        cursor = await conn.cursor()
+        try:
+            await cursor.execute("SELECT APPLOCK_MODE('public', ?, 'Session')", (resource,))
+            row = await cursor.fetchone()
+            return bool(row) and row[0] == "Exclusive"
+        finally:
+            await cursor.close()
+
+    # Migrations: long-running schema work run by migrate.py, never at startup
+
+    @timed_query("index_exists")
+    async def index_exists(self, table: str, index_name: str) -> bool:
+        async with self._acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute("SELECT 1 FROM sys.indexes WHERE object_id = OBJECT_ID(?) AND name = ?",
+                                     (table, index_name))
+                return await cursor.fetchone() is not None
+
+    @timed_query("index_is_covering")
+    async def index_is_covering(self, table: str, index_name: str) -> bool:
+        """Whether the index has INCLUDE columns (older trees created the listing indexes without)"""
+        async with self._acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute("""
+                    SELECT 1 FROM sys.index_columns ic
+                    JOIN sys.indexes i ON i.object_id = ic.object_id AND i.index_id = ic.index_id
+                    WHERE i.object_id = OBJECT_ID(?) AND i.name = ? AND ic.is_included_column = 1
+                """, (table, index_name))
+                return await cursor.fetchone() is not None
+
+    @timed_query("create_index")
+    async def create_index(self, table: str, index_name: str, key_columns: str,
+                           included: Optional[str] = None, drop_existing: bool = False) -> bool:
+        """Create (or with drop_existing, rebuild) an index online where the edition allows it.
+
+        Online builds (Enterprise, Developer, Azure SQL) keep the table
+        writable; other editions fall back to an offline build, which blocks
+        writes to the table until it finishes. Returns whether it ran online.
+        """
+        statement = f"CREATE INDEX {index_name} ON {table} ({key_columns})"
+        if included:
+            statement += f" INCLUDE ({included})"
+        options = ["DROP_EXISTING = ON"] if drop_existing else []
+        for online in (True, False):
+            with_options = options + (["ONLINE = ON"] if online else [])
+            try:
+                async with self._acquire() as conn:
+                    async with conn.cursor() as cursor:
+                        await cursor.execute(statement + (f" WITH ({', '.join(with_options)})" if with_options else ""))
+                        await conn.commit()
+                return online
+            except Exception as e:
+                # Error 1712: online index operations need Enterprise edition
+                if not online or ('1712' not in str(e) and 'online index' not in str(e).lower()):
+                    raise
+                logger.warning(f"⚠️ Online index builds are not available, building {index_name} offline")
+
+    @timed_query("max_submission_pk")
+    async def max_submission_pk(self) -> int:
+        async with self._acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute("SELECT ISNULL(MAX(id), 0) FROM submissions")
+                return (await cursor.fetchone())[0]
+
+    @timed_query("backfill_name_trigrams")
+    async def backfill_name_trigrams(self, after_pk: int, until_pk: int, batch_size: int) -> Optional[int]:
+        """Add the name trigrams of the next batch_size submissions after after_pk (up to until_pk), in one transaction.
+
+        Returns the last row id covered, or None when there are no rows left.
+        Trigrams that already exist (rows indexed on insert) are skipped, so
+        batches can be re-run after an interruption.
+        """
+        async with self._acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute("""
+                    SELECT MAX(id) FROM (
+                        SELECT TOP (?) id FROM submissions WHERE id > ? AND id <= ? ORDER BY id
+                    ) AS batch
+                """, (batch_size, after_pk, until_pk))
+                last_pk = (await cursor.fetchone())[0]
+                if last_pk is None:
+                    return None
+                await cursor.execute("""
+                    INSERT INTO submission_name_trigrams (trigram, submission_pk)
+                    SELECT DISTINCT g.trigram, g.submission_pk
+                    FROM (
+                        SELECT LOWER(SUBSTRING(n.name, v.number, 3)) AS trigram, s.id AS submission_pk
+                        FROM submissions s
+                        CROSS APPLY (VALUES (s.first_name), (s.last_name)) AS n(name)
+                        JOIN master.dbo.spt_values v
+                            ON v.type = 'P' AND v.number BETWEEN 1 AND LEN(n.name) - 2
+                        WHERE s.id > ? AND s.id <= ?
+                    ) AS g
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM submission_name_trigrams t
+                        WHERE t.trigram = g.trigram AND t.submission_pk = g.submission_pk
+                    )
+                """, (after_pk, last_pk))
+                await conn.commit()
+                return last_pk
+
     async def close(self):
         """Close database connection pool"""
         if self.pool:
@@ -458,6 +956,7 @@ class DatabaseManager:
             await self.pool.wait_closed()
             logger.info("🔌 Database connection pool closed")
     
+    @timed_query("is_database_available")
     async def is_database_available(self) -> bool:
         """Check if database connection is available and healthy"""
         if not self.connection_string:
@@ -469,7 +968,7 @@ class DatabaseManager:
             return False
             
         try:
-            async with self.pool.acquire() as conn:
+            async with self._acquire() as conn:
                 async with conn.cursor() as cursor:
                     await cursor.execute("SELECT 1")
                     result = await cursor.fetchone()
@@ -487,6 +986,7 @@ class DatabaseManager:
         """Ensure connection pool is available, reinitialize if needed"""
         if not self.pool or not await self.is_database_available():
             logger.warning("🔄 Database connection lost, attempting to reinitialize...")
+            DB_RECONNECT_ATTEMPTS.inc()
             try:
                 if self.pool:
                     self.pool.close()
@@ -0,0 +1,298 @@
+"""
+Fallback submission storage for Random Corp API
+Holds submissions in demo mode or while the database is unavailable, per process or shared across workers
+"""
+
+import os
+import json
+import struct
+import logging
+from array import array
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from shared_state import SharedSegment, multi_worker_enabled, state_prefix
+from submission_rows import SubmissionFilters, SubmissionRecord
+
+logger = logging.getLogger(__name__)
+
+# Compact record kept per submission: the SubmissionRecord columns with created_at as epoch
+# seconds. external_data and other request-only fields are not kept.
+Record = Tuple[str, str, str, Optional[str], Optional[str], float, float]
+
+
+def to_record(submission: Dict) -> Record:
+    timestamp = submission.get('timestamp')
+    try:
+        created = datetime.fromisoformat(timestamp).timestamp() if timestamp else datetime.now(timezone.utc).timestamp()
+    except (TypeError, ValueError):
+        created = datetime.now(timezone.utc).timestamp()
+    return (
+        submission.get('submission_id') or '',
+        submission.get('first_name', ''),
+        submission.get('last_name', ''),
+        submission.get('message'),
+        submission.get('batch_id'),
+        float(submission.get('processing_time') or 0.0),
+        created
+    )
+
+
+def _iso(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+def record_to_submission(record: Record) -> SubmissionRecord:
+    submission_id, first_name, last_name, message, batch_id, processing_time, created = record
+    return SubmissionRecord(submission_id, first_name, last_name, message, batch_id, processing_time,
+                            datetime.fromtimestamp(created, timezone.utc))
+
+
+def record_to_latest(record: Record) -> Dict:
+    """Same shape as the latest_submission of DatabaseManager.get_statistics"""
+    return {
+        'id': record[0],
+        'name': f"{record[1]} {record[2]}".strip(),
+        'timestamp': _iso(record[6])
+    }
+
+
+def _matcher(filters: SubmissionFilters) -> Callable[[Record], bool]:
+    created_from = filters.created_from.timestamp() if filters.created_from else None
+    created_to = filters.created_to.timestamp() if filters.created_to else None
+
+    def matches(record: Record) -> bool:
+        if filters.batch_id is not None and record[4] != filters.batch_id:
+            return False
+        if created_from is not None and record[6] < created_from:
+            return False
+        if created_to is not None and record[6] >= created_to:
+            return False
+        if filters.has_message is not None and bool(record[3]) != filters.has_message:
+            return False
+        return True
+    return matches
+
+
+def filter_page(store, filters: SubmissionFilters, offset: int, limit: int) -> Tuple[int, List[SubmissionRecord]]:
+    """Matching count and newest-first page of retained submissions (a scan; the ring is bounded)"""
+    _, _, records = store.entries_since(0)
+    matching = list(filter(_matcher(filters), reversed(records)))
+    start = max(offset, 0)
+    return len(matching), [record_to_submission(record) for record in matching[start:start + max(limit, 0)]]
+
+
+def batch_summary(store, batch_id: str) -> Optional[Dict]:
+    """Same shape as DatabaseManager.get_batch_summary, over retained submissions"""
+    _, _, records = store.entries_since(0)
+    matching = [record for record in records if record[4] == batch_id]
+    if not matching:
+        return None
+    total_time = sum(record[5] for record in matching)
+    return {
+        'batch_id': batch_id,
+        'submissions': len(matching),
+        'with_message': sum(1 for record in matching if record[3]),
+        'first_submission_at': _iso(min(record[6] for record in matching)),
+        'last_submission_at': _iso(max(record[6] for record in matching)),
+        'avg_processing_time': round(total_time / len(matching), 3),
+        'total_processing_time': round(total_time, 3)
+    }
+
+
+class MemoryFallbackStore:
+    """Fixed-capacity ring of submissions for one process (single-worker mode).
+
+    Columns are preallocated: strings in fixed-size lists, processing and
+    creation times in float arrays, so memory stays flat once the ring is
+    full. Count and processing-time sum are running totals over every
+    submission ever appended, which makes stats() O(1); pagination covers
+    the most recent `capacity` entries, newest first like the database.
+    """
+
+    __slots__ = ("capacity", "_ids", "_first_names", "_last_names", "_messages", "_batch_ids",
+                 "_processing_times", "_created", "_appended", "_processing_time_sum")
+
+    def __init__(self, capacity: int = 10000):
+        self.capacity = capacity
+        self._ids: List[Optional[str]] = [None] * capacity
+        self._first_names: List[Optional[str]] = [None] * capacity
+        self._last_names: List[Optional[str]] = [None] * capacity
+        self._messages: List[Optional[str]] = [None] * capacity
+        self._batch_ids: List[Optional[str]] = [None] * capacity
+        self._processing_times = array('d', bytes(8 * capacity))
+        self._created = array('d', bytes(8 * capacity))
+        self._appended = 0
+        self._processing_time_sum = 0.0
+
+    def __len__(self) -> int:
+        return min(self._appended, self.capacity)
+
+    def _record(self, index: int) -> Record:
+        slot = index % self.capacity
+        return (self._ids[slot], self._first_names[slot], self._last_names[slot], self._messages[slot],
+                self._batch_ids[slot], self._processing_times[slot], self._created[slot])
+
+    def append(self, submission: Dict):
+        record = to_record(submission)
+        slot = self._appended % self.capacity
+        (self._ids[slot], self._first_names[slot], self._last_names[slot], self._messages[slot],
+         self._batch_ids[slot], self._processing_times[slot], self._created[slot]) = record
+        self._appended += 1
+        self._processing_time_sum += record[5]
+
+    def stats(self) -> Dict:
+        """Total submissions, mean processing time and the latest submission"""
+        appended = self._appended
+        return {
+            "count": appended,
+            "avg_processing_time": self._processing_time_sum / appended if appended else 0.0,
+            "latest": record_to_latest(self._record(appended - 1)) if appended else None
+        }
+
+    def page(self, offset: int, limit: int) -> List[SubmissionRecord]:
+        """Newest-first page of retained submissions"""
+        oldest = self._appended - len(self)
+        start = self._appended - 1 - max(offset, 0)
+        end = max(start - max(limit, 0), oldest - 1)
+        return [record_to_submission(self._record(index)) for index in range(start, end, -1)]
+
+    def entries_since(self, position: int) -> Tuple[int, int, List[Record]]:
+        """Oldest retained position, append count and the retained records from position on"""
+        appended = self._appended
+        oldest = appended - len(self)
+        return oldest, appended, [self._record(index) for index in range(max(position, oldest), appended)]
+
+    def clear(self):
+        # Old slots become unreachable and are overwritten as the ring refills
+        self._appended = 0
+        self._processing_time_sum = 0.0
+
+    def close(self):
+        pass
+
+
+# Header: appended_total, retained, processing_time_sum
+_HEADER = struct.Struct("<QQd")
+_SLOT_LENGTH = struct.Struct("<I")
+# Names are capped at 50 characters (200 bytes of UTF-8) and messages are short, so a record normally
+# fits; anything bigger (e.g. a small SHARED_STORE_SLOT_BYTES) is truncated rather than rejected
+_MIN_SLOT_SIZE = 768
+# Record fields shortened, in this order, when a record does not fit a slot:
+# message, last name, first name, batch id, submission id
+_TRUNCATE_ORDER = (3, 2, 1, 4, 0)
+
+
+def _slot_json(record: Record) -> bytes:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class SharedFallbackStore:
+    """Fixed-capacity ring of JSON-encoded submission records in shared memory (multi-worker mode).
+
+    Every worker appends to and reads from the same ring, so /api/stats
+    and /api/submissions agree whichever worker serves them. The count and
+    processing-time sum cover every submission ever appended; pagination
+    covers the most recent `capacity` entries, newest first.
+    """
+
+    def __init__(self, name: str, capacity: int = 10000, slot_size: int = 1024):
+        self.capacity = capacity
+        self.slot_size = max(slot_size, _MIN_SLOT_SIZE)
+        self.segment = SharedSegment(name, _HEADER.size + capacity * self.slot_size)
+        self._buf = self.segment.data
+        if self.segment.created:
+            logger.info(f"🧩 Created shared fallback store {name} ({capacity} x {self.slot_size} bytes)")
+
+    def _slot_offset(self, index: int) -> int:
+        return _HEADER.size + (index % self.capacity) * self.slot_size
+
+    def _encode(self, record: Record) -> bytes:
+        """Slot payload; a record too big for a slot has its text fields shortened to fit"""
+        limit = self.slot_size - _SLOT_LENGTH.size
+        payload = _slot_json(record)
+        if len(payload) <= limit:
+            return payload
+        size = len(payload)
+        fields = list(record)
+        for index in _TRUNCATE_ORDER:
+            # Each character cut removes at least one byte, so this converges
+            while len(payload) > limit and fields[index]:
+                fields[index] = fields[index][:max(0, len(fields[index]) - (len(payload) - limit))]
+                payload = _slot_json(tuple(fields))
+        logger.warning(f"⚠️ Submission {record[0]} ({size} bytes) truncated to the {self.slot_size}-byte "
+                       f"shared store slot; raise SHARED_STORE_SLOT_BYTES to keep whole records")
+        return payload
+
+    def _read_slot(self, index: int) -> Record:
+        offset = self._slot_offset(index)
+        length = _SLOT_LENGTH.unpack_from(self._buf, offset)[0]
+        start = offset + _SLOT_LENGTH.size
+        return tuple(json.loads(bytes(self._buf[start:start + length])))
+
+    def __len__(self) -> int:
+        return _HEADER.unpack_from(self._buf, 0)[1]
+
+    def append(self, submission: Dict):
+        record = to_record(submission)
+        payload = self._encode(record)
+        processing_time = record[5]
+        with self.segment.lock():
+            appended, retained, total_time = _HEADER.unpack_from(self._buf, 0)
+            offset = self._slot_offset(appended)
+            _SLOT_LENGTH.pack_into(self._buf, offset, len(payload))
+            start = offset + _SLOT_LENGTH.size
+            self._buf[start:start + len(payload)] = payload
+            _HEADER.pack_into(self._buf, 0, appended + 1, min(retained + 1, self.capacity),
+                              total_time + processing_time)
+
+    def stats(self) -> Dict:
+        with self.segment.lock():
+            appended, _, total_time = _HEADER.unpack_from(self._buf, 0)
+            latest = self._read_slot(appended - 1) if appended else None
+        return {
+            "count": appended,
+            "avg_processing_time": total_time / appended if appended else 0.0,
+            "latest": record_to_latest(latest) if latest else None
+        }
+
+    def page(self, offset: int, limit: int) -> List[SubmissionRecord]:
+        with self.segment.lock():
+            appended, retained, _ = _HEADER.unpack_from(self._buf, 0)
+            oldest = appended - retained
+            start = appended - 1 - max(offset, 0)
+            end = max(start - max(limit, 0), oldest - 1)
+            records = [self._read_slot(index) for index in range(start, end, -1)]
+        return [record_to_submission(record) for record in records]
+
+    def entries_since(self, position: int) -> Tuple[int, int, List[Record]]:
+        with self.segment.lock():
+            appended, retained, _ = _HEADER.unpack_from(self._buf, 0)
+            oldest = appended - retained
+            records = [self._read_slot(index) for index in range(max(position, oldest), appended)]
+        return oldest, appended, records
+
+    def clear(self):
+        with self.segment.lock():
+            _HEADER.pack_into(self._buf, 0, 0, 0, 0.0)
+
+    def close(self):
+        self._buf = None
+        self.segment.close()
+
+
+# Global fallback store instance - initialized lazily
+fallback_store = None
+
+def get_fallback_store():
+    """Get or create the fallback store: shared across workers when WEB_CONCURRENCY > 1"""
+    global fallback_store
+    if fallback_store is None:
+        if multi_worker_enabled():
+            fallback_store = SharedFallbackStore(
+                f"{state_prefix()}-submissions",
+                capacity=int(os.getenv('FALLBACK_STORE_CAPACITY', '10000')),
+                slot_size=int(os.getenv('SHARED_STORE_SLOT_BYTES', '1024'))
+            )
+        else:
+            fallback_store = MemoryFallbackStore(capacity=int(os.getenv('FALLBACK_STORE_CAPACITY', '10000')))
+    return fallback_store
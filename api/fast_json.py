@@ -0,0 +1,85 @@
+"""
+Fast JSON rendering for Random Corp API
+orjson-backed responses that bypass FastAPI's response validation and jsonable_encoder
+"""
+
+import os
+import json
+import logging
+from datetime import date, datetime
+from typing import Any, Optional, Type, TypeVar
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Opt-in switch for the fast rendering path
+FAST_JSON_ENABLED = os.getenv('FAST_JSON', 'false').lower() == 'true'
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def _default(value: Any) -> Any:
+    """Encode types the stdlib json module doesn't handle"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content to compact JSON bytes"""
+    if isinstance(content, BaseModel):
+        # pydantic-core serializes models straight to bytes without an intermediate dict
+        return to_json(content)
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, separators=(",", ":"), ensure_ascii=False, default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (or pydantic-core for models)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def build(model: Type[ModelT], **fields: Any) -> ModelT:
+    """Construct a response model, skipping validation on the fast path.
+
+    Only for responses we assemble ourselves from already-validated values;
+    anything derived from user input still goes through the validating
+    constructor when FAST_JSON is off.
+    """
+    if FAST_JSON_ENABLED:
+        return model.model_construct(**fields)
+    return model(**fields)
+
+
+def render(content: Any, response: Optional[Response] = None) -> Any:
+    """Return content as a pre-rendered response on the fast path.
+
+    Returning a Response makes FastAPI skip response_model validation and
+    jsonable_encoder. Headers set on the injected response are copied over,
+    since FastAPI only merges them for non-Response return values.
+    """
+    if not FAST_JSON_ENABLED:
+        return content
+    rendered = FastJSONResponse(content)
+    if response is not None:
+        for name, value in response.headers.items():
+            if name not in ("content-length", "content-type"):
+                rendered.headers[name] = value
+    return rendered
+
+
+if FAST_JSON_ENABLED:
+    logger.info(f"⚡ Fast JSON rendering enabled ({'orjson' if orjson is not None else 'stdlib json'})")
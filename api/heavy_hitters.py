@@ -0,0 +1,158 @@
+"""
+Top names for Random Corp API
+Space-Saving heavy hitters over submitted names, with bounded memory and per-name error bounds
+"""
+
+import os
+import json
+import time
+import heapq
+import logging
+from typing import Dict, List, Optional, Tuple
+from sketches import ReplicatedSummary
+
+logger = logging.getLogger(__name__)
+
+
+def name_key(name: str) -> str:
+    """Names are counted case- and whitespace-insensitively"""
+    return " ".join(name.split()).casefold()
+
+
+class SpaceSaving:
+    """Space-Saving counters (Metwally et al.) for the most frequent names.
+
+    At most `capacity` names are tracked. An untracked name takes over the
+    smallest counter and inherits its count as error, so every tracked
+    count overestimates the true one by at most its error, and any name
+    seen more than total / capacity times is tracked. `floor` bounds the
+    count of every untracked name. Summaries merge (Agarwal et al.): a
+    name missing from one side is charged that side's floor, then only the
+    `capacity` largest counters are kept.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self.total = 0
+        self.floor = 0
+        # key -> [count, error, display name]
+        self._counters: Dict[str, List] = {}
+        # One (count, key) entry per tracked key; counts only grow, so a stale entry is refreshed when popped
+        self._heap: List[Tuple[int, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+    def add(self, name: str, count: int = 1):
+        key = name_key(name)
+        if not key:
+            return
+        self.total += count
+        entry = self._counters.get(key)
+        if entry is not None:
+            entry[0] += count
+            return
+        if len(self._counters) >= self.capacity:
+            self.floor = max(self.floor, self._evict_min())
+        self._counters[key] = [self.floor + count, self.floor, " ".join(name.split())]
+        heapq.heappush(self._heap, (self.floor + count, key))
+
+    def _evict_min(self) -> int:
+        while True:
+            count, key = heapq.heappop(self._heap)
+            current = self._counters[key][0]
+            if current == count:
+                del self._counters[key]
+                return count
+            heapq.heappush(self._heap, (current, key))
+
+    def merge(self, other: "SpaceSaving"):
+        counters = {}
+        for key in self._counters.keys() | other._counters.keys():
+            mine, theirs = self._counters.get(key), other._counters.get(key)
+            counters[key] = [
+                (mine[0] if mine else self.floor) + (theirs[0] if theirs else other.floor),
+                (mine[1] if mine else self.floor) + (theirs[1] if theirs else other.floor),
+                (mine or theirs)[2],
+            ]
+        self.total += other.total
+        self.floor += other.floor
+        if len(counters) > self.capacity:
+            ranked = sorted(counters.items(), key=lambda item: item[1][0], reverse=True)
+            self.floor = max(self.floor, ranked[self.capacity][1][0])
+            counters = dict(ranked[:self.capacity])
+        self._counters = counters
+        self._heap = [(entry[0], key) for key, entry in counters.items()]
+        heapq.heapify(self._heap)
+
+    def top(self, k: int) -> List[Dict]:
+        """The k largest counters, each with its guaranteed minimum and whether it is surely in the top k"""
+        ranked = heapq.nlargest(k + 1, self._counters.values(), key=lambda entry: entry[0])
+        # Anything outside the returned k counts at most this much
+        threshold = ranked[k][0] if len(ranked) > k else self.floor
+        return [{"name": display, "count": count, "min_count": count - error,
+                 "guaranteed": count - error >= threshold}
+                for count, error, display in ranked[:k]]
+
+    def to_dict(self) -> Dict:
+        return {"m": self.capacity, "n": self.total, "f": self.floor,
+                "c": [[display, count, error] for count, error, display in self._counters.values()]}
+
+    @classmethod
+    def from_dict(cls, data: Dict, capacity: Optional[int] = None) -> "SpaceSaving":
+        summary = cls(capacity or data["m"])
+        summary.total, summary.floor = data["n"], data["f"]
+        for display, count, error in data["c"]:
+            summary._counters[name_key(display)] = [count, error, display]
+        if len(summary._counters) > summary.capacity:
+            # Stored with a larger capacity: keep the largest counters, as a merge would
+            summary.merge(cls(summary.capacity))
+        summary._heap = [(entry[0], key) for key, entry in summary._counters.items()]
+        heapq.heapify(summary._heap)
+        return summary
+
+
+class TopNames(ReplicatedSummary):
+    """Most frequently submitted full names across every worker and replica"""
+
+    stat_prefix = "top_names:"
+    description = "top names"
+
+    def __init__(self, persist_interval: float = 30.0, capacity: int = 1000):
+        self.capacity = capacity
+        super().__init__(persist_interval)
+        self._view: Optional[SpaceSaving] = None
+        self._view_second = -1
+
+    def empty(self) -> SpaceSaving:
+        return SpaceSaving(self.capacity)
+
+    def decode(self, value: str) -> SpaceSaving:
+        return SpaceSaving.from_dict(json.loads(value), self.capacity)
+
+    def encode(self, summary: SpaceSaving) -> str:
+        return json.dumps(summary.to_dict(), separators=(",", ":"))
+
+    def record(self, first_name: str, last_name: str):
+        self.local.add(f"{first_name} {last_name}")
+
+    def view(self) -> SpaceSaving:
+        """Merged summary, recomputed at most once a second"""
+        now = int(time.time())
+        if self._view is None or now != self._view_second:
+            self._view, self._view_second = self.combined(), now
+        return self._view
+
+
+# Global top names instance - initialized lazily
+top_names = None
+
+def get_top_names() -> TopNames:
+    """Get or create the top names tracker"""
+    global top_names
+    if top_names is None:
+        top_names = TopNames(
+            persist_interval=float(os.getenv('SKETCH_PERSIST_INTERVAL_SECONDS', '30')),
+            capacity=int(os.getenv('TOP_NAMES_CAPACITY', '1000'))
+        )
+    return top_names
@@ -0,0 +1,208 @@
+"""
+Distinct submitter counts for Random Corp API
+HyperLogLog registers per UTC day and in total, merged across workers and replicas through app_statistics
+"""
+
+import os
+import math
+import zlib
+import base64
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Set
+from database import get_db_manager
+
+logger = logging.getLogger(__name__)
+
+STAT_PREFIX = "unique_submitters:"
+TOTAL = "total"
+
+_INVERSE_POWERS = [2.0 ** -rank for rank in range(66)]
+
+
+def submitter_key(first_name: str, last_name: str) -> bytes:
+    """A submitter is a (first, last) name pair, case- and whitespace-insensitive"""
+    return f"{' '.join(first_name.split()).casefold()}\0{' '.join(last_name.split()).casefold()}".encode()
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter (Flajolet et al.) with 2^precision one-byte registers.
+
+    The standard error is 1.04 / sqrt(2^precision): 1.6% at the default
+    precision 12, for 4 KiB of registers whatever the cardinality.
+    Merging takes the register-wise maximum, which is idempotent, so the
+    same registers can be merged into a shared copy any number of times.
+    """
+
+    def __init__(self, precision: int = 12, registers: Optional[bytearray] = None):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = registers if registers is not None else bytearray(self.size)
+        self._estimate: Optional[int] = None
+
+    def add(self, key: bytes) -> bool:
+        """Add an item; True when a register changed (the estimate moved)"""
+        hashed = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big")
+        index = hashed >> (64 - self.precision)
+        rest = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = 64 - self.precision - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            self._estimate = None
+            return True
+        return False
+
+    def merge(self, other: "HyperLogLog"):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLogs with different precision")
+        if other.registers != self.registers:
+            self.registers = bytearray(map(max, self.registers, other.registers))
+            self._estimate = None
+
+    def count(self) -> int:
+        if self._estimate is None:
+            alpha = 0.7213 / (1 + 1.079 / self.size)
+            raw = alpha * self.size * self.size / sum(map(_INVERSE_POWERS.__getitem__, self.registers))
+            zeros = self.registers.count(0)
+            if raw <= 2.5 * self.size and zeros:
+                # Small-range correction: linear counting over the empty registers
+                raw = self.size * math.log(self.size / zeros)
+            self._estimate = int(round(raw))
+        return self._estimate
+
+    @property
+    def standard_error(self) -> float:
+        return 1.04 / self.size ** 0.5
+
+    def to_string(self) -> str:
+        """Compressed registers (sparse days compress to a few bytes)"""
+        return base64.b64encode(zlib.compress(bytes(self.registers), 9)).decode("ascii")
+
+    @classmethod
+    def from_string(cls, value: str) -> "HyperLogLog":
+        registers = bytearray(zlib.decompress(base64.b64decode(value)))
+        return cls(len(registers).bit_length() - 1, registers)
+
+
+class UniqueSubmitters:
+    """Distinct (first, last) name pairs per UTC day and in total.
+
+    The submit path updates this process's registers. sync(), a scheduled
+    job on every worker, max-merges the rows this process changed into
+    the shared `unique_submitters:<day>` / `unique_submitters:total` rows
+    under a row lock, and the result (which includes every other
+    replica's submissions) becomes this process's registers; other days
+    are read back unlocked. Merging is idempotent, so there are no
+    per-process rows to clean up; expire_stored(), a cluster-wide job,
+    deletes days older than retention_days.
+    """
+
+    def __init__(self, persist_interval: float = 30.0, precision: int = 12, retention_days: int = 90):
+        self.persist_interval = persist_interval
+        self.precision = precision
+        self.retention_days = retention_days
+        self.total = HyperLogLog(precision)
+        self.days: Dict[str, HyperLogLog] = {}
+        self._dirty: Set[str] = set()
+
+    def _registers(self, name: str) -> HyperLogLog:
+        if name == TOTAL:
+            return self.total
+        registers = self.days.get(name)
+        if registers is None:
+            registers = self.days[name] = HyperLogLog(self.precision)
+        return registers
+
+    def record(self, first_name: str, last_name: str):
+        key = submitter_key(first_name, last_name)
+        today = datetime.now(timezone.utc).date().isoformat()
+        if self._registers(today).add(key):
+            self._dirty.add(today)
+        if self.total.add(key):
+            self._dirty.add(TOTAL)
+
+    def unique_submitters(self) -> int:
+        return self.total.count()
+
+    def timeseries(self, days: int) -> Dict:
+        """Distinct submitters for each of the last `days` UTC days (oldest first) and across all of them"""
+        today = datetime.now(timezone.utc).date()
+        points = []
+        union = HyperLogLog(self.precision)
+        for offset in range(days - 1, -1, -1):
+            day = (today - timedelta(days=offset)).isoformat()
+            registers = self.days.get(day)
+            points.append({"date": day, "unique_submitters": registers.count() if registers else 0})
+            if registers:
+                union.merge(registers)
+        return {"days": points, "unique_submitters": union.count(),
+                "standard_error": round(union.standard_error, 4)}
+
+    def _expire(self):
+        cutoff = self._cutoff()
+        for day in [day for day in self.days if day < cutoff]:
+            del self.days[day]
+            self._dirty.discard(day)
+
+    def _database(self):
+        db_manager = get_db_manager()
+        return db_manager if os.getenv('DB_HOST') and db_manager.pool else None
+
+    def _merge_stored(self, stat_name: str, stored: Optional[str]) -> str:
+        registers = self._registers(stat_name[len(STAT_PREFIX):])
+        if stored:
+            registers.merge(HyperLogLog.from_string(stored))
+        return registers.to_string()
+
+    def _cutoff(self) -> str:
+        return (datetime.now(timezone.utc).date() - timedelta(days=self.retention_days)).isoformat()
+
+    async def sync(self) -> bool:
+        """Max-merge changed registers into the shared rows and pick up everyone else's"""
+        self._expire()
+        db_manager = self._database()
+        if db_manager is None:
+            return False
+        dirty, self._dirty = self._dirty, set()
+        try:
+            await db_manager.merge_statistics([STAT_PREFIX + name for name in sorted(dirty)], self._merge_stored)
+        except Exception:
+            # Registers only grow, so merging the same rows next time loses nothing
+            self._dirty |= dirty
+            raise
+
+        cutoff = self._cutoff()
+        for stat_name, value in (await db_manager.get_statistics_by_prefix(STAT_PREFIX)).items():
+            name = stat_name[len(STAT_PREFIX):]
+            if value and name not in dirty and (name == TOTAL or name >= cutoff):
+                self._registers(name).merge(HyperLogLog.from_string(value))
+        return True
+
+    async def expire_stored(self) -> int:
+        """Delete the rows of days older than retention_days"""
+        db_manager = self._database()
+        if db_manager is None:
+            return 0
+        cutoff = self._cutoff()
+        expired = [stat_name for stat_name in await db_manager.get_statistics_by_prefix(STAT_PREFIX)
+                   if stat_name[len(STAT_PREFIX):] != TOTAL and stat_name[len(STAT_PREFIX):] < cutoff]
+        if expired:
+            await db_manager.delete_statistics(expired)
+            logger.info(f"🔢 Deleted {len(expired)} expired daily unique submitter rows")
+        return len(expired)
+
+
+# Global unique submitters instance - initialized lazily
+unique_submitters = None
+
+def get_unique_submitters() -> UniqueSubmitters:
+    """Get or create the unique submitter counters"""
+    global unique_submitters
+    if unique_submitters is None:
+        unique_submitters = UniqueSubmitters(
+            persist_interval=float(os.getenv('SKETCH_PERSIST_INTERVAL_SECONDS', '30')),
+            precision=int(os.getenv('HLL_PRECISION', '12')),
+            retention_days=int(os.getenv('HLL_RETENTION_DAYS', '90'))
+        )
+    return unique_submitters
@@ -0,0 +1,141 @@
+"""
+Idempotency support for Random Corp API
+Replays the original response for retried requests carrying an Idempotency-Key
+"""
+
+import os
+import time
+import asyncio
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 100
+
+
+class IdempotencyKeyConflict(Exception):
+    """Raised when an idempotency key is reused with a different request body"""
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "future", "expires_at")
+
+    def __init__(self, fingerprint: str, future: asyncio.Future, expires_at: float):
+        self.fingerprint = fingerprint
+        self.future = future
+        self.expires_at = expires_at
+
+
+class IdempotencyCache:
+    """Bounded, TTL-based cache of responses keyed by idempotency key.
+
+    The first request for a key runs the producer; concurrent duplicates await
+    the same future (one of them runs the producer instead if the first request
+    is cancelled), and later replays inside the TTL window get the stored
+    response without re-running enrichment or scheduling another DB write.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600.0, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def fingerprint(payload: Any) -> str:
+        """Stable hash of a request body used to detect key reuse"""
+        encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def _purge(self, now: float) -> None:
+        """Drop expired entries and evict the oldest ones over capacity.
+
+        Entries share one TTL, so insertion order is also expiry order.
+        Evicting an in-flight entry only affects later duplicates; requests
+        already waiting hold a reference to its future.
+        """
+        while self._entries:
+            entry = next(iter(self._entries.values()))
+            if entry.expires_at > now and len(self._entries) < self.max_entries:
+                break
+            self._entries.popitem(last=False)
+
+    async def run(self, key: str, fingerprint: str,
+                  producer: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Return (response, replayed) for the given key, running producer at most once"""
+        while True:
+            now = time.monotonic()
+            self._purge(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                break
+            if entry.fingerprint != fingerprint:
+                raise IdempotencyKeyConflict(f"Idempotency key {key!r} was used with a different request body")
+            try:
+                # Shield so a cancelled duplicate doesn't cancel the original request
+                result = await asyncio.shield(entry.future)
+            except asyncio.CancelledError:
+                # Only the original request was cancelled (client gone, shutdown): run it here instead
+                if not entry.future.cancelled():
+                    raise
+                continue
+            self.hits += 1
+            return result, True
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        entry = _Entry(fingerprint, future, now + self.ttl_seconds)
+        self._entries[key] = entry
+
+        try:
+            result = await producer()
+        except asyncio.CancelledError:
+            self._forget(key, entry)
+            future.cancel()
+            raise
+        except BaseException as e:
+            # Failed requests are not cached; waiters see the same error and may retry
+            self._forget(key, entry)
+            future.set_exception(e)
+            # Mark the exception retrieved when nobody is waiting on it
+            future.exception()
+            raise
+
+        future.set_result(result)
+        return result, False
+
+    def _forget(self, key: str, entry: _Entry) -> None:
+        """Drop entry unless it was already evicted and the key reused"""
+        if self._entries.get(key) is entry:
+            del self._entries[key]
+
+# Global idempotency cache instance - initialized lazily
+idempotency_cache = None
+
+def get_idempotency_cache() -> IdempotencyCache:
+    """Get or create the idempotency cache instance"""
+    global idempotency_cache
+    if idempotency_cache is None:
+        idempotency_cache = IdempotencyCache(
+            ttl_seconds=float(os.getenv('IDEMPOTENCY_TTL_SECONDS', '3600')),
+            max_entries=int(os.getenv('IDEMPOTENCY_MAX_ENTRIES', '10000'))
+        )
+        logger.info(f"🔑 Idempotency cache enabled (ttl={idempotency_cache.ttl_seconds}s, "
+                    f"max_entries={idempotency_cache.max_entries})")
+    return idempotency_cache
+
+
+def scoped_key(scope: str, key: Optional[str]) -> Optional[str]:
+    """Namespace a client key by endpoint so keys can't collide across routes"""
+    if not key:
+        return None
+    return f"{scope}:{key}"
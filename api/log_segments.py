@@ -0,0 +1,327 @@
+"""
+Segmented submission log format for Random Corp API
+Length-prefixed JSON records in compressed blocks with a sparse timestamp index
+
+Segment file (<prefix>-<started>-<seq>.seg) is a sequence of blocks:
+    block header  <4sBIIIdd  magic, codec, raw_len, comp_len, count, min_ts, max_ts
+    payload       compressed records, each  <dI  timestamp, json_len  + JSON bytes
+Index sidecar (<segment>.idx) holds one  <QddI  entry per block:
+    offset, min_ts, max_ts, count
+"""
+
+import os
+import sys
+import json
+import gzip
+import mmap
+import time
+import struct
+import logging
+from datetime import datetime
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; gzip is always available
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+BLOCK_MAGIC = b"RCBK"
+BLOCK_HEADER = struct.Struct("<4sBIIIdd")
+RECORD_HEADER = struct.Struct("<dI")
+INDEX_ENTRY = struct.Struct("<QddI")
+
+CODEC_NONE = 0
+CODEC_GZIP = 1
+CODEC_ZSTD = 2
+CODECS = {"none": CODEC_NONE, "gzip": CODEC_GZIP, "zstd": CODEC_ZSTD}
+
+
+def default_codec() -> str:
+    """zstd when the zstandard package is installed, otherwise gzip"""
+    return "zstd" if zstandard is not None else "gzip"
+
+
+def _compress(codec: int, data: bytes) -> bytes:
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    if codec == CODEC_GZIP:
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    return data
+
+
+def _decompress(codec: int, data: bytes, raw_len: int) -> bytes:
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Segment uses zstd but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(data, max_output_size=raw_len)
+    if codec == CODEC_GZIP:
+        return gzip.decompress(data)
+    return data
+
+
+class BlockIndexEntry(NamedTuple):
+    offset: int
+    min_ts: float
+    max_ts: float
+    count: int
+
+
+class SegmentWriter:
+    """Appends records to compressed blocks, rolling to a new segment by size or age.
+
+    Like the text log's backups, at most backup_count closed segments are
+    kept next to the open one; older ones (and their indexes) are deleted
+    when the writer rolls over.
+    """
+
+    def __init__(self, directory: str, prefix: str = "submissions", codec: Optional[str] = None,
+                 block_bytes: int = 256 * 1024, segment_max_bytes: int = 64 * 1024 * 1024,
+                 segment_max_age: float = 24 * 3600, backup_count: int = 5):
+        codec = codec or default_codec()
+        if codec not in CODECS:
+            raise ValueError(f"Unknown segment codec: {codec}")
+        if codec == "zstd" and zstandard is None:
+            logger.warning("⚠️ zstandard not installed, falling back to gzip for submission log segments")
+            codec = "gzip"
+
+        self.directory = directory
+        self.prefix = prefix
+        self.codec = CODECS[codec]
+        self.block_bytes = block_bytes
+        self.segment_max_bytes = segment_max_bytes
+        self.segment_max_age = segment_max_age
+        self.backup_count = backup_count
+
+        self._buffer = bytearray()
+        self._count = 0
+        self._min_ts = 0.0
+        self._max_ts = 0.0
+        self._segment = None
+        self._index = None
+        self._segment_opened_at = 0.0
+        self._sequence = 0
+
+        self.blocks_written = 0
+        self.bytes_raw = 0
+        self.bytes_compressed = 0
+        self.segments_deleted = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def pending_bytes(self) -> int:
+        return len(self._buffer)
+
+    @property
+    def segment_path(self) -> Optional[str]:
+        return self._segment.name if self._segment else None
+
+    def append(self, timestamp: float, record: Dict):
+        """Buffer one record; call flush_block() to compress and write the buffer"""
+        payload = json.dumps(record, separators=(",", ":")).encode("utf-8")
+        self._buffer += RECORD_HEADER.pack(timestamp, len(payload))
+        self._buffer += payload
+        if self._count == 0:
+            self._min_ts = self._max_ts = timestamp
+        else:
+            self._min_ts = min(self._min_ts, timestamp)
+            self._max_ts = max(self._max_ts, timestamp)
+        self._count += 1
+
+    def flush_block(self):
+        """Compress buffered records into one block and append it with its index entry"""
+        if not self._count:
+            return
+        raw = bytes(self._buffer)
+        count, min_ts, max_ts = self._count, self._min_ts, self._max_ts
+        self._buffer = bytearray()
+        self._count = 0
+
+        if self._segment is None or self._should_roll():
+            self._roll()
+
+        compressed = _compress(self.codec, raw)
+        offset = self._segment.tell()
+        self._segment.write(BLOCK_HEADER.pack(BLOCK_MAGIC, self.codec, len(raw), len(compressed),
+                                              count, min_ts, max_ts))
+        self._segment.write(compressed)
+        self._segment.flush()
+        # Index entries are written after their block so a reader never sees a dangling entry
+        self._index.write(INDEX_ENTRY.pack(offset, min_ts, max_ts, count))
+        self._index.flush()
+
+        self.blocks_written += 1
+        self.bytes_raw += len(raw)
+        self.bytes_compressed += len(compressed)
+
+    def fsync(self):
+        if self._segment is not None:
+            os.fsync(self._segment.fileno())
+            os.fsync(self._index.fileno())
+
+    def close(self):
+        self.flush_block()
+        if self._segment is not None:
+            self.fsync()
+            self._segment.close()
+            self._index.close()
+            self._segment = self._index = None
+
+    def _should_roll(self) -> bool:
+        if self.segment_max_bytes and self._segment.tell() >= self.segment_max_bytes:
+            return True
+        return bool(self.segment_max_age) and time.monotonic() - self._segment_opened_at >= self.segment_max_age
+
+    def _roll(self):
+        if self._segment is not None:
+            self.fsync()
+            self._segment.close()
+            self._index.close()
+        started = datetime.now().strftime("%Y%m%dT%H%M%S")
+        self._sequence += 1
+        path = os.path.join(self.directory, f"{self.prefix}-{started}-{os.getpid()}-{self._sequence:04d}.seg")
+        self._segment = open(path, "ab")
+        self._index = open(path + ".idx", "ab")
+        self._segment_opened_at = time.monotonic()
+        logger.info(f"🔄 Opened submission log segment: {path}")
+        self._prune(path)
+
+    def _prune(self, current: str):
+        """Delete the oldest closed segments beyond backup_count (including earlier runs')"""
+        closed = [path for path in list_segments(self.directory, self.prefix) if path != current]
+        for path in closed[:max(0, len(closed) - self.backup_count)]:
+            for name in (path, path + ".idx"):
+                try:
+                    os.remove(name)
+                except FileNotFoundError:
+                    pass
+            self.segments_deleted += 1
+            logger.info(f"🗑️ Deleted old submission log segment: {path}")
+
+
+class SegmentReader:
+    """Memory-mapped reader that seeks blocks by time range and yields records lazily"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self.index = self._load_index()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    @property
+    def min_ts(self) -> Optional[float]:
+        return min((entry.min_ts for entry in self.index), default=None)
+
+    @property
+    def max_ts(self) -> Optional[float]:
+        return max((entry.max_ts for entry in self.index), default=None)
+
+    def _load_index(self) -> List[BlockIndexEntry]:
+        """Read the sidecar index, then scan any blocks written after its last entry"""
+        entries: List[BlockIndexEntry] = []
+        index_path = self.path + ".idx"
+        if os.path.exists(index_path):
+            with open(index_path, "rb") as f:
+                data = f.read()
+            usable = len(data) - len(data) % INDEX_ENTRY.size
+            entries = [BlockIndexEntry(*values) for values in INDEX_ENTRY.iter_unpack(data[:usable])]
+
+        if self._mmap is None:
+            return []
+
+        offset = 0
+        if entries:
+            last = entries[-1]
+            header = self._read_header(last.offset)
+            if header is None:
+                # Index points past the data; fall back to a full scan
+                entries, offset = [], 0
+            else:
+                offset = last.offset + BLOCK_HEADER.size + header[3]
+
+        while True:
+            header = self._read_header(offset)
+            if header is None:
+                break
+            _, _, _, comp_len, count, min_ts, max_ts = header
+            entries.append(BlockIndexEntry(offset, min_ts, max_ts, count))
+            offset += BLOCK_HEADER.size + comp_len
+        return entries
+
+    def _read_header(self, offset: int) -> Optional[Tuple]:
+        if offset + BLOCK_HEADER.size > len(self._mmap):
+            return None
+        header = BLOCK_HEADER.unpack_from(self._mmap, offset)
+        if header[0] != BLOCK_MAGIC or offset + BLOCK_HEADER.size + header[3] > len(self._mmap):
+            # Bad magic or a block truncated by a crash mid-write
+            return None
+        return header
+
+    def iter_records(self, start: Optional[float] = None,
+                     end: Optional[float] = None) -> Iterator[Tuple[float, Dict]]:
+        """Yield (timestamp, record) for records with start <= timestamp < end"""
+        for entry in self.index:
+            if start is not None and entry.max_ts < start:
+                continue
+            if end is not None and entry.min_ts >= end:
+                continue
+            _, codec, raw_len, comp_len, _, _, _ = BLOCK_HEADER.unpack_from(self._mmap, entry.offset)
+            body_start = entry.offset + BLOCK_HEADER.size
+            raw = _decompress(codec, self._mmap[body_start:body_start + comp_len], raw_len)
+
+            position = 0
+            while position < len(raw):
+                timestamp, length = RECORD_HEADER.unpack_from(raw, position)
+                position += RECORD_HEADER.size
+                if (start is None or timestamp >= start) and (end is None or timestamp < end):
+                    yield timestamp, json.loads(raw[position:position + length])
+                position += length
+
+
+def list_segments(directory: str, prefix: str = "submissions") -> List[str]:
+    """Segment paths in write order"""
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(name for name in os.listdir(directory)
+                   if name.startswith(prefix + "-") and name.endswith(".seg"))
+    return [os.path.join(directory, name) for name in names]
+
+
+def read_log(directory: str, start: Optional[float] = None, end: Optional[float] = None,
+             prefix: str = "submissions") -> Iterator[Tuple[float, Dict]]:
+    """Yield records in [start, end) across all segments, skipping segments outside the range"""
+    for path in list_segments(directory, prefix):
+        with SegmentReader(path) as reader:
+            if not reader.index:
+                continue
+            if start is not None and reader.max_ts < start:
+                continue
+            if end is not None and reader.min_ts >= end:
+                continue
+            yield from reader.iter_records(start, end)
+
+
+if __name__ == "__main__":
+    # Dump records as JSON lines: python log_segments.py <dir> [from_iso] [to_iso]
+    if len(sys.argv) < 2:
+        print("usage: python log_segments.py <directory> [from_iso] [to_iso]", file=sys.stderr)
+        sys.exit(1)
+    range_start = datetime.fromisoformat(sys.argv[2]).timestamp() if len(sys.argv) > 2 else None
+    range_end = datetime.fromisoformat(sys.argv[3]).timestamp() if len(sys.argv) > 3 else None
+    for ts, rec in read_log(sys.argv[1], range_start, range_end):
+        print(json.dumps({"ts": datetime.fromtimestamp(ts).isoformat(), "record": rec}))
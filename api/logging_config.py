@@ -0,0 +1,163 @@
+"""
+Logging pipeline for Random Corp API
+Records are sampled and enqueued on the calling thread; a listener thread formats and writes them
+"""
+
+import os
+import sys
+import time
+import queue
+import random
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+from pythonjsonlogger import jsonlogger
+
+# Hot-path message classes: event -> (sample_rate, max_per_second)
+DEFAULT_SAMPLING = {
+    "submission.received": (1.0, 20),
+    "submission.processed": (1.0, 20),
+    "batch.received": (1.0, 20),
+    "batch.processed": (1.0, 20),
+    "batch.saved": (1.0, 20),
+}
+
+
+def parse_sampling_rules(spec: str) -> Dict[str, Tuple[float, Optional[int]]]:
+    """Parse LOG_SAMPLING, e.g. "submission.processed=0.1:50,batch.saved=1" """
+    rules = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        event, _, setting = item.partition("=")
+        rate, _, per_second = setting.partition(":")
+        rules[event.strip()] = (float(rate or 1.0), int(per_second) if per_second else None)
+    return rules
+
+
+class SamplingFilter(logging.Filter):
+    """Per-message-class sampling and rate limiting.
+
+    Records opt in by passing extra={"event": "<message class>"}; records
+    without an event, and anything at WARNING or above, always pass. Each
+    rule keeps a fixed one-second window counter, so the check is a dict
+    lookup and two comparisons on the hot path.
+    """
+
+    def __init__(self, rules: Dict[str, Tuple[float, Optional[int]]]):
+        super().__init__()
+        self.rules = rules
+        self._windows: Dict[str, list] = {}
+        self.suppressed: Dict[str, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        event = getattr(record, "event", None)
+        if event is None or record.levelno >= logging.WARNING:
+            return True
+        rule = self.rules.get(event)
+        if rule is None:
+            return True
+
+        sample_rate, per_second = rule
+        if sample_rate < 1.0 and random.random() >= sample_rate:
+            self.suppressed[event] = self.suppressed.get(event, 0) + 1
+            return False
+
+        if per_second is not None:
+            now = int(time.monotonic())
+            window = self._windows.get(event)
+            if window is None or window[0] != now:
+                window = self._windows[event] = [now, 0]
+            if window[1] >= per_second:
+                self.suppressed[event] = self.suppressed.get(event, 0) + 1
+                return False
+            window[1] += 1
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops and counts records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+# Logging pipeline state - set by configure_logging()
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+_sampling_filter: Optional[SamplingFilter] = None
+
+
+def configure_logging(level: str = "INFO", log_format: str = "json",
+                      queue_size: int = 10000, sampling: Optional[str] = None):
+    """Route all logging through a bounded queue to a background listener thread"""
+    global _listener, _queue_handler, _sampling_filter
+    if _listener is not None:
+        return
+
+    if log_format == "json":
+        formatter = jsonlogger.JsonFormatter(
+            "%(asctime)s %(name)s %(levelname)s %(message)s",
+            rename_fields={"asctime": "timestamp", "levelname": "level", "name": "logger"},
+            json_ensure_ascii=False
+        )
+    else:
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(formatter)
+
+    rules = dict(DEFAULT_SAMPLING)
+    if sampling:
+        rules.update(parse_sampling_rules(sampling))
+    _sampling_filter = SamplingFilter(rules)
+
+    _queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+    _queue_handler.addFilter(_sampling_filter)
+
+    root = logging.getLogger()
+    root.handlers = [_queue_handler]
+    root.setLevel(getattr(logging, level))
+
+    # Route uvicorn's own loggers through the same queue instead of its stderr handlers
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+
+    _listener = QueueListener(_queue_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logging_stats() -> Dict:
+    """Dropped and sampled-out record counts"""
+    return {
+        "queue_depth": _queue_handler.queue.qsize() if _queue_handler else 0,
+        "dropped": _queue_handler.dropped if _queue_handler else 0,
+        "suppressed": dict(_sampling_filter.suppressed) if _sampling_filter else {}
+    }
+
+
+def configure_logging_from_env():
+    """Configure logging from LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_SIZE and LOG_SAMPLING"""
+    configure_logging(
+        level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+        log_format=os.getenv('LOG_FORMAT', 'json').lower(),
+        queue_size=int(os.getenv('LOG_QUEUE_SIZE', '10000')),
+        sampling=os.getenv('LOG_SAMPLING')
+    )
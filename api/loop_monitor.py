@@ -0,0 +1,170 @@
+"""
+Event loop monitor for Random Corp API
+Measures loop scheduling lag and captures the stack of whatever is blocking the loop
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import deque
+from typing import Dict, List, Optional
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG = registry.histogram(
+    "randomcorp_event_loop_lag_seconds",
+    "Delay between when a loop monitor tick was scheduled and when it ran",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+LOOP_BLOCKED = registry.counter(
+    "randomcorp_event_loop_blocked_total",
+    "Times the event loop was blocked longer than the slow-callback threshold"
+)
+
+
+class LoopMonitor:
+    """Continuous loop-lag measurement plus a watchdog for blocking callbacks.
+
+    A monitor task sleeps for interval and records how late it wakes up;
+    that lag is what every other coroutine on the loop also experienced.
+    Each tick also refreshes a heartbeat. A watchdog thread checks the
+    heartbeat and, when the loop has been stuck for longer than threshold,
+    captures the event-loop thread's stack and current task while the
+    offender is still running. Offender logs are rate limited.
+    """
+
+    def __init__(self, interval: float = 0.05, threshold: float = 0.1,
+                 window: int = 1200, log_interval: float = 10.0, max_offenders: int = 50):
+        self.interval = interval
+        self.threshold = threshold
+        self.log_interval = log_interval
+        self._lags: deque = deque(maxlen=window)
+        self.offenders: deque = deque(maxlen=max_offenders)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._heartbeat = time.monotonic()
+        self._captured: Optional[Dict] = None
+        self._last_log = 0.0
+        self._suppressed_logs = 0
+
+    def percentile(self, fraction: float) -> float:
+        """Lag percentile over the recent window, in seconds"""
+        if not self._lags:
+            return 0.0
+        ordered = sorted(self._lags)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def max_lag(self) -> float:
+        return max(self._lags, default=0.0)
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._run(), name="loop-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(f"⏱️ Event loop monitor started (interval {self.interval * 1000:.0f}ms, "
+                    f"threshold {self.threshold * 1000:.0f}ms)")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stopping.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            scheduled = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - scheduled - self.interval)
+            self._heartbeat = now
+            self._lags.append(lag)
+            LOOP_LAG.observe(lag)
+            if lag >= self.threshold:
+                self._record_block(lag)
+
+    def _watch(self):
+        """Watchdog thread: grab the loop thread's stack while it is blocked"""
+        poll = max(self.threshold / 4, 0.005)
+        while not self._stopping.wait(poll):
+            stalled = time.monotonic() - self._heartbeat - self.interval
+            if stalled < self.threshold or self._captured is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            task = asyncio.tasks._current_tasks.get(self._loop)
+            self._captured = {
+                "task": task.get_name() if task is not None else None,
+                "stack": "".join(traceback.format_stack(frame)),
+            }
+
+    def _record_block(self, lag: float):
+        """Called on the loop thread once the blocking callback has returned"""
+        LOOP_BLOCKED.inc()
+        captured, self._captured = self._captured, None
+        offender = {
+            "blocked_ms": round(lag * 1000, 1),
+            "at": time.time(),
+            "task": captured["task"] if captured else None,
+            "stack": captured["stack"] if captured else None
+        }
+        self.offenders.append(offender)
+
+        now = time.monotonic()
+        if now - self._last_log < self.log_interval:
+            self._suppressed_logs += 1
+            return
+        suppressed, self._suppressed_logs = self._suppressed_logs, 0
+        self._last_log = now
+        logger.warning(
+            "🐢 Event loop blocked for %.1fms (task: %s, %d similar events suppressed)\n%s",
+            offender["blocked_ms"], offender["task"], suppressed,
+            offender["stack"] or "stack not captured (block shorter than watchdog poll)",
+            extra={"event": "loop.blocked", "blocked_ms": offender["blocked_ms"]}
+        )
+
+    def recent_offenders(self) -> List[Dict]:
+        return list(self.offenders)
+
+
+# Global loop monitor instance - initialized lazily
+loop_monitor = None
+
+def get_loop_monitor() -> LoopMonitor:
+    """Get or create the loop monitor instance"""
+    global loop_monitor
+    if loop_monitor is None:
+        loop_monitor = LoopMonitor(
+            interval=int(os.getenv('LOOP_MONITOR_INTERVAL_MS', '50')) / 1000,
+            threshold=int(os.getenv('LOOP_BLOCK_THRESHOLD_MS', '100')) / 1000,
+            log_interval=float(os.getenv('LOOP_BLOCK_LOG_INTERVAL_SECONDS', '10'))
+        )
+    return loop_monitor
+
+
+registry.gauge("randomcorp_event_loop_lag_p50_seconds", "Median loop lag over the recent window",
+               callback=lambda: get_loop_monitor().percentile(0.5), multiprocess_mode="max")
+registry.gauge("randomcorp_event_loop_lag_p99_seconds", "99th percentile loop lag over the recent window",
+               callback=lambda: get_loop_monitor().percentile(0.99), multiprocess_mode="max")
+registry.gauge("randomcorp_event_loop_lag_max_seconds", "Maximum loop lag over the recent window",
+               callback=lambda: get_loop_monitor().max_lag(), multiprocess_mode="max")
@@ -1,28 +1,51 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, Response, Header, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, validator
 import logging
 import random
 import asyncio
-import aiofiles
 import os
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 from datetime import datetime, timezone
 import json
 import time
+import hmac
+import threading
 from database import get_db_manager
-
-# Global in-memory storage for demo mode when database is not available
-in_memory_submissions = []
+from logging_config import configure_logging_from_env, get_logging_stats
+from fast_json import FAST_JSON_ENABLED, FastJSONResponse, build, render
+import metrics
+from metrics import (
+    registry, HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT, FALLBACK_TO_MEMORY,
+    DB_RECONNECT_ATTEMPTS, BACKGROUND_TASKS_PENDING, get_worker_metrics, tracked_background
+)
+from submission_log import get_submission_log
+from loop_monitor import get_loop_monitor
+from profiler import ProfilerBusy, MAX_DURATION, profile, to_collapsed
+from tracing import start_trace, finish_trace, span, traced, mark_since_start, get_trace_sink
+from stats_updater import get_stats_updater
+from shared_state import get_worker_state
+from fallback_store import batch_summary, filter_page, get_fallback_store, record_to_submission, to_record
+from broadcast import get_broadcast_hub
+from conditional import cache_headers, current_etag, etag_matches, mark_data_changed, not_modified
+from submission_rows import SubmissionFilters, as_utc, page_json, search_json
+from name_index import get_name_index
+from sketches import get_processing_time_sketches
+from heavy_hitters import get_top_names
+from hyperloglog import get_unique_submitters
+from scheduler import CLUSTER, HOST, get_scheduler
+from read_cache import get_read_cache
+from idempotency import (
+    IDEMPOTENCY_HEADER, MAX_KEY_LENGTH, IdempotencyKeyConflict,
+    get_idempotency_cache, scoped_key
+)
 
 # Configure logging based on environment
 log_level = os.getenv('LOG_LEVEL', 'INFO').upper()
 debug_mode = os.getenv('DEBUG', 'false').lower() == 'true'
 
-logging.basicConfig(
-    level=getattr(logging, log_level),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+configure_logging_from_env()
 logger = logging.getLogger(__name__)
 
 if debug_mode:
@@ -32,18 +55,57 @@ if debug_mode:
 app = FastAPI(
     title="Random Corp API",
     description="Asynchronous API with SQL Server backend for processing name submissions",
-    version="2.1.0"
+    version="2.1.0",
+    default_response_class=FastJSONResponse if FAST_JSON_ENABLED else JSONResponse
 )
 
-# Track application start time for uptime calculation
-app_start_time = datetime.now(timezone.utc)
+# Track application start time for uptime calculation (shared by all workers of a server)
+app_start_time = get_worker_state().start_time
+
+# Identity of the event-loop thread, recorded at startup for the profiler
+event_loop_thread_id = None
+
+# Gauges read from component state at scrape time
+registry.gauge("randomcorp_uptime_seconds", "Seconds since the API process started",
+               callback=lambda: (datetime.now(timezone.utc) - app_start_time).total_seconds(),
+               multiprocess_mode="max")
+registry.gauge("randomcorp_db_pool_size", "Open connections in the database pool",
+               callback=lambda: get_db_manager().pool.size if get_db_manager().pool else 0)
+registry.gauge("randomcorp_in_memory_submissions", "Submissions held in memory (demo/fallback mode)",
+               callback=lambda: len(get_fallback_store()), multiprocess_mode="max")
+registry.gauge("randomcorp_submission_log_queue_depth", "Entries waiting for the submission log writer",
+               callback=lambda: get_submission_log().stats()["queue_depth"])
+registry.gauge("randomcorp_submission_log_dropped_lines", "Submission log lines dropped because the queue was full",
+               callback=lambda: get_submission_log().lines_dropped)
+registry.gauge("randomcorp_stats_pending_submissions", "Submissions not yet flushed to app_statistics",
+               callback=lambda: get_stats_updater().pending)
+registry.gauge("randomcorp_idempotency_cache_entries", "Entries in the idempotency response cache",
+               callback=lambda: len(get_idempotency_cache()))
+registry.gauge("randomcorp_stream_subscribers", "Open /api/stream/submissions connections",
+               callback=lambda: len(get_broadcast_hub()))
+registry.gauge("randomcorp_stream_events_published", "Events published to stream subscribers",
+               callback=lambda: get_broadcast_hub().events_published)
+registry.gauge("randomcorp_stream_evictions", "Stream subscribers evicted for falling behind",
+               callback=lambda: get_broadcast_hub().evictions)
+registry.gauge("randomcorp_scheduler_cluster_leader", "1 if a worker of this server is the elected leader for cluster-wide jobs",
+               callback=lambda: int(get_scheduler().election.leader))
+registry.gauge("randomcorp_read_cache_l1_entries", "Responses held in the workers' read caches",
+               callback=lambda: len(get_read_cache()))
+registry.gauge("randomcorp_log_records_dropped", "Log records dropped because the logging queue was full",
+               callback=lambda: get_logging_stats()["dropped"])
 
 # Startup and shutdown events
 @app.on_event("startup")
 async def startup_event():
     """Initialize database connection on startup"""
-    global background_tasks_started
+    global event_loop_thread_id
     logger.info("🚀 Starting Random Corp API...")
+    event_loop_thread_id = threading.get_ident()
+    await get_submission_log().start()
+    await get_stats_updater().start()
+    await get_trace_sink().start()
+    await get_loop_monitor().start()
+    get_broadcast_hub().set_stats_provider(stream_stats)
     try:
         # Check if SQL Server environment variables are set
         db_host = os.getenv('DB_HOST')
@@ -56,25 +118,19 @@ async def startup_event():
         else:
             logger.info("🔄 Running in demo mode without database")
             # Initialize in-memory storage for demo
-            in_memory_submissions.clear()
+            get_fallback_store()
         
-        # Start background health check task
-        if not background_tasks_started:
-            asyncio.create_task(periodic_database_health_check())
-            background_tasks_started = True
-            logger.info("🔄 Started periodic database health check")
+        # Start scheduled background jobs (database health check, sketch persistence, maintenance)
+        await start_scheduled_jobs()
         
         logger.info("✅ API startup completed successfully")
     except Exception as e:
         logger.error(f"⚠️ Database initialization failed, running in demo mode: {str(e)}")
         # Initialize in-memory storage as fallback
-        in_memory_submissions.clear()
+        get_fallback_store()
         
-        # Still start the health check task to try reconnecting later
-        if not background_tasks_started:
-            asyncio.create_task(periodic_database_health_check())
-            background_tasks_started = True
-            logger.info("🔄 Started periodic database health check for reconnection attempts")
+        # Still start the scheduled jobs so the health check can reconnect later
+        await start_scheduled_jobs()
         
         logger.info("✅ API started in demo mode")
 
@@ -82,8 +138,30 @@ async def startup_event():
 async def shutdown_event():
     """Close database connections on shutdown"""
     logger.info("🛑 Shutting down Random Corp API...")
-    db_manager = get_db_manager()
-    await db_manager.close()
+    # The server drains in-flight requests (and their background tasks) before this runs
+    pending = BACKGROUND_TASKS_PENDING.value()
+    if pending:
+        logger.warning(f"⚠️ Shutting down with {pending:.0f} background tasks unfinished")
+    # Each step runs even if an earlier one failed, so one error cannot leave later resources open
+    steps = [
+        ("broadcast hub", lambda: get_broadcast_hub().close()),
+        ("loop monitor", lambda: get_loop_monitor().stop()),
+        ("stats updater", lambda: get_stats_updater().stop()),
+        ("scheduler", lambda: get_scheduler().stop()),
+        ("read cache", lambda: get_read_cache().close()),
+        ("database", lambda: get_db_manager().close()),
+        ("submission log", lambda: get_submission_log().stop()),
+        ("trace sink", lambda: get_trace_sink().stop()),
+        ("fallback store", lambda: get_fallback_store().close()),
+        ("worker state", lambda: get_worker_state().close()),
+    ]
+    for name, step in steps:
+        try:
+            result = step()
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            logger.error(f"❌ Shutdown step failed ({name}): {str(e)}")
     logger.info("✅ API shutdown completed")
 
 # Add CORS middleware
@@ -98,16 +176,30 @@ app.add_middleware(
 # Add timing middleware for request performance monitoring
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
-    """Async middleware to add request timing and logging"""
-    start_time = time.time()
+    """Async middleware to add request timing, latency metrics and logging"""
+    start_time = time.perf_counter()
     
     if debug_mode:
         logger.debug(f"🔍 Starting request: {request.method} {request.url.path}")
     
-    response = await call_next(request)
-    process_time = time.time() - start_time
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+    trace, trace_token = start_trace(f"{request.method} {request.url.path}")
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        HTTP_REQUESTS_IN_FLIGHT.dec()
+        process_time = time.perf_counter() - start_time
+        # Label by route template, not raw path, to keep series cardinality bounded
+        route = request.scope.get("route")
+        route_path = route.path if route is not None else "unmatched"
+        HTTP_REQUEST_DURATION.observe(process_time, (request.method, route_path, str(status_code)))
+        trace.name = f"{request.method} {route_path}"
+        server_timing = finish_trace(trace, trace_token)
     
     response.headers["X-Process-Time"] = str(process_time)
+    response.headers["Server-Timing"] = server_timing
     
     if debug_mode:
         logger.debug(f"⏱️ Request completed in {process_time:.3f}s: {request.method} {request.url.path}")
@@ -141,11 +233,25 @@ class LatestSubmission(BaseModel):
     name: str
     timestamp: str
 
+class PercentileSummary(BaseModel):
+    count: int
+    p50: Optional[float]
+    p90: Optional[float]
+    p99: Optional[float]
+    p999: Optional[float]
+
+class ProcessingTimePercentiles(BaseModel):
+    all_time: PercentileSummary
+    last_5m: PercentileSummary
+    last_1h: PercentileSummary
+
 class StatsResponse(BaseModel):
     total_messages: int
     total_submissions: int
     recent_submissions: int
     avg_processing_time: float
+    processing_time_percentiles: Optional[ProcessingTimePercentiles] = None
+    unique_submitters: Optional[int] = None
     latest_submission: Optional[LatestSubmission]
     api_version: str
     status: str
@@ -164,6 +270,37 @@ class BatchSubmissionRequest(BaseModel):
             raise ValueError('Batch must contain at least 1 submission')
         return v
 
+class BatchSummaryResponse(BaseModel):
+    batch_id: str
+    submissions: int
+    with_message: int
+    first_submission_at: Optional[str]
+    last_submission_at: Optional[str]
+    avg_processing_time: float
+    total_processing_time: float
+
+class TopName(BaseModel):
+    name: str
+    count: int
+    min_count: int
+    guaranteed: bool
+
+class TopNamesResponse(BaseModel):
+    names: List[TopName]
+    total_submissions: int
+    capacity: int
+    max_untracked_count: int
+    error_bound: float
+
+class TimeseriesPoint(BaseModel):
+    date: str
+    unique_submitters: int
+
+class TimeseriesResponse(BaseModel):
+    days: List[TimeseriesPoint]
+    unique_submitters: int
+    standard_error: float
+
 class BatchSubmissionResponse(BaseModel):
     total_processed: int
     processing_time: float
@@ -220,33 +357,16 @@ async def simulate_external_api_call(name: str) -> Dict:
     
     return result
 
-async def log_submission_async(submission_data: Dict) -> None:
-    """Async background task to log submission to file"""
-    try:
-        log_file = "submissions.log"
-        log_entry = f"{datetime.now().isoformat()} - {json.dumps(submission_data)}\n"
-        
-        # Use aiofiles for async file operations
-        async with aiofiles.open(log_file, "a") as f:
-            await f.write(log_entry)
-            
-        if debug_mode:
-            logger.debug(f"📝 Async log entry written to {log_file}")
-            
-    except Exception as e:
-        logger.error(f"❌ Failed to write async log: {str(e)}")
+def log_submission(submission_data: Dict) -> None:
+    """Queue a submission for the background log writer (never blocks the request)"""
+    if not get_submission_log().write(submission_data) and debug_mode:
+        logger.debug("📝 Submission log queue full, entry dropped")
 
-async def update_stats_async() -> None:
-    """Update application statistics in SQL Server database"""
-    try:
-        db_manager = get_db_manager()
-        await db_manager.update_statistics({})
-        
-        if debug_mode:
-            stats = await db_manager.get_statistics()
-            logger.debug(f"📊 Stats updated in database: {stats['total_submissions']} total submissions")
-    except Exception as e:
-        logger.error(f"❌ Failed to update stats: {str(e)}")
+def submission_stored(submission_data: Dict) -> None:
+    """Move the ETag watermark and push the submission to stream subscribers (as a /api/submissions row)"""
+    mark_data_changed()
+    get_read_cache().mark_written()
+    get_broadcast_hub().publish("submission", record_to_submission(to_record(submission_data)).to_dict())
 
 async def save_complete_submission(submission_data: Dict) -> None:
     """Save complete submission data to database or in-memory storage"""
@@ -258,6 +378,7 @@ async def save_complete_submission(submission_data: Dict) -> None:
                 await db_manager.save_submission(submission_data)
                 if debug_mode:
                     logger.debug(f"💾 Complete submission saved to database: {submission_data['submission_id']}")
+                submission_stored(submission_data)
                 return
             except Exception as db_error:
                 logger.error(f"❌ Database save failed, attempting reconnection: {str(db_error)}")
@@ -266,18 +387,57 @@ async def save_complete_submission(submission_data: Dict) -> None:
                     await db_manager._ensure_connection_pool()
                     await db_manager.save_submission(submission_data)
                     logger.info(f"✅ Database reconnected and submission saved: {submission_data['submission_id']}")
+                    submission_stored(submission_data)
                     return
                 except Exception as retry_error:
                     logger.error(f"❌ Database reconnection failed: {str(retry_error)}")
         
         # Save to in-memory storage for demo mode or when database is unavailable
-        in_memory_submissions.append(submission_data)
+        get_fallback_store().append(submission_data)
+        FALLBACK_TO_MEMORY.inc()
+        submission_stored(submission_data)
         if debug_mode:
             logger.debug(f"💾 Complete submission saved to memory (database unavailable): {submission_data['submission_id']}")
     except Exception as e:
         logger.error(f"❌ Failed to save complete submission, falling back to memory: {str(e)}")
         # Fallback to in-memory storage
-        in_memory_submissions.append(submission_data)
+        get_fallback_store().append(submission_data)
+        FALLBACK_TO_MEMORY.inc()
+        submission_stored(submission_data)
+
+async def save_complete_batch(submissions: List[Dict]) -> None:
+    """Save a batch's submissions to the database in one transaction, or to in-memory storage"""
+    try:
+        db_manager = get_db_manager()
+        if os.getenv('DB_HOST') and await db_manager.is_database_available():
+            try:
+                await db_manager.save_batch_submissions(submissions)
+                if debug_mode:
+                    logger.debug(f"💾 Batch of {len(submissions)} submissions saved to database: "
+                                 f"{submissions[0]['batch_id']}")
+                for submission_data in submissions:
+                    submission_stored(submission_data)
+                return
+            except Exception as db_error:
+                logger.error(f"❌ Database batch save failed, attempting reconnection: {str(db_error)}")
+                try:
+                    await db_manager._ensure_connection_pool()
+                    await db_manager.save_batch_submissions(submissions)
+                    logger.info(f"✅ Database reconnected and batch saved: {submissions[0]['batch_id']}")
+                    for submission_data in submissions:
+                        submission_stored(submission_data)
+                    return
+                except Exception as retry_error:
+                    logger.error(f"❌ Database reconnection failed: {str(retry_error)}")
+    except Exception as e:
+        logger.error(f"❌ Failed to save batch, falling back to memory: {str(e)}")
+
+    # Demo mode or database unavailable (the batch is one transaction, so nothing was stored)
+    store = get_fallback_store()
+    for submission_data in submissions:
+        store.append(submission_data)
+        FALLBACK_TO_MEMORY.inc()
+        submission_stored(submission_data)
 
 @app.get("/api/")
 async def root():
@@ -288,7 +448,7 @@ async def root():
         # Simulate minimal async operation for demo
         await asyncio.sleep(0.001)
         
-        return {
+        return render({
             "message": "Random Corp API is running",
             "version": "2.1.0",
             "status": "healthy",
@@ -303,7 +463,7 @@ async def root():
                 "submissions": "/api/submissions",
                 "health": "/health"
             }
-        }
+        })
     except Exception as e:
         logger.error(f"❌ Error in root endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail="Root endpoint error")
@@ -325,7 +485,7 @@ async def health_check():
         
         uptime = (datetime.now(timezone.utc) - app_start_time).total_seconds()
         
-        return {
+        return render({
             "status": "healthy", 
             "service": "Random Corp API",
             "version": "2.1.0",
@@ -335,8 +495,13 @@ async def health_check():
                 "available": db_available,
                 "host": os.getenv('DB_HOST', 'not_configured')
             },
+            "submission_log": get_submission_log().stats(),
+            "event_loop": {
+                "lag_p50_ms": round(get_loop_monitor().percentile(0.5) * 1000, 2),
+                "lag_p99_ms": round(get_loop_monitor().percentile(0.99) * 1000, 2)
+            },
             "mode": "database" if db_available else "demo"
-        }
+        })
     except Exception as e:
         logger.error(f"❌ Health check error: {str(e)}")
         return {
@@ -345,21 +510,120 @@ async def health_check():
             "error": str(e)
         }
 
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Allow admin endpoints only with a matching X-Admin-Token; disabled when ADMIN_TOKEN is unset"""
+    admin_token = os.getenv('ADMIN_TOKEN')
+    if not admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+@app.post("/api/admin/profile", dependencies=[Depends(require_admin)], include_in_schema=False)
+async def sampling_profile(seconds: float = 10.0, interval_ms: float = 10.0):
+    """
+    Sample all thread stacks for N seconds and return collapsed stacks (flamegraph format)
+    """
+    if not 0 < seconds <= MAX_DURATION:
+        raise HTTPException(status_code=400, detail=f"seconds must be between 0 and {MAX_DURATION:.0f}")
+    try:
+        counts = await profile(seconds, interval_ms / 1000, event_loop_thread_id)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    filename = f"profile-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}.collapsed"
+    return PlainTextResponse(
+        to_collapsed(counts),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@app.get("/api/admin/loop-offenders", dependencies=[Depends(require_admin)], include_in_schema=False)
+async def loop_offenders():
+    """
+    Recent event loop blocks with the stack and task captured while the loop was stuck
+    """
+    monitor = get_loop_monitor()
+    return render({
+        "threshold_ms": monitor.threshold * 1000,
+        "lag_p50_ms": round(monitor.percentile(0.5) * 1000, 2),
+        "lag_p99_ms": round(monitor.percentile(0.99) * 1000, 2),
+        "offenders": monitor.recent_offenders()
+    })
+
+@app.get("/api/admin/scheduler", dependencies=[Depends(require_admin)], include_in_schema=False)
+async def scheduler_status():
+    """
+    Scheduled jobs with their scope, last run and failure counts, and this worker's leadership
+    """
+    scheduler = get_scheduler()
+    return render({
+        "pid": os.getpid(),
+        "host_leader": get_worker_state().is_leader(),
+        "cluster_leader": scheduler.election.leader,
+        "jobs": scheduler.status()
+    })
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(get_worker_metrics().render(), media_type=metrics.CONTENT_TYPE)
+
 @app.get("/health")
 async def kubernetes_health_check():
     """Simple health check endpoint for Kubernetes probes"""
     return {"status": "healthy", "service": "Random Corp API"}
 
+async def run_idempotent(scope: str, idempotency_key: Optional[str], payload: Dict,
+                         response: Response, producer):
+    """Run producer once per Idempotency-Key, replaying the stored response for retries"""
+    if not idempotency_key:
+        return await producer()
+    if len(idempotency_key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"{IDEMPOTENCY_HEADER} cannot be longer than {MAX_KEY_LENGTH} characters")
+    
+    cache = get_idempotency_cache()
+    try:
+        result, replayed = await cache.run(
+            scoped_key(scope, idempotency_key),
+            cache.fingerprint(payload),
+            producer
+        )
+    except IdempotencyKeyConflict as e:
+        logger.warning(f"⚠️ {str(e)}")
+        raise HTTPException(status_code=422, detail=f"{IDEMPOTENCY_HEADER} was already used with a different request")
+    
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+        if debug_mode:
+            logger.debug(f"🔑 Replayed stored response for {IDEMPOTENCY_HEADER}: {idempotency_key}")
+    return result
+
 @app.post("/api/submit", response_model=SubmissionResponse)
-async def submit_names(submission: SubmissionRequest, background_tasks: BackgroundTasks):
+async def submit_names(
+    submission: SubmissionRequest,
+    background_tasks: BackgroundTasks,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER)
+):
     """
     Process name submission asynchronously with background tasks
     """
+    mark_since_start("request_validation")
+    result = await run_idempotent(
+        "submit", idempotency_key, submission.model_dump(), response,
+        lambda: process_submission(submission, background_tasks, idempotency_key)
+    )
+    with span("serialize"):
+        return render(result, response)
+
+async def process_submission(submission: SubmissionRequest, background_tasks: BackgroundTasks,
+                             idempotency_key: Optional[str] = None) -> SubmissionResponse:
+    """Enrich a single submission and schedule its background log and save"""
     start_time = datetime.now(timezone.utc)
     
     try:
         full_name = f"{submission.firstName} {submission.lastName}"
-        logger.info(f"🚀 Processing async submission for: {full_name}")
+        logger.info("🚀 Processing async submission for: %s", full_name,
+                    extra={"event": "submission.received"})
         
         # Prepare submission data for database
         submission_data = {
@@ -370,8 +634,8 @@ async def submit_names(submission: SubmissionRequest, background_tasks: Backgrou
         
         # Async operations that can run concurrently
         async_tasks = [
-            simulate_database_save(submission_data),
-            simulate_external_api_call(full_name),
+            traced("database_save", simulate_database_save(submission_data)),
+            traced("external_api", simulate_external_api_call(full_name)),
         ]
         
         # Execute async operations concurrently
@@ -387,10 +651,13 @@ async def submit_names(submission: SubmissionRequest, background_tasks: Backgrou
         end_time = datetime.now(timezone.utc)
         processing_time = (end_time - start_time).total_seconds()
         
-        # Update stats asynchronously in background
-        background_tasks.add_task(update_stats_async)
+        # Mark stats dirty; the stats updater coalesces writes per interval
+        get_stats_updater().mark_dirty()
+        get_processing_time_sketches().record(processing_time)
+        get_top_names().record(submission.firstName, submission.lastName)
+        get_unique_submitters().record(submission.firstName, submission.lastName)
         
-        # Log submission in background (fire-and-forget)
+        # Queue submission for the background log writer (fire-and-forget)
         log_data = {
             **submission_data,
             "submission_id": submission_id,
@@ -398,7 +665,7 @@ async def submit_names(submission: SubmissionRequest, background_tasks: Backgrou
             "message": message,
             "processing_time": processing_time
         }
-        background_tasks.add_task(log_submission_async, log_data)
+        log_submission(log_data)
         
         # Save complete submission data to database in background
         db_submission_data = {
@@ -406,24 +673,30 @@ async def submit_names(submission: SubmissionRequest, background_tasks: Backgrou
             "submission_id": submission_id,
             "message": message,
             "external_data": external_data,
-            "processing_time": processing_time
+            "processing_time": processing_time,
+            "idempotency_key": idempotency_key
         }
-        background_tasks.add_task(save_complete_submission, db_submission_data)
+        background_tasks.add_task(tracked_background(save_complete_submission), db_submission_data)
         
         # Create response
-        response = SubmissionResponse(
-            firstName=submission.firstName,
-            lastName=submission.lastName,
-            message=message,
-            submissionId=submission_id,
-            timestamp=start_time,
-            processingTime=processing_time
-        )
+        with span("response_build"):
+            response = build(SubmissionResponse,
+                firstName=submission.firstName,
+                lastName=submission.lastName,
+                message=message,
+                submissionId=submission_id,
+                timestamp=start_time,
+                processingTime=processing_time
+            )
         
         if debug_mode:
-            logger.info(f"✅ Async processing completed for: {full_name} in {processing_time:.3f}s")
+            logger.info("✅ Async processing completed for: %s in %.3fs", full_name, processing_time,
+                        extra={"event": "submission.processed", "submission_id": submission_id,
+                               "processing_time": processing_time})
         else:
-            logger.info(f"Successfully processed submission for: {full_name}")
+            logger.info("Successfully processed submission for: %s", full_name,
+                        extra={"event": "submission.processed", "submission_id": submission_id,
+                               "processing_time": processing_time})
         
         return response
         
@@ -432,19 +705,37 @@ async def submit_names(submission: SubmissionRequest, background_tasks: Backgrou
         raise HTTPException(status_code=500, detail="Internal server error occurred during async processing")
 
 @app.post("/api/submit/batch", response_model=BatchSubmissionResponse)
-async def submit_names_batch(batch_request: BatchSubmissionRequest, background_tasks: BackgroundTasks):
+async def submit_names_batch(
+    batch_request: BatchSubmissionRequest,
+    background_tasks: BackgroundTasks,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER)
+):
     """
     Process multiple name submissions concurrently using async batch processing
     """
+    mark_since_start("request_validation")
+    result = await run_idempotent(
+        "submit_batch", idempotency_key, batch_request.model_dump(), response,
+        lambda: process_batch(batch_request, background_tasks, idempotency_key)
+    )
+    with span("serialize"):
+        return render(result, response)
+
+async def process_batch(batch_request: BatchSubmissionRequest, background_tasks: BackgroundTasks,
+                        idempotency_key: Optional[str] = None) -> BatchSubmissionResponse:
+    """Enrich every submission in a batch concurrently and schedule its background log and save"""
     start_time = datetime.now(timezone.utc)
     batch_id = f"batch_{random.randint(10000, 99999)}_{int(start_time.timestamp())}"
     
     try:
-        logger.info(f"🚀 Processing async batch submission with {len(batch_request.submissions)} items (ID: {batch_id})")
+        logger.info("🚀 Processing async batch submission with %d items (ID: %s)",
+                    len(batch_request.submissions), batch_id,
+                    extra={"event": "batch.received", "batch_id": batch_id})
         
         # Process all submissions concurrently
-        async def process_single_submission(submission: SubmissionRequest) -> SubmissionResponse:
-            """Process a single submission within the batch"""
+        async def process_single_submission(submission: SubmissionRequest) -> Tuple[SubmissionResponse, Dict]:
+            """Process a single submission within the batch; the response and the row to store"""
             full_name = f"{submission.firstName} {submission.lastName}"
             
             # Prepare submission data for database
@@ -457,13 +748,13 @@ async def submit_names_batch(batch_request: BatchSubmissionRequest, background_t
             
             # Async operations for this submission
             submission_id, external_data = await asyncio.gather(
-                simulate_database_save(submission_data),
-                simulate_external_api_call(full_name)
+                traced("database_save", simulate_database_save(submission_data)),
+                traced("external_api", simulate_external_api_call(full_name))
             )
             
             # Generate response
             message = random.choice(POSITIVE_MESSAGES)
-            return SubmissionResponse(
+            result = build(SubmissionResponse,
                 firstName=submission.firstName,
                 lastName=submission.lastName,
                 message=message,
@@ -471,15 +762,22 @@ async def submit_names_batch(batch_request: BatchSubmissionRequest, background_t
                 timestamp=start_time,
                 processingTime=0.0  # Will be calculated for the whole batch
             )
+            return result, {
+                **submission_data,
+                "submission_id": submission_id,
+                "message": message,
+                "external_data": external_data
+            }
         
         # Process all submissions concurrently
         if debug_mode:
             logger.debug(f"⏳ Starting concurrent processing of {len(batch_request.submissions)} submissions")
         
-        results = await asyncio.gather(*[
+        processed = await asyncio.gather(*[
             process_single_submission(submission) 
             for submission in batch_request.submissions
         ])
+        results = [result for result, _ in processed]
         
         # Calculate total processing time
         end_time = datetime.now(timezone.utc)
@@ -489,9 +787,22 @@ async def submit_names_batch(batch_request: BatchSubmissionRequest, background_t
         for result in results:
             result.processingTime = total_processing_time
         
-        # Update stats for all submissions in background
-        for _ in range(len(results)):
-            background_tasks.add_task(update_stats_async)
+        # Save every item in the background, like single submissions. Items are
+        # keyed "<scoped key>#<position>" because the key index is unique per row
+        batch_key = scoped_key("submit_batch", idempotency_key)
+        db_submissions = [
+            {**data, "processing_time": total_processing_time,
+             "idempotency_key": f"{batch_key}#{position}" if batch_key else None}
+            for position, (_, data) in enumerate(processed)
+        ]
+        background_tasks.add_task(tracked_background(save_complete_batch), db_submissions)
+        
+        # Mark stats dirty once for the whole batch
+        get_stats_updater().mark_dirty(len(results))
+        get_processing_time_sketches().record(total_processing_time, len(results))
+        for submission in batch_request.submissions:
+            get_top_names().record(submission.firstName, submission.lastName)
+            get_unique_submitters().record(submission.firstName, submission.lastName)
         
         # Log batch completion
         batch_log_data = {
@@ -500,19 +811,24 @@ async def submit_names_batch(batch_request: BatchSubmissionRequest, background_t
             "processing_time": total_processing_time,
             "timestamp": start_time.isoformat()
         }
-        background_tasks.add_task(log_submission_async, batch_log_data)
+        log_submission(batch_log_data)
         
-        response = BatchSubmissionResponse(
-            total_processed=len(results),
-            processing_time=total_processing_time,
-            results=results,
-            batch_id=batch_id
-        )
+        with span("response_build"):
+            response = build(BatchSubmissionResponse,
+                total_processed=len(results),
+                processing_time=total_processing_time,
+                results=results,
+                batch_id=batch_id
+            )
         
         if debug_mode:
-            logger.info(f"✅ Batch processing completed: {len(results)} submissions in {total_processing_time:.3f}s")
+            logger.info("✅ Batch processing completed: %d submissions in %.3fs", len(results), total_processing_time,
+                        extra={"event": "batch.processed", "batch_id": batch_id,
+                               "processing_time": total_processing_time})
         else:
-            logger.info(f"Successfully processed batch: {len(results)} submissions")
+            logger.info("Successfully processed batch: %d submissions", len(results),
+                        extra={"event": "batch.processed", "batch_id": batch_id,
+                               "processing_time": total_processing_time})
         
         return response
         
@@ -520,203 +836,386 @@ async def submit_names_batch(batch_request: BatchSubmissionRequest, background_t
         logger.error(f"❌ Error processing async batch submission: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error occurred during batch processing")
 
+async def load_database_statistics() -> Optional[bytes]:
+    """get_statistics() as JSON for the read cache; None (not cached) when the database is unreachable"""
+    db_manager = get_db_manager()
+    if not await db_manager.is_database_available():
+        return None
+    return json.dumps(await db_manager.get_statistics()).encode()
+
+async def collect_stats() -> StatsResponse:
+    """Statistics from database or in-memory storage (shared by /api/stats and the live stream)"""
+    # Calculate uptime
+    current_time = datetime.now(timezone.utc)
+    uptime = (current_time - app_start_time).total_seconds()
+    
+    if debug_mode:
+        logger.debug(f"📊 Generating stats report - Uptime: {uptime:.1f}s")
+    
+    # Database statistics come through the read cache, so replicas share one query per data version
+    db_manager = get_db_manager()
+    db_stats = None
+    if os.getenv('DB_HOST') and db_manager.pool:
+        try:
+            cached = await get_read_cache().get_or_load("stats", "", load_database_statistics)
+            db_stats = json.loads(cached) if cached is not None else None
+        except Exception as db_error:
+            logger.error(f"❌ Database stats query failed: {str(db_error)}")
+            # Try to reconnect
+            try:
+                await db_manager._ensure_connection_pool()
+                db_stats = await db_manager.get_statistics()
+                logger.info("✅ Database reconnected and stats retrieved successfully")
+            except Exception as retry_error:
+                logger.error(f"❌ Database reconnection failed, using demo mode: {str(retry_error)}")
+                # Fall through to demo mode
+                raise db_error
+    
+    if db_stats is not None:
+        # Extract last submission timestamp
+        latest_sub = db_stats["latest_submission"]
+        last_submission_time = None
+        latest_submission_obj = None
+        
+        if latest_sub and latest_sub.get('timestamp'):
+            try:
+                last_submission_time = datetime.fromisoformat(latest_sub['timestamp'].replace('Z', '+00:00'))
+                latest_submission_obj = build(LatestSubmission,
+                    id=latest_sub['id'],
+                    name=latest_sub['name'],
+                    timestamp=latest_sub['timestamp']
+                )
+            except:
+                last_submission_time = None
+
+        stats = build(StatsResponse,
+            total_messages=len(POSITIVE_MESSAGES),
+            total_submissions=db_stats["total_submissions"],
+            recent_submissions=db_stats.get("recent_submissions", 0),
+            avg_processing_time=db_stats.get("avg_processing_time", 0.0),
+            latest_submission=latest_submission_obj,
+            api_version="2.1.0",
+            status="operational",
+            debug_mode=debug_mode,
+            last_submission=last_submission_time,
+            uptime_seconds=uptime
+        )
+    else:
+        # Use in-memory data for demo mode
+        memory_stats = get_fallback_store().stats()
+        total_submissions = memory_stats["count"]
+        avg_processing_time = memory_stats["avg_processing_time"]
+        
+        # Get latest submission
+        latest_submission_obj = None
+        last_submission_time = None
+        latest_sub = memory_stats["latest"]
+        if latest_sub:
+            latest_submission_obj = build(LatestSubmission,
+                id=latest_sub['id'] or 'demo',
+                name=latest_sub['name'],
+                timestamp=latest_sub['timestamp']
+            )
+            last_submission_time = datetime.fromisoformat(latest_sub['timestamp'])
+
+        stats = build(StatsResponse,
+            total_messages=len(POSITIVE_MESSAGES),
+            total_submissions=total_submissions,
+            recent_submissions=total_submissions,  # All submissions are recent in demo mode
+            avg_processing_time=avg_processing_time,
+            latest_submission=latest_submission_obj,
+            api_version="2.1.0",
+            status="demo_mode",
+            debug_mode=debug_mode,
+            last_submission=last_submission_time,
+            uptime_seconds=uptime
+        )
+    
+    # Percentiles come from the in-process sketches (merged with other replicas'), never from a table scan
+    stats.processing_time_percentiles = build(ProcessingTimePercentiles, **{
+        window: build(PercentileSummary, **summary)
+        for window, summary in get_processing_time_sketches().summary().items()
+    })
+    stats.unique_submitters = get_unique_submitters().unique_submitters()
+    
+    if debug_mode:
+        logger.debug(f"📈 Stats report generated: {stats.total_submissions} submissions, {uptime:.1f}s uptime")
+    
+    return stats
+
 @app.get("/api/stats", response_model=StatsResponse)
-async def get_stats():
+async def get_stats(response: Response, if_none_match: Optional[str] = Header(None)):
     """
     Get comprehensive API statistics from database or in-memory storage
     """
+    mark_since_start("request_validation")
+    # Taken before querying so a write landing mid-query invalidates this response
+    etag = current_etag("stats")
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
     try:
-        # Calculate uptime
-        current_time = datetime.now(timezone.utc)
-        uptime = (current_time - app_start_time).total_seconds()
+        stats = await collect_stats()
+        response.headers.update(cache_headers(etag))
         
-        if debug_mode:
-            logger.debug(f"📊 Generating stats report - Uptime: {uptime:.1f}s")
-        
-        # Check if database is available and healthy
-        db_manager = get_db_manager()
-        if os.getenv('DB_HOST') and await db_manager.is_database_available():
-            try:
-                # Get stats from database
-                db_stats = await db_manager.get_statistics()
-                
-                # Extract last submission timestamp
-                latest_sub = db_stats["latest_submission"]
-                last_submission_time = None
-                latest_submission_obj = None
-                
-                if latest_sub and latest_sub.get('timestamp'):
-                    try:
-                        last_submission_time = datetime.fromisoformat(latest_sub['timestamp'].replace('Z', '+00:00'))
-                        latest_submission_obj = LatestSubmission(
-                            id=latest_sub['id'],
-                            name=latest_sub['name'],
-                            timestamp=latest_sub['timestamp']
-                        )
-                    except:
-                        last_submission_time = None
-
-                stats = StatsResponse(
-                    total_messages=len(POSITIVE_MESSAGES),
-                    total_submissions=db_stats["total_submissions"],
-                    recent_submissions=db_stats.get("recent_submissions", 0),
-                    avg_processing_time=db_stats.get("avg_processing_time", 0.0),
-                    latest_submission=latest_submission_obj,
-                    api_version="2.1.0",
-                    status="operational",
-                    debug_mode=debug_mode,
-                    last_submission=last_submission_time,
-                    uptime_seconds=uptime
-                )
-            except Exception as db_error:
-                logger.error(f"❌ Database stats query failed: {str(db_error)}")
-                # Try to reconnect
-                try:
-                    await db_manager._ensure_connection_pool()
-                    db_stats = await db_manager.get_statistics()
-                    
-                    # Extract last submission timestamp
-                    latest_sub = db_stats["latest_submission"]
-                    last_submission_time = None
-                    latest_submission_obj = None
-                    
-                    if latest_sub and latest_sub.get('timestamp'):
-                        try:
-                            last_submission_time = datetime.fromisoformat(latest_sub['timestamp'].replace('Z', '+00:00'))
-                            latest_submission_obj = LatestSubmission(
-                                id=latest_sub['id'],
-                                name=latest_sub['name'],
-                                timestamp=latest_sub['timestamp']
-                            )
-                        except:
-                            last_submission_time = None
-
-                    stats = StatsResponse(
-                        total_messages=len(POSITIVE_MESSAGES),
-                        total_submissions=db_stats["total_submissions"],
-                        recent_submissions=db_stats.get("recent_submissions", 0),
-                        avg_processing_time=db_stats.get("avg_processing_time", 0.0),
-                        latest_submission=latest_submission_obj,
-                        api_version="2.1.0",
-                        status="operational",
-                        debug_mode=debug_mode,
-                        last_submission=last_submission_time,
-                        uptime_seconds=uptime
-                    )
-                    logger.info("✅ Database reconnected and stats retrieved successfully")
-                except Exception as retry_error:
-                    logger.error(f"❌ Database reconnection failed, using demo mode: {str(retry_error)}")
-                    # Fall through to demo mode
-                    raise db_error
-        else:
-            # Use in-memory data for demo mode
-            total_submissions = len(in_memory_submissions)
-            
-            # Calculate average processing time from in-memory data
-            avg_processing_time = 0.0
-            if in_memory_submissions:
-                processing_times = [sub.get('processing_time', 0.0) for sub in in_memory_submissions]
-                avg_processing_time = sum(processing_times) / len(processing_times)
-            
-            # Get latest submission
-            latest_submission_obj = None
-            last_submission_time = None
-            if in_memory_submissions:
-                latest_sub = in_memory_submissions[-1]
-                latest_submission_obj = LatestSubmission(
-                    id=latest_sub.get('submission_id', 'demo'),
-                    name=f"{latest_sub.get('first_name', '')} {latest_sub.get('last_name', '')}".strip(),
-                    timestamp=latest_sub.get('timestamp', current_time.isoformat())
-                )
-                try:
-                    last_submission_time = datetime.fromisoformat(latest_sub.get('timestamp', current_time.isoformat()))
-                except:
-                    last_submission_time = current_time
-
-            stats = StatsResponse(
-                total_messages=len(POSITIVE_MESSAGES),
-                total_submissions=total_submissions,
-                recent_submissions=total_submissions,  # All submissions are recent in demo mode
-                avg_processing_time=avg_processing_time,
-                latest_submission=latest_submission_obj,
-                api_version="2.1.0",
-                status="demo_mode",
-                debug_mode=debug_mode,
-                last_submission=last_submission_time,
-                uptime_seconds=uptime
-            )
-        
-        if debug_mode:
-            logger.debug(f"📈 Stats report generated: {stats.total_submissions} submissions, {uptime:.1f}s uptime")
-        
-        return stats
+        with span("serialize"):
+            return render(stats, response)
         
     except Exception as e:
         logger.error(f"❌ Error generating stats: {str(e)}")
         raise HTTPException(status_code=500, detail="Error retrieving API statistics")
 
+@app.get("/api/stats/top-names", response_model=TopNamesResponse)
+async def get_top_submitted_names(response: Response, k: int = Query(10, ge=1, le=100),
+                                  if_none_match: Optional[str] = Header(None)):
+    """
+    Most frequently submitted names from the in-process heavy-hitters summary (no table scan).
+
+    Each count may overestimate the true count by at most count - min_count;
+    guaranteed names are certainly in the top k. Names not listed were
+    submitted at most max_untracked_count times, and no count is off by
+    more than error_bound (total_submissions / capacity).
+    """
+    etag = current_etag("top-names")
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    summary = get_top_names().view()
+    response.headers.update(cache_headers(etag))
+    with span("serialize"):
+        return render(build(TopNamesResponse,
+            names=[build(TopName, **entry) for entry in summary.top(min(k, summary.capacity))],
+            total_submissions=summary.total,
+            capacity=summary.capacity,
+            max_untracked_count=summary.floor,
+            error_bound=round(summary.total / summary.capacity, 3)
+        ), response)
+
+@app.get("/api/stats/timeseries", response_model=TimeseriesResponse)
+async def get_stats_timeseries(response: Response, days: int = Query(7, ge=1, le=90),
+                               if_none_match: Optional[str] = Header(None)):
+    """
+    Distinct submitters (first and last name pairs) per UTC day, oldest first, and across the whole range.
+
+    Counts are HyperLogLog estimates with the given relative standard error.
+    """
+    etag = current_etag("timeseries")
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    series = get_unique_submitters().timeseries(days)
+    response.headers.update(cache_headers(etag))
+    with span("serialize"):
+        return render(build(TimeseriesResponse,
+            days=[build(TimeseriesPoint, **point) for point in series["days"]],
+            unique_submitters=series["unique_submitters"],
+            standard_error=series["standard_error"]
+        ), response)
+
+async def stream_stats() -> Dict:
+    """Stats snapshot for the broadcast hub's change detection"""
+    return (await collect_stats()).model_dump(mode="json")
+
 @app.get("/api/submissions")
-async def get_submissions(limit: int = 10, offset: int = 0):
+async def get_submissions(limit: int = 10, offset: int = 0,
+                          batch_id: Optional[str] = Query(None, max_length=100),
+                          created_from: Optional[datetime] = Query(None, alias="from"),
+                          created_to: Optional[datetime] = Query(None, alias="to"),
+                          has_message: Optional[bool] = None,
+                          if_none_match: Optional[str] = Header(None)):
     """
-    Get paginated submissions from database or in-memory storage
+    Get paginated submissions from database or in-memory storage.
+    Optional filters: batch_id, from (inclusive) / to (exclusive) on created_at, has_message.
     """
+    etag = current_etag("submissions")
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    filters = SubmissionFilters(batch_id, as_utc(created_from), as_utc(created_to), has_message)
     try:
         if debug_mode:
-            logger.debug(f"📋 Retrieving {limit} submissions (offset: {offset})")
+            logger.debug(f"📋 Retrieving {limit} submissions (offset: {offset}, filters: {filters})")
         
         # Check if database is available
         db_manager = get_db_manager()
         if os.getenv('DB_HOST') and hasattr(db_manager, 'pool') and db_manager.pool:
-            # Get paginated submissions from database
-            submissions = await db_manager.get_paginated_submissions(limit=limit, offset=offset)
-            total_count = await db_manager.get_submissions_count()
+            # Get paginated submissions from database (filtered pages seek the covering indexes)
+            async def load_page() -> bytes:
+                submissions = await db_manager.get_paginated_submissions(limit=limit, offset=offset, filters=filters)
+                total_count = await db_manager.get_submissions_count(filters=filters)
+                with span("serialize"):
+                    return page_json(submissions, total_count, limit, offset)
+            
+            if offset == 0:
+                # First pages are what every dashboard polls: serve them from the read cache
+                body = await get_read_cache().get_or_load("submissions", f"{limit}:{tuple(filters)}", load_page)
+            else:
+                body = await load_page()
+            return Response(content=body, media_type="application/json", headers=cache_headers(etag))
+        elif filters.active():
+            total_count, submissions = filter_page(get_fallback_store(), filters, offset, limit)
         else:            # Use in-memory data for demo mode
-            total_count = len(in_memory_submissions)
+            store = get_fallback_store()
+            total_count = len(store)
             
             # Apply pagination to in-memory data
-            start_idx = offset
-            end_idx = offset + limit
-            submissions = in_memory_submissions[start_idx:end_idx]
+            submissions = store.page(offset, limit)
         
         if debug_mode:
             logger.debug(f"📄 Retrieved {len(submissions)} submissions (total: {total_count})")
         
-        return {
-            "submissions": submissions,
-            "count": len(submissions),
-            "total": total_count,
-            "limit": limit,
-            "offset": offset,
-            "has_more": offset + len(submissions) < total_count
-        }
+        # Rows are written straight to JSON in column order (submission_rows.py)
+        with span("serialize"):
+            body = page_json(submissions, total_count, limit, offset)
+        return Response(content=body, media_type="application/json", headers=cache_headers(etag))
         
     except Exception as e:
         logger.error(f"❌ Error retrieving submissions from database: {str(e)}")
         raise HTTPException(status_code=500, detail="Error retrieving submissions from database")
 
-# Global flag to track if background tasks are running
-background_tasks_started = False
+@app.get("/api/batches/{batch_id}", response_model=BatchSummaryResponse)
+async def get_batch(batch_id: str, response: Response, if_none_match: Optional[str] = Header(None)):
+    """
+    Summary of one batch: submission count, time span and processing time
+    """
+    etag = current_etag("batch")
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    try:
+        db_manager = get_db_manager()
+        if os.getenv('DB_HOST') and db_manager.pool:
+            summary = await db_manager.get_batch_summary(batch_id)
+        else:
+            summary = batch_summary(get_fallback_store(), batch_id)
+    except Exception as e:
+        logger.error(f"❌ Error retrieving batch {batch_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error retrieving batch summary")
+    
+    if summary is None:
+        raise HTTPException(status_code=404, detail=f"Batch {batch_id} not found")
+    response.headers.update(cache_headers(etag))
+    with span("serialize"):
+        return render(build(BatchSummaryResponse, **summary), response)
+
+@app.get("/api/submissions/search")
+async def search_submissions(q: str = Query(..., min_length=1, max_length=100),
+                             limit: int = Query(10, ge=1, le=50),
+                             if_none_match: Optional[str] = Header(None)):
+    """
+    Find submissions by first/last name: exact, prefix, then substring matches ("ann lee" matches both names)
+    """
+    etag = current_etag("search")
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    try:
+        db_manager = get_db_manager()
+        if os.getenv('DB_HOST') and db_manager.pool:
+            submissions = await db_manager.search_submissions(q, limit=limit)
+        else:
+            # Trigram index over the in-memory ring, caught up from the store on each search
+            submissions = [record_to_submission(record)
+                           for record in get_name_index().search(get_fallback_store(), q, limit)]
+        
+        if debug_mode:
+            logger.debug(f"🔎 Search for {q!r} returned {len(submissions)} submissions")
+        
+        with span("serialize"):
+            body = search_json(submissions, q, limit)
+        return Response(content=body, media_type="application/json", headers=cache_headers(etag))
+        
+    except Exception as e:
+        logger.error(f"❌ Error searching submissions: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error searching submissions")
+
+@app.get("/api/stream/submissions", include_in_schema=False)
+async def stream_submissions(last_event_id: Optional[str] = Header(None)):
+    """
+    Server-Sent Events feed of new submissions ("submission") and changed stats fields ("stats").
+    A "reset" event means the client missed events and should refetch /api/submissions and /api/stats.
+    """
+    hub = get_broadcast_hub()
+    subscriber = hub.subscribe(last_event_id)
+    if subscriber is None:
+        raise HTTPException(status_code=503, detail="Live stream unavailable, please poll instead")
+
+    if debug_mode:
+        logger.debug(f"📡 Stream subscriber connected (resume from {last_event_id}, {len(hub)} open)")
 
-async def periodic_database_health_check():
-    """Periodically check database health and attempt reconnection if needed"""
-    while True:
+    async def events():
         try:
-            await asyncio.sleep(60)  # Check every 60 seconds
-            
-            db_manager = get_db_manager()
-            db_host = os.getenv('DB_HOST')
-            
-            if db_host and not await db_manager.is_database_available():
-                logger.warning("🔄 Database not available, attempting reconnection...")
-                try:
-                    await db_manager.initialize()
-                    logger.info("✅ Database reconnection successful!")
-                except Exception as e:
-                    logger.debug(f"⚠️ Database reconnection failed: {str(e)}")
-            
+            # Ask EventSource to reconnect after 3s instead of its browser default
+            yield b"retry: 3000\n\n"
+            while True:
+                if not await subscriber.wait(hub.heartbeat_interval):
+                    # Comment line keeps proxies from timing out an idle stream
+                    yield b": keepalive\n\n"
+                    continue
+                frames = subscriber.drain()
+                if frames:
+                    yield b"".join(frames)
+                if subscriber.closed:
+                    break
+        finally:
+            hub.unsubscribe(subscriber)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+async def database_health_check():
+    """Probe the database and re-initialize the pool if it went away (host leader only)"""
+    db_manager = get_db_manager()
+    if os.getenv('DB_HOST') and not await db_manager.is_database_available():
+        logger.warning("🔄 Database not available, attempting reconnection...")
+        DB_RECONNECT_ATTEMPTS.inc()
+        try:
+            await db_manager.initialize()
+            logger.info("✅ Database reconnection successful!")
         except Exception as e:
-            logger.error(f"❌ Error in database health check: {str(e)}")
+            logger.debug(f"⚠️ Database reconnection failed: {str(e)}")
+
+async def refresh_database_pool():
+    """Check this worker's own pool and rebuild it when it is missing or broken (followers only).
+
+    The leader's probe only covers the leader's pool; a follower whose pool
+    failed at startup or died while the leader's stayed healthy would
+    otherwise stay in demo mode.
+    """
+    db_manager = get_db_manager()
+    if not os.getenv('DB_HOST') or get_worker_state().is_leader():
+        return
+    if db_manager.pool and await db_manager.is_database_available():
+        return
+
+    logger.warning("🔄 This worker's database pool is unavailable, attempting reconnection...")
+    DB_RECONNECT_ATTEMPTS.inc()
+    try:
+        await db_manager.close()
+        db_manager.pool = None
+        await db_manager.initialize()
+        logger.info("✅ Database reconnection successful")
+    except Exception as e:
+        logger.debug(f"⚠️ Database reconnection failed: {str(e)}")
+
+async def start_scheduled_jobs():
+    """Register the background jobs once and start the scheduler"""
+    scheduler = get_scheduler()
+    if "database-health" not in scheduler.jobs:
+        sketches, top_names, unique_submitters = \
+            get_processing_time_sketches(), get_top_names(), get_unique_submitters()
+        scheduler.add_job("database-health", database_health_check, 60, scope=HOST)
+        scheduler.add_job("database-pool-refresh", refresh_database_pool, 60)
+        scheduler.add_job("processing-time-sketches-sync", sketches.sync, sketches.persist_interval,
+                          run_on_start=True, run_on_stop=True)
+        scheduler.add_job("top-names-sync", top_names.sync, top_names.persist_interval,
+                          run_on_start=True, run_on_stop=True)
+        scheduler.add_job("unique-submitters-sync", unique_submitters.sync, unique_submitters.persist_interval,
+                          run_on_start=True, run_on_stop=True)
+        scheduler.add_job("processing-time-sketches-compact", sketches.compact, 600, scope=CLUSTER)
+        scheduler.add_job("top-names-compact", top_names.compact, 600, scope=CLUSTER)
+        scheduler.add_job("unique-submitters-retention", unique_submitters.expire_stored, 3600, scope=CLUSTER)
+        worker_metrics = get_worker_metrics()
+        if worker_metrics.enabled:
+            scheduler.add_job("worker-metrics-publish", worker_metrics.publish,
+                              float(os.getenv('METRICS_PUBLISH_INTERVAL_SECONDS', '5')),
+                              run_on_start=True, run_on_stop=True)
+    await scheduler.start()
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    from server import run
+    run()
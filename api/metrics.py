@@ -0,0 +1,410 @@
+"""
+Prometheus-style metrics for Random Corp API
+Counters, gauges and histograms rendered in the text exposition format for /metrics
+"""
+
+import os
+import time
+import json
+import errno
+import asyncio
+import logging
+import tempfile
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from tracing import span
+from shared_state import multi_worker_enabled, state_prefix
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds, tuned for a ~100-300ms request path
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    """Base class for metrics.
+
+    Updates are plain dict/list operations with no locks. They happen on the
+    event loop thread, and under the GIL each update is a handful of
+    bytecodes, so a concurrent scrape can at worst see a value one update stale.
+    """
+
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # Unlabelled series start at zero so they are exported before the first update
+        self._values: Dict[Labels, float] = {} if self.labelnames else {(): 0}
+
+    def render(self, values: Optional[Dict] = None) -> List[str]:
+        return ([f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+                + self.samples(self.collect() if values is None else values))
+
+    def collect(self) -> Dict:
+        """This process's current series: labels -> value"""
+        return dict(self._values)
+
+    def merge(self, values: Dict, other: Dict):
+        """Add another worker's series into values (counters and histograms sum)"""
+        for labels, value in other.items():
+            values[labels] = values.get(labels, 0) + value
+
+    def samples(self, values: Dict) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in values.items()]
+
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def inc(self, amount: float = 1, labels: Labels = ()):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: Labels = ()) -> float:
+        return self._values.get(labels, 0)
+
+
+class Gauge(Metric):
+    """Gauge that is either set directly or read from a callback at scrape time.
+
+    multiprocess_mode says how workers combine: "sum" for per-worker
+    quantities (in-flight requests, queue depths), "max" for values that
+    are already shared or where the worst worker matters (uptime, loop lag).
+    """
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 callback: Optional[Callable[[], float]] = None, multiprocess_mode: str = "sum"):
+        if multiprocess_mode not in ("sum", "max"):
+            raise ValueError(f"Unknown gauge multiprocess mode: {multiprocess_mode}")
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self.multiprocess_mode = multiprocess_mode
+
+    def set(self, value: float, labels: Labels = ()):
+        self._values[labels] = value
+
+    def inc(self, amount: float = 1, labels: Labels = ()):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, amount: float = 1, labels: Labels = ()):
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def value(self, labels: Labels = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def collect(self) -> Dict:
+        if self.callback is not None:
+            try:
+                self._values[()] = float(self.callback())
+            except Exception as e:
+                logger.debug(f"⚠️ Gauge callback failed for {self.name}: {str(e)}")
+                return {}
+        return dict(self._values)
+
+    def merge(self, values: Dict, other: Dict):
+        if self.multiprocess_mode == "sum":
+            super().merge(values, other)
+            return
+        for labels, value in other.items():
+            values[labels] = max(values.get(labels, value), value)
+
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, labels: Labels = ()):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        # Counts are stored per bucket and made cumulative at render time
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, labels: Labels = ()) -> int:
+        series = self._series.get(labels)
+        return int(sum(series[:-1])) if series else 0
+
+    def collect(self) -> Dict:
+        return {labels: list(series) for labels, series in list(self._series.items())}
+
+    def merge(self, values: Dict, other: Dict):
+        for labels, series in other.items():
+            current = values.get(labels)
+            values[labels] = [a + b for a, b in zip(current, series)] if current else list(series)
+
+    def samples(self, values: Dict) -> List[str]:
+        lines = []
+        for labels, series in values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+              callback: Optional[Callable[[], float]] = None, multiprocess_mode: str = "sum") -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback, multiprocess_mode))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, List]:
+        """This process's series in JSON form: name -> [[labels, value], ...]"""
+        return {name: [[list(labels), value] for labels, value in metric.collect().items()]
+                for name, metric in list(self._metrics.items())}
+
+    def render_merged(self, snapshots: Iterable[Tuple[Dict[str, List], bool]]) -> str:
+        """Render this process's series combined with other workers' (snapshot, alive) pairs.
+
+        Counters and histograms include every worker that ever published,
+        so totals keep growing after a worker exits; gauges only include
+        live workers.
+        """
+        values = {name: metric.collect() for name, metric in list(self._metrics.items())}
+        for snapshot, alive in snapshots:
+            for name, series in snapshot.items():
+                metric = self._metrics.get(name)
+                if metric is None or (isinstance(metric, Gauge) and not alive):
+                    continue
+                metric.merge(values[name], {tuple(labels): value for labels, value in series})
+        lines = []
+        for name, metric in list(self._metrics.items()):
+            lines.extend(metric.render(values[name]))
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno == errno.EPERM
+    return True
+
+
+class WorkerMetrics:
+    """Makes /metrics report the whole server rather than the worker that answered.
+
+    With several workers a scrape lands on one of them at random, so each
+    worker publishes a snapshot of its series to `<tmp>/<state prefix>-metrics/<pid>.json`
+    every few seconds (and on shutdown), and render() merges the other
+    workers' latest snapshots with its own live values. Other workers'
+    figures are up to one publish interval old. In single-worker mode it
+    renders the registry directly.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.enabled = multi_worker_enabled()
+        self.directory = directory or os.path.join(tempfile.gettempdir(), f"{state_prefix()}-metrics")
+        self.path = os.path.join(self.directory, f"{os.getpid()}.json")
+        if self.enabled:
+            os.makedirs(self.directory, exist_ok=True)
+
+    async def publish(self):
+        """Write this worker's snapshot (callbacks run here, the file write in a thread)"""
+        if self.enabled:
+            await asyncio.to_thread(self._write, registry.snapshot())
+
+    def _write(self, snapshot: Dict[str, List]):
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(snapshot, file, separators=(",", ":"))
+        os.replace(temporary, self.path)
+
+    def _snapshots(self):
+        for entry in os.listdir(self.directory):
+            pid, ext = os.path.splitext(entry)
+            if ext != ".json" or not pid.isdigit() or int(pid) == os.getpid():
+                continue
+            try:
+                with open(os.path.join(self.directory, entry), encoding="utf-8") as file:
+                    snapshot = json.load(file)
+            except (OSError, ValueError) as e:
+                logger.debug(f"⚠️ Skipping worker metrics snapshot {entry}: {str(e)}")
+                continue
+            yield snapshot, _pid_alive(int(pid))
+
+    def render(self) -> str:
+        if not self.enabled:
+            return registry.render()
+        return registry.render_merged(self._snapshots())
+
+
+# Global worker metrics instance - initialized lazily
+worker_metrics = None
+
+def get_worker_metrics() -> WorkerMetrics:
+    """Get or create the worker metrics publisher"""
+    global worker_metrics
+    if worker_metrics is None:
+        worker_metrics = WorkerMetrics()
+    return worker_metrics
+
+HTTP_REQUEST_DURATION = registry.histogram(
+    "randomcorp_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status")
+)
+HTTP_REQUESTS_IN_FLIGHT = registry.gauge(
+    "randomcorp_http_requests_in_flight",
+    "HTTP requests currently being processed"
+)
+DB_QUERY_DURATION = registry.histogram(
+    "randomcorp_db_query_duration_seconds",
+    "DatabaseManager call latency by method",
+    ("method",)
+)
+DB_QUERY_ERRORS = registry.counter(
+    "randomcorp_db_query_errors_total",
+    "DatabaseManager calls that raised, by method",
+    ("method",)
+)
+DB_POOL_IN_USE = registry.gauge(
+    "randomcorp_db_pool_connections_in_use",
+    "Pool connections currently checked out"
+)
+DB_POOL_WAITERS = registry.gauge(
+    "randomcorp_db_pool_waiters",
+    "Coroutines waiting to acquire a pool connection"
+)
+DB_RECONNECT_ATTEMPTS = registry.counter(
+    "randomcorp_db_reconnect_attempts_total",
+    "Attempts to re-initialize the database connection pool"
+)
+BACKGROUND_TASKS_PENDING = registry.gauge(
+    "randomcorp_background_tasks_pending",
+    "Background tasks (log writes, saves) currently running"
+)
+FALLBACK_TO_MEMORY = registry.counter(
+    "randomcorp_fallback_to_memory_total",
+    "Submissions stored in memory because the database was unavailable"
+)
+READ_CACHE_LOOKUPS = registry.counter(
+    "randomcorp_read_cache_lookups_total",
+    "Read cache lookups by resource and result (l1_hit, l2_hit, miss)",
+    ("resource", "result")
+)
+READ_CACHE_L2_ERRORS = registry.counter(
+    "randomcorp_read_cache_l2_errors_total",
+    "Shared (L2) read cache operations that failed and fell back to the database"
+)
+SCHEDULER_JOB_DURATION = registry.histogram(
+    "randomcorp_scheduler_job_duration_seconds",
+    "Scheduled job run time by job",
+    ("job",),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+)
+SCHEDULER_JOB_RUNS = registry.counter(
+    "randomcorp_scheduler_job_runs_total",
+    "Scheduled job runs by job and outcome (success, failure, timeout)",
+    ("job", "outcome")
+)
+SCHEDULER_JOB_SKIPPED = registry.counter(
+    "randomcorp_scheduler_job_skipped_total",
+    "Scheduled runs skipped by job and reason (not_leader, overlap, overrun)",
+    ("job", "reason")
+)
+
+
+def timed_query(method: str):
+    """Decorator recording latency, errors and a trace span for an async DatabaseManager method"""
+    def decorator(func):
+        labels = (method,)
+        span_name = f"db.{method}"
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                with span(span_name):
+                    return await func(*args, **kwargs)
+            except Exception:
+                DB_QUERY_ERRORS.inc(labels=labels)
+                raise
+            finally:
+                DB_QUERY_DURATION.observe(time.perf_counter() - start, labels)
+        return wrapper
+    return decorator
+
+
+def tracked_background(func):
+    """Wrap a background task so BACKGROUND_TASKS_PENDING counts it while it runs.
+
+    The gauge goes up when the task starts, not when it is scheduled:
+    Starlette skips a response's background tasks if the handler raises
+    or the send fails, and a count taken at scheduling would never come
+    back down.
+    """
+    span_name = f"background.{func.__name__}"
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        BACKGROUND_TASKS_PENDING.inc()
+        try:
+            with span(span_name):
+                return await func(*args, **kwargs)
+        finally:
+            BACKGROUND_TASKS_PENDING.dec()
+    return wrapper
@@ -0,0 +1,120 @@
+"""
+Schema migrations for Random Corp API
+Long-running index and backfill steps kept out of startup; batched, resumable and safe to re-run
+
+Usage (from api/, with the same DB_* settings as the API):
+    python migrate.py [--batch-size 5000] [--pause-ms 50] [--step name-trigram-backfill]
+
+Run it once per deploy after the rollout finishes. App startup only creates
+missing tables (and the indexes of a brand-new submissions table); building
+indexes on an existing table and backfilling derived rows happen here.
+"""
+
+import sys
+import asyncio
+import logging
+import argparse
+from typing import Callable, Dict, List, Optional
+from database import COVERING_INDEXES, get_db_manager
+from logging_config import configure_logging_from_env
+
+logger = logging.getLogger(__name__)
+
+# Progress is kept in app_statistics under "migration:<step>" so an interrupted run resumes
+PROGRESS_PREFIX = "migration:"
+COMPLETE = "complete"
+
+NAME_INDEXES = (("idx_first_name", "first_name"), ("idx_last_name", "last_name"))
+
+
+async def name_indexes(db_manager, args):
+    """Prefix name search seeks these indexes"""
+    for index_name, column in NAME_INDEXES:
+        if await db_manager.index_exists("submissions", index_name):
+            continue
+        logger.info(f"🔨 Building {index_name}")
+        online = await db_manager.create_index("submissions", index_name, column)
+        logger.info(f"✅ Built {index_name} ({'online' if online else 'offline'})")
+
+
+async def covering_indexes(db_manager, args):
+    """Rebuild the listing indexes with their INCLUDE columns, in place with DROP_EXISTING"""
+    for index_name, key_columns, included in COVERING_INDEXES:
+        if await db_manager.index_is_covering("submissions", index_name):
+            continue
+        logger.info(f"🔨 Rebuilding {index_name} as a covering index")
+        online = await db_manager.create_index("submissions", index_name, key_columns,
+                                               included=included, drop_existing=True)
+        logger.info(f"✅ Rebuilt {index_name} ({'online' if online else 'offline'})")
+
+
+async def name_trigram_backfill(db_manager, args):
+    """Index the names of submissions stored before submission_name_trigrams existed.
+
+    New rows are indexed on insert, so only ids up to the current maximum
+    need a pass. Each batch commits on its own and records the last id
+    done, keeping transactions and lock times short; a re-run picks up
+    from there.
+    """
+    progress_name = PROGRESS_PREFIX + "name_trigram_backfill"
+    stored = (await db_manager.get_statistics_by_prefix(progress_name)).get(progress_name)
+    if stored == COMPLETE:
+        return
+    after_pk = int(stored or 0)
+    until_pk = await db_manager.max_submission_pk()
+    logger.info(f"🔨 Backfilling name trigrams for submissions {after_pk + 1}-{until_pk}")
+
+    batches = 0
+    while True:
+        last_pk = await db_manager.backfill_name_trigrams(after_pk, until_pk, args.batch_size)
+        if last_pk is None:
+            break
+        after_pk = last_pk
+        await db_manager.update_statistics({progress_name: str(after_pk)})
+        batches += 1
+        if batches % 100 == 0:
+            logger.info(f"🔨 Name trigrams backfilled up to submission {after_pk} of {until_pk}")
+        await asyncio.sleep(args.pause_ms / 1000)
+
+    await db_manager.update_statistics({progress_name: COMPLETE})
+    logger.info(f"✅ Name trigram backfill complete ({batches} batches)")
+
+
+# Run in order; each step checks its own progress and skips finished work
+STEPS: Dict[str, Callable] = {
+    "covering-indexes": covering_indexes,
+    "name-indexes": name_indexes,
+    "name-trigram-backfill": name_trigram_backfill,
+}
+
+
+async def migrate(args) -> int:
+    db_manager = get_db_manager()
+    try:
+        await db_manager.initialize()
+        for name, step in STEPS.items():
+            if args.step and name != args.step:
+                continue
+            logger.info(f"🚚 Migration step: {name}")
+            await step(db_manager, args)
+        return 0
+    except Exception as e:
+        logger.error(f"❌ Migration failed: {str(e)}")
+        return 1
+    finally:
+        await db_manager.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per backfill transaction")
+    parser.add_argument("--pause-ms", type=float, default=50.0, help="Pause between batches to leave room for traffic")
+    parser.add_argument("--step", choices=list(STEPS), help="Run only this step")
+    args = parser.parse_args(argv)
+
+    configure_logging_from_env()
+    return asyncio.run(migrate(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
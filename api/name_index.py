@@ -0,0 +1,160 @@
+"""
+Name search for Random Corp API
+Query parsing, trigram extraction and match ranking shared by the SQL and in-memory search paths,
+plus the trigram index over the demo/fallback store
+"""
+
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Marks the start of a name so the leading grams of "ann" ("\0\0a", "\0an") answer 1- and 2-letter prefixes
+_START = "\0\0"
+
+# Match ranks, best first
+EXACT, PREFIX, SUBSTRING = 0, 1, 2
+
+
+def normalize_query(query: str) -> Tuple[str, ...]:
+    """Lowercased search terms: one term matches either name, two match first and last name"""
+    terms = query.lower().split()
+    if len(terms) > 2:
+        terms = [terms[0], " ".join(terms[1:])]
+    return tuple(terms)
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def name_trigrams(first_name: str, last_name: str) -> Set[str]:
+    """Distinct lowercase trigrams of both names, as stored in submission_name_trigrams"""
+    return trigrams(first_name.lower()) | trigrams(last_name.lower())
+
+
+def match_rank(terms: Tuple[str, ...], first_name: str, last_name: str) -> Optional[int]:
+    """EXACT, PREFIX or SUBSTRING for a matching submission, None otherwise"""
+    first, last = first_name.lower(), last_name.lower()
+    if len(terms) == 2:
+        if first == terms[0] and last == terms[1]:
+            return EXACT
+        if first.startswith(terms[0]) and last.startswith(terms[1]):
+            return PREFIX
+        return None
+    term = terms[0]
+    if term == first or term == last:
+        return EXACT
+    if first.startswith(term) or last.startswith(term):
+        return PREFIX
+    if len(term) >= 3 and (term in first or term in last):
+        return SUBSTRING
+    return None
+
+
+class NameIndex:
+    """Trigram index over the fallback store's retained submissions.
+
+    Postings map each trigram of a lowercased first or last name (plus
+    start-anchored grams for short prefixes) to store positions. The
+    index is not written to on the submit path: search() first catches up
+    with the store's append count, indexing new entries and dropping the
+    ones the ring has overwritten, so it stays correct for the shared
+    store too, where other workers append. Lookups intersect the postings
+    of the query's grams, smallest first, so their cost follows the
+    rarest gram rather than the store size.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._records: Dict[int, Tuple] = {}
+        self._oldest = 0
+        self._indexed_until = 0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @staticmethod
+    def _grams(first_name: str, last_name: str) -> Set[str]:
+        first, last = first_name.lower(), last_name.lower()
+        return trigrams(_START + first) | trigrams(_START + last)
+
+    def _add(self, position: int, record: Tuple):
+        self._records[position] = record
+        for gram in self._grams(record[1], record[2]):
+            self._postings[gram].add(position)
+
+    def _remove(self, position: int):
+        record = self._records.pop(position)
+        for gram in self._grams(record[1], record[2]):
+            postings = self._postings[gram]
+            postings.discard(position)
+            if not postings:
+                del self._postings[gram]
+
+    def _clear(self):
+        self._postings.clear()
+        self._records.clear()
+        self._oldest = self._indexed_until = 0
+
+    def sync(self, store):
+        """Index entries appended since the last sync and drop evicted ones"""
+        oldest, appended, records = store.entries_since(self._indexed_until)
+        if appended < self._indexed_until:
+            # Store was cleared
+            self._clear()
+            oldest, appended, records = store.entries_since(0)
+        # The ring overwrites oldest first, so evicted entries are one contiguous range
+        for position in range(self._oldest, min(oldest, self._indexed_until)):
+            self._remove(position)
+        self._oldest = oldest
+        for position, record in zip(range(appended - len(records), appended), records):
+            self._add(position, record)
+        self._indexed_until = appended
+
+    def _candidates(self, grams: Set[str]) -> Set[int]:
+        postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+        if not postings:
+            return set()
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                break
+        return candidates
+
+    def search(self, store, query: str, limit: int) -> List[Tuple]:
+        """Best matches for query: exact, then prefix, then substring; newest first within each"""
+        self.sync(store)
+        terms = normalize_query(query)
+        if not terms:
+            return []
+
+        if len(terms) == 2:
+            candidates = self._candidates(trigrams(_START + terms[0])) & \
+                self._candidates(trigrams(_START + terms[1]))
+        else:
+            candidates = self._candidates(trigrams(_START + terms[0]))
+            if len(terms[0]) >= 3:
+                candidates |= self._candidates(trigrams(terms[0]))
+
+        ranked = []
+        for position in candidates:
+            record = self._records[position]
+            rank = match_rank(terms, record[1], record[2])
+            if rank is not None:
+                ranked.append((rank, -position, record))
+        ranked.sort(key=lambda match: match[:2])
+        return [record for _, _, record in ranked[:limit]]
+
+
+# Global name index instance - initialized lazily
+name_index = None
+
+def get_name_index() -> NameIndex:
+    """Get or create the name index over the fallback store"""
+    global name_index
+    if name_index is None:
+        name_index = NameIndex()
+    return name_index
@@ -0,0 +1,143 @@
+"""
+In-process sampling profiler for Random Corp API
+Periodically samples every thread's stack and aggregates them as collapsed (flamegraph) stacks
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_DURATION = 60.0
+MIN_INTERVAL = 0.001
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    # Function start line (not the current line) so samples aggregate per function
+    label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return label.replace(";", ":")
+
+
+def _collapse(frame) -> str:
+    frames = []
+    while frame is not None:
+        frames.append(_frame_label(frame))
+        frame = frame.f_back
+    frames.reverse()
+    return ";".join(frames)
+
+
+class StackSampler:
+    """Statistical stack sampler covering the event-loop thread and thread-pool threads.
+
+    A dedicated thread wakes every interval and reads sys._current_frames();
+    no tracing hooks are installed, so the profiled code runs at full speed
+    and the cost is one stack walk per thread per sample. Event-loop samples
+    are tagged with the name of the asyncio task that was running.
+    """
+
+    def __init__(self, interval: float = 0.01, loop: Optional[asyncio.AbstractEventLoop] = None,
+                 loop_thread_id: Optional[int] = None):
+        self.interval = max(interval, MIN_INTERVAL)
+        self.loop = loop
+        self.loop_thread_id = loop_thread_id
+        self.samples = 0
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Make run() return after the current sample"""
+        self._stop.set()
+
+    def _thread_label(self, thread_id: int, names: Dict[int, str]) -> str:
+        if thread_id == self.loop_thread_id:
+            label = "event-loop"
+            if self.loop is not None:
+                # Read-only peek at asyncio's current-task table from another thread
+                task = asyncio.tasks._current_tasks.get(self.loop)
+                label += f";task:{task.get_name() if task is not None else '<idle>'}"
+            return label
+        return f"thread:{names.get(thread_id, thread_id)}".replace(";", ":")
+
+    def run(self, duration: float) -> Counter:
+        """Sample for duration seconds (blocking); returns collapsed stack -> sample count"""
+        counts: Counter = Counter()
+        own_id = threading.get_ident()
+        deadline = time.perf_counter() + min(duration, MAX_DURATION)
+
+        while time.perf_counter() < deadline and not self._stop.is_set():
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                counts[f"{self._thread_label(thread_id, names)};{_collapse(frame)}"] += 1
+            self.samples += 1
+            self._stop.wait(self.interval)
+        return counts
+
+
+def to_collapsed(counts: Counter) -> str:
+    """Brendan Gregg's collapsed format, readable by flamegraph.pl and speedscope"""
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is requested while another one is running"""
+
+
+_profile_running = False
+
+
+async def profile(duration: float, interval: float, loop_thread_id: Optional[int]) -> Counter:
+    """Run a sampler on its own thread without blocking the event loop"""
+    global _profile_running
+    if _profile_running:
+        raise ProfilerBusy("A profile is already running")
+    _profile_running = True
+
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+    sampler = StackSampler(interval=interval, loop=loop, loop_thread_id=loop_thread_id)
+
+    def resolve(result=None, error=None):
+        # The request may have been cancelled (client disconnect) while sampling
+        if done.done():
+            return
+        if error is not None:
+            done.set_exception(error)
+        else:
+            done.set_result(result)
+
+    def target():
+        global _profile_running
+        try:
+            loop.call_soon_threadsafe(resolve, sampler.run(duration))
+        except Exception as e:
+            loop.call_soon_threadsafe(resolve, None, e)
+        finally:
+            # Cleared by the sampler thread as it exits, so a cancelled request
+            # cannot start a second profile while this one is still sampling
+            _profile_running = False
+
+    logger.info(f"🔬 Starting sampling profile for {duration:.1f}s at {sampler.interval * 1000:.0f}ms intervals")
+    # A dedicated thread keeps the sampler out of the default executor it is observing
+    thread = threading.Thread(target=target, name="stack-sampler", daemon=True)
+    try:
+        thread.start()
+    except BaseException:
+        _profile_running = False
+        raise
+    try:
+        counts = await done
+    except asyncio.CancelledError:
+        # The request went away; stop sampling early (the thread clears the flag when it exits)
+        sampler.stop()
+        raise
+    logger.info(f"🔬 Profile finished: {sampler.samples} samples, {len(counts)} distinct stacks")
+    return counts
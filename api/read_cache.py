@@ -0,0 +1,381 @@
+"""
+Read cache for Random Corp API
+Two-tier cache for hot reads: in-process L1 plus a shared L2 (Redis protocol or in-memory), invalidated by writes
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+from shared_state import get_worker_state
+from metrics import READ_CACHE_LOOKUPS, READ_CACHE_L2_ERRORS
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "randomcorp:read:"
+VERSION_KEY = KEY_PREFIX + "version"
+
+
+class CacheBackend:
+    """Shared (L2) cache operations the read cache needs"""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl_ms: int, only_if_absent: bool = False) -> bool:
+        """Store value for ttl_ms; with only_if_absent, False when the key already exists"""
+        raise NotImplementedError
+
+    async def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    """In-process stand-in for a shared cache: same semantics, shared by nothing but this process"""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+
+    def _live(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires is not None and expires <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._live(key)
+
+    async def set(self, key: str, value: bytes, ttl_ms: int, only_if_absent: bool = False) -> bool:
+        if only_if_absent and self._live(key) is not None:
+            return False
+        self._data[key] = (value, time.monotonic() + ttl_ms / 1000)
+        return True
+
+    async def incr(self, key: str) -> int:
+        value = int(self._live(key) or 0) + 1
+        self._data[key] = (str(value).encode(), None)
+        return value
+
+
+class RedisError(Exception):
+    """Error reply from the Redis server"""
+
+
+class RedisBackend(CacheBackend):
+    """Minimal RESP2 client: one connection, one command at a time.
+
+    redis://[:password@]host[:port][/db] or unix:///path/to/redis.sock?db=N.
+    Every command is bounded by `timeout`; on any error the connection is
+    dropped and reopened by the next command.
+    """
+
+    def __init__(self, url: str, timeout: float = 0.25):
+        parsed = urlparse(url)
+        self.unix_path = parsed.path if parsed.scheme == "unix" else None
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        if self.unix_path:
+            self.db = int(parse_qs(parsed.query).get("db", ["0"])[0])
+        else:
+            self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _encode(args) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    async def _read_reply(self):
+        line = await self._reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Redis connection closed")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload
+        if kind == b"-":
+            raise RedisError(payload.decode(errors="replace"))
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = await self._reader.readexactly(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(payload)
+            return None if count < 0 else [await self._read_reply() for _ in range(count)]
+        raise ConnectionError(f"Unexpected Redis reply: {line[:20]!r}")
+
+    async def _call(self, *args):
+        self._writer.write(self._encode(args))
+        await self._writer.drain()
+        return await self._read_reply()
+
+    async def _connect(self):
+        if self.unix_path:
+            self._reader, self._writer = await asyncio.open_unix_connection(self.unix_path)
+        else:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            await self._call("AUTH", self.password)
+        if self.db:
+            await self._call("SELECT", self.db)
+
+    async def _drop(self):
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def command(self, *args):
+        async with self._lock:
+            try:
+                async def roundtrip():
+                    if self._writer is None:
+                        await self._connect()
+                    return await self._call(*args)
+                return await asyncio.wait_for(roundtrip(), self.timeout)
+            except RedisError:
+                raise
+            except BaseException:
+                # Timeouts and cancellation leave a reply in flight; never reuse that connection
+                await self._drop()
+                raise
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.command("GET", key)
+
+    async def set(self, key: str, value: bytes, ttl_ms: int, only_if_absent: bool = False) -> bool:
+        args = ["SET", key, value, "PX", ttl_ms] + (["NX"] if only_if_absent else [])
+        return await self.command(*args) is not None
+
+    async def incr(self, key: str) -> int:
+        return await self.command("INCR", key)
+
+    async def close(self):
+        async with self._lock:
+            await self._drop()
+
+
+class ReadCache:
+    """L1 (per worker) and L2 (shared) cache for read endpoints, keyed by data version.
+
+    Keys carry two versions. The L2 version is a counter in the shared
+    backend that every replica increments after storing a submission
+    (coalesced: one INCR per burst) and that readers re-read at most every
+    version_refresh seconds; it namespaces the L2 keys, so a write anywhere
+    retires every cached read everywhere without deleting anything (old
+    entries expire after l2_ttl). The host's data version (shared by its
+    workers) is added to L1 keys, so a worker never serves a response
+    older than a write made on its own host. L1 entries also expire after
+    l1_ttl, which bounds staleness when there is no L2.
+
+    A miss is loaded once per worker (concurrent callers await the same
+    load, and one of them takes over if the loading caller is cancelled)
+    and, with an L2, once per version across replicas: the first replica
+    takes a short SET NX lock and the others poll L2 for up to lock_wait
+    before loading themselves. L2 errors fall through to the
+    loader and switch L2 off for l2_retry seconds.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None, l1_ttl: float = 1.0, l2_ttl: float = 30.0,
+                 version_refresh: float = 0.5, lock_wait: float = 0.2, l2_retry: float = 5.0,
+                 max_entries: int = 256):
+        self.backend = backend
+        self.l1_ttl = l1_ttl
+        self.l2_ttl = l2_ttl
+        self.version_refresh = version_refresh
+        self.lock_wait = lock_wait
+        self.l2_retry = l2_retry
+        self.max_entries = max_entries
+        # (resource, params) -> (l2 version, host data version, expires, value)
+        self._l1: "OrderedDict[Tuple[str, str], Tuple[int, int, float, bytes]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._l2_version = 0
+        self._version_checked_at = 0.0
+        self._l2_down_until = 0.0
+        self._bumps_pending = False
+        self._bump_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        """Responses held in this worker's L1"""
+        return len(self._l1)
+
+    def _l2_available(self) -> bool:
+        return self.backend is not None and time.monotonic() >= self._l2_down_until
+
+    def _l2_failed(self, operation: str, error: Exception):
+        READ_CACHE_L2_ERRORS.inc()
+        self._l2_down_until = time.monotonic() + self.l2_retry
+        logger.warning(f"⚠️ Read cache L2 {operation} failed, bypassing it for {self.l2_retry:.0f}s: {str(error)}")
+
+    async def _current_l2_version(self) -> Optional[int]:
+        """The shared version, or None while L2 is unusable or a local write is not yet published to it"""
+        if not self._l2_available() or self._bumps_pending:
+            return None
+        now = time.monotonic()
+        if now - self._version_checked_at >= self.version_refresh:
+            self._version_checked_at = now
+            try:
+                self._l2_version = int(await self.backend.get(VERSION_KEY) or 0)
+            except Exception as e:
+                self._l2_failed("version read", e)
+                return None
+        return self._l2_version
+
+    def mark_written(self):
+        """Called for every stored submission: retires cached reads on every replica"""
+        if self.backend is None:
+            return
+        self._bumps_pending = True
+        if self._bump_task is None or self._bump_task.done():
+            self._bump_task = asyncio.create_task(self._publish_bumps(), name="read-cache-invalidate")
+
+    async def _publish_bumps(self):
+        while self._bumps_pending:
+            self._bumps_pending = False
+            try:
+                self._l2_version = await self.backend.incr(VERSION_KEY)
+                self._version_checked_at = time.monotonic()
+            except Exception as e:
+                # Unpublished writes make every replica's L2 entries suspect; skip L2 until it is back
+                self._l2_failed("invalidation", e)
+                return
+
+    async def get_or_load(self, resource: str, params: str,
+                          loader: Callable[[], Awaitable[Optional[bytes]]]) -> Optional[bytes]:
+        """Cached value for (resource, params), loading it on a miss; loader returns None for uncacheable results"""
+        key = (resource, params)
+        l2_version = await self._current_l2_version()
+        data_version = get_worker_state().data_version()
+        now = time.monotonic()
+
+        entry = self._l1.get(key)
+        if entry is not None and entry[0] == (l2_version or 0) and entry[1] == data_version and entry[2] > now:
+            READ_CACHE_LOOKUPS.inc(labels=(resource, "l1_hit"))
+            return entry[3]
+
+        inflight = self._inflight.get(key)
+        while inflight is not None:
+            try:
+                value = await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # Only the loading request was cancelled (its client went away): load here instead
+                if not inflight.cancelled():
+                    raise
+                inflight = self._inflight.get(key)
+                continue
+            READ_CACHE_LOOKUPS.inc(labels=(resource, "l1_hit"))
+            return value
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value, result = await self._load(resource, params, l2_version, loader)
+            READ_CACHE_LOOKUPS.inc(labels=(resource, result))
+            if value is not None:
+                self._l1[key] = ((l2_version or 0), data_version, time.monotonic() + self.l1_ttl, value)
+                self._l1.move_to_end(key)
+                while len(self._l1) > self.max_entries:
+                    self._l1.popitem(last=False)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Waiters (if any) see the exception; do not warn about it never being retrieved
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _load(self, resource: str, params: str, l2_version: Optional[int],
+                    loader: Callable[[], Awaitable[Optional[bytes]]]) -> Tuple[Optional[bytes], str]:
+        if l2_version is None:
+            return await loader(), "miss"
+
+        l2_key = f"{KEY_PREFIX}{l2_version}:{resource}:{params}"
+        try:
+            value = await self.backend.get(l2_key)
+            if value is not None:
+                return value, "l2_hit"
+            if not await self.backend.set(l2_key + ":lock", b"1", int(self.lock_wait * 5000), only_if_absent=True):
+                # Another replica is loading this version; wait briefly for its result
+                deadline = time.monotonic() + self.lock_wait
+                while time.monotonic() < deadline:
+                    await asyncio.sleep(self.lock_wait / 10)
+                    value = await self.backend.get(l2_key)
+                    if value is not None:
+                        return value, "l2_hit"
+        except Exception as e:
+            self._l2_failed("read", e)
+            return await loader(), "miss"
+
+        value = await loader()
+        if value is not None:
+            try:
+                await self.backend.set(l2_key, value, int(self.l2_ttl * 1000))
+            except Exception as e:
+                self._l2_failed("write", e)
+        return value, "miss"
+
+    async def close(self):
+        if self._bump_task is not None and not self._bump_task.done():
+            try:
+                await asyncio.wait_for(self._bump_task, 1.0)
+            except Exception:
+                pass
+        if self.backend is not None:
+            await self.backend.close()
+
+
+def backend_from_url(url: str) -> Optional[CacheBackend]:
+    """READ_CACHE_URL: empty (L1 only), memory:// (in-process stand-in), redis://... or unix://..."""
+    if not url:
+        return None
+    if url.startswith("memory://"):
+        return MemoryBackend()
+    if url.startswith(("redis://", "unix://")):
+        return RedisBackend(url, timeout=float(os.getenv('READ_CACHE_L2_TIMEOUT_MS', '250')) / 1000)
+    raise ValueError(f"Unsupported READ_CACHE_URL scheme: {url.split(':', 1)[0]}")
+
+
+# Global read cache instance - initialized lazily
+read_cache = None
+
+def get_read_cache() -> ReadCache:
+    """Get or create the read cache instance"""
+    global read_cache
+    if read_cache is None:
+        url = os.getenv('READ_CACHE_URL', '')
+        read_cache = ReadCache(
+            backend=backend_from_url(url),
+            l1_ttl=float(os.getenv('READ_CACHE_L1_TTL_SECONDS', '1')),
+            l2_ttl=float(os.getenv('READ_CACHE_L2_TTL_SECONDS', '30'))
+        )
+        logger.info(f"🗄️ Read cache enabled (L1 ttl={read_cache.l1_ttl}s, "
+                    f"L2={'none' if read_cache.backend is None else url.split('://', 1)[0]})")
+    return read_cache
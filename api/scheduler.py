@@ -0,0 +1,254 @@
+"""
+Background job scheduler for Random Corp API
+Named periodic jobs with jitter, overlap prevention and timing metrics, run per process, per host or once per cluster
+"""
+
+import os
+import time
+import random
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+from database import get_db_manager
+from shared_state import get_worker_state
+from metrics import SCHEDULER_JOB_DURATION, SCHEDULER_JOB_RUNS, SCHEDULER_JOB_SKIPPED
+
+logger = logging.getLogger(__name__)
+
+# Where a job runs: every worker, the leader worker of each host, or one worker in the whole cluster
+PROCESS, HOST, CLUSTER = "process", "host", "cluster"
+
+LEADER_LOCK_RESOURCE = "randomcorp:scheduler-leader"
+
+
+class LeaderElection:
+    """Cluster-wide leadership for jobs that must run on exactly one replica.
+
+    Only each host's leader worker competes. With a database the winner
+    holds an exclusive session-owned sp_getapplock on a dedicated
+    connection; SQL Server releases it when that connection closes or the
+    replica dies, and the next refresh() elsewhere takes over. refresh()
+    also re-checks a held lock, so a leader whose connection dropped steps
+    down within one election interval. Without a database (demo mode)
+    there is nothing shared to coordinate through, so the host leader is
+    the cluster leader.
+    """
+
+    def __init__(self, resource: str = LEADER_LOCK_RESOURCE):
+        self.resource = resource
+        self.leader = False
+        self.changes = 0
+        self._conn = None
+
+    def _set(self, leader: bool):
+        if leader != self.leader:
+            self.leader = leader
+            self.changes += 1
+            if leader:
+                logger.info(f"👑 Worker {os.getpid()} is now the cluster leader for scheduled jobs")
+            else:
+                logger.warning(f"⚠️ Worker {os.getpid()} is no longer the cluster leader")
+
+    async def _drop_lock(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            try:
+                await conn.close()
+            except Exception as e:
+                logger.debug(f"⚠️ Closing the leader lock connection failed: {str(e)}")
+
+    async def refresh(self) -> bool:
+        if not get_worker_state().is_leader():
+            await self._drop_lock()
+            self._set(False)
+            return False
+
+        db_manager = get_db_manager()
+        if not os.getenv('DB_HOST'):
+            self._set(True)
+            return True
+
+        if self._conn is not None:
+            try:
+                if await db_manager.session_lock_held(self._conn, self.resource):
+                    return True
+            except Exception as e:
+                logger.warning(f"⚠️ Leader lock connection failed: {str(e)}")
+            await self._drop_lock()
+            self._set(False)
+
+        if not db_manager.pool:
+            return False
+        try:
+            self._conn = await db_manager.acquire_session_lock(self.resource)
+        except Exception as e:
+            logger.debug(f"⚠️ Leader election failed: {str(e)}")
+            self._conn = None
+        self._set(self._conn is not None)
+        return self.leader
+
+    async def release(self):
+        """Step down (on shutdown) so another replica takes over on its next refresh"""
+        await self._drop_lock()
+        if self.leader:
+            self.leader = False
+            self.changes += 1
+            logger.info(f"👑 Worker {os.getpid()} released cluster leadership")
+
+
+class Job:
+    """A named periodic coroutine and its run history"""
+
+    def __init__(self, name: str, func: Callable[[], Awaitable], interval: float, jitter: float = 0.1,
+                 scope: str = PROCESS, timeout: Optional[float] = None,
+                 run_on_start: bool = False, run_on_stop: bool = False):
+        if scope not in (PROCESS, HOST, CLUSTER):
+            raise ValueError(f"Unknown job scope: {scope}")
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.scope = scope
+        self.timeout = timeout
+        self.run_on_start = run_on_start
+        self.run_on_stop = run_on_stop
+
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last_run_at: Optional[str] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def next_delay(self) -> float:
+        """The interval spread by +/- jitter so replicas started together drift apart"""
+        return self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def status(self) -> Dict:
+        return {"name": self.name, "scope": self.scope, "interval_seconds": self.interval,
+                "running": self.running, "runs": self.runs, "failures": self.failures, "skipped": self.skipped,
+                "last_run_at": self.last_run_at,
+                "last_duration_ms": round(self.last_duration * 1000, 2) if self.last_duration is not None else None,
+                "last_error": self.last_error}
+
+
+class Scheduler:
+    """Runs each job in its own loop task.
+
+    A job never overlaps itself: its next run is scheduled from when the
+    current one started, and a run that overruns the interval delays the
+    next one (counted as skipped) instead of starting a second copy.
+    HOST jobs run only on the worker holding the host leader lock, CLUSTER
+    jobs only on the elected cluster leader; elsewhere their runs are
+    skipped, so a new leader picks them up on its next tick. Leadership is
+    refreshed by a built-in job every election_interval seconds.
+    """
+
+    def __init__(self, election: Optional[LeaderElection] = None, election_interval: float = 15.0):
+        self.election = election or LeaderElection()
+        self.jobs: Dict[str, Job] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.add_job("leader-election", self.election.refresh, election_interval, jitter=0.2,
+                     timeout=election_interval, run_on_start=True)
+
+    def add_job(self, name: str, func: Callable[[], Awaitable], interval: float, **options) -> Job:
+        if name in self.jobs:
+            raise ValueError(f"Job already scheduled: {name}")
+        job = self.jobs[name] = Job(name, func, interval, **options)
+        if self._tasks:
+            self._tasks[name] = asyncio.create_task(self._loop(job), name=f"job:{name}")
+        return job
+
+    def _eligible(self, job: Job) -> bool:
+        if job.scope == HOST:
+            return get_worker_state().is_leader()
+        if job.scope == CLUSTER:
+            return self.election.leader
+        return True
+
+    async def run(self, job: Job) -> bool:
+        """Run a job once now (if this worker is eligible and it is not already running)"""
+        labels = (job.name,)
+        if job.running:
+            job.skipped += 1
+            SCHEDULER_JOB_SKIPPED.inc(labels=(job.name, "overlap"))
+            return False
+        if not self._eligible(job):
+            SCHEDULER_JOB_SKIPPED.inc(labels=(job.name, "not_leader"))
+            return False
+
+        job.running = True
+        job.last_run_at = datetime.now(timezone.utc).isoformat()
+        start = time.perf_counter()
+        outcome = "success"
+        try:
+            if job.timeout:
+                await asyncio.wait_for(job.func(), job.timeout)
+            else:
+                await job.func()
+            job.last_error = None
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            job.failures += 1
+            job.last_error = f"timed out after {job.timeout:.0f}s"
+            logger.error(f"❌ Job {job.name} timed out after {job.timeout:.0f}s")
+        except Exception as e:
+            outcome = "failure"
+            job.failures += 1
+            job.last_error = str(e)
+            logger.error(f"❌ Job {job.name} failed: {str(e)}")
+        finally:
+            job.running = False
+            job.runs += 1
+            job.last_duration = time.perf_counter() - start
+            SCHEDULER_JOB_DURATION.observe(job.last_duration, labels)
+            SCHEDULER_JOB_RUNS.inc(labels=(job.name, outcome))
+        return outcome == "success"
+
+    async def _loop(self, job: Job):
+        loop = asyncio.get_running_loop()
+        next_run = loop.time() + (0 if job.run_on_start else job.next_delay())
+        while True:
+            await asyncio.sleep(max(0.0, next_run - loop.time()))
+            started = loop.time()
+            await self.run(job)
+            next_run = started + job.next_delay()
+            if next_run < loop.time():
+                job.skipped += 1
+                SCHEDULER_JOB_SKIPPED.inc(labels=(job.name, "overrun"))
+                next_run = loop.time()
+
+    async def start(self):
+        if self._tasks:
+            return
+        for name, job in self.jobs.items():
+            self._tasks[name] = asyncio.create_task(self._loop(job), name=f"job:{name}")
+        logger.info(f"⏰ Scheduler started with {len(self.jobs)} jobs: {', '.join(self.jobs)}")
+
+    async def stop(self):
+        """Cancel every job, give run_on_stop jobs a final run and step down as leader"""
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for job in self.jobs.values():
+            if job.run_on_stop:
+                await self.run(job)
+        await self.election.release()
+
+    def status(self) -> List[Dict]:
+        return [job.status() for job in self.jobs.values()]
+
+
+# Global scheduler instance - initialized lazily
+scheduler = None
+
+def get_scheduler() -> Scheduler:
+    """Get or create the scheduler instance"""
+    global scheduler
+    if scheduler is None:
+        scheduler = Scheduler(election_interval=float(os.getenv('LEADER_ELECTION_INTERVAL_SECONDS', '15')))
+    return scheduler
@@ -0,0 +1,127 @@
+"""
+Production server entrypoint for Random Corp API
+Runs uvicorn with workers sized to the CPU quota, uvloop/httptools when installed and a graceful drain on SIGTERM
+"""
+
+import os
+import sys
+import math
+import logging
+import importlib.util
+from typing import Optional
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+from logging_config import configure_logging_from_env
+
+logger = logging.getLogger(__name__)
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit() -> Optional[float]:
+    """CPUs allowed by the container's CFS quota (cgroup v2, then v1); None if unlimited"""
+    cpu_max = _read("/sys/fs/cgroup/cpu.max")
+    if cpu_max:
+        quota, _, period = cpu_max.partition(" ")
+        if quota != "max" and period:
+            return int(quota) / int(period)
+        return None
+    quota = _read("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")
+    period = _read("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+    if quota and period and int(quota) > 0:
+        return int(quota) / int(period)
+    return None
+
+
+def default_workers() -> int:
+    """One worker per whole CPU the container may use (at least one).
+
+    A 500m limit still gets one worker; partial CPUs are rounded up since
+    the workers spend most of their time waiting on I/O.
+    """
+    try:
+        available = len(os.sched_getaffinity(0))
+    except AttributeError:
+        available = os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    if limit is not None:
+        available = min(available, math.ceil(limit))
+    return max(1, available)
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def build_config() -> dict:
+    workers = int(os.getenv('WEB_CONCURRENCY') or default_workers())
+    # Workers are separate imports of main; these make them agree on shared state (see shared_state.py)
+    os.environ['WEB_CONCURRENCY'] = str(workers)
+    os.environ.setdefault('SHARED_STATE_NAME', f"randomcorp-{os.getpid()}")
+
+    limit_concurrency = os.getenv('LIMIT_CONCURRENCY')
+    return {
+        "app": "main:app",
+        "host": os.getenv('HOST', '0.0.0.0'),
+        "port": int(os.getenv('PORT', '8000')),
+        "workers": workers,
+        "loop": "uvloop" if _installed("uvloop") else "asyncio",
+        "http": "httptools" if _installed("httptools") else "h11",
+        # Longer than typical load balancer idle timeouts (60s) so the proxy closes first
+        "timeout_keep_alive": int(os.getenv('KEEPALIVE_SECONDS', '75')),
+        "backlog": int(os.getenv('BACKLOG', '2048')),
+        "limit_concurrency": int(limit_concurrency) if limit_concurrency else None,
+        # Seconds to let in-flight requests and their background tasks finish after SIGTERM
+        "timeout_graceful_shutdown": int(os.getenv('GRACEFUL_TIMEOUT_SECONDS', '25')),
+        "proxy_headers": True,
+        "forwarded_allow_ips": os.getenv('FORWARDED_ALLOW_IPS', '*'),
+        "access_log": os.getenv('ACCESS_LOG', 'true').lower() == 'true',
+        # Keep uvicorn on the queue-based logging pipeline
+        "log_config": None,
+    }
+
+
+def begin_shutdown():
+    """Work that has to happen when shutdown starts, before the drain rather than in lifespan shutdown"""
+    # Open event streams never finish on their own and would hold the drain for the whole timeout;
+    # closing the hub ends them (clients reconnect elsewhere with Last-Event-ID)
+    broadcast = sys.modules.get("broadcast")
+    if broadcast is not None and broadcast.broadcast_hub is not None:
+        try:
+            broadcast.broadcast_hub.close()
+        except Exception as e:
+            logger.error(f"❌ Failed to close the broadcast hub: {str(e)}")
+
+
+class DrainingServer(uvicorn.Server):
+    """uvicorn server that runs begin_shutdown() on the first exit signal, before draining connections"""
+
+    def handle_exit(self, sig, frame):
+        if not self.should_exit:
+            begin_shutdown()
+        super().handle_exit(sig, frame)
+
+
+def run():
+    configure_logging_from_env()
+    options = build_config()
+    logger.info(f"🚀 Starting server: {options['workers']} worker(s), loop={options['loop']}, "
+                f"http={options['http']}, keep-alive {options['timeout_keep_alive']}s, "
+                f"backlog {options['backlog']}, graceful timeout {options['timeout_graceful_shutdown']}s")
+    # What uvicorn.run() does (minus reload), with the server class swapped for DrainingServer
+    config = uvicorn.Config(**options)
+    server = DrainingServer(config)
+    if config.workers > 1:
+        Multiprocess(config, target=server.run, sockets=[config.bind_socket()]).run()
+    else:
+        server.run()
+
+
+if __name__ == "__main__":
+    run()
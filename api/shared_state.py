@@ -0,0 +1,189 @@
+"""
+Cross-worker shared state for Random Corp API
+Named shared-memory segments, an flock-based lock and leader election for multi-process deployments
+"""
+
+import os
+import time
+import fcntl
+import struct
+import logging
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# uvicorn's --workers defaults to $WEB_CONCURRENCY, so the same variable switches shared mode on
+WORKERS = int(os.getenv('WEB_CONCURRENCY', '1'))
+
+_REFCOUNT = struct.Struct("<Q")
+# State segment: start time (epoch seconds), data version
+_STATE = struct.Struct("<dQ")
+
+
+def multi_worker_enabled() -> bool:
+    return WORKERS > 1
+
+
+def state_prefix() -> str:
+    """Name shared by all workers of one server.
+
+    Workers started by one supervisor share its pid; SHARED_STATE_NAME
+    overrides this when the supervisor is something else.
+    """
+    return os.getenv('SHARED_STATE_NAME') or f"randomcorp-{os.getppid()}"
+
+
+def per_worker_path(path: str) -> str:
+    """Suffix a file path with the worker pid so workers never share a rotating file"""
+    if not multi_worker_enabled() or path == os.devnull:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{os.getpid()}{ext}"
+
+
+def _lock_path(name: str) -> str:
+    return os.path.join(tempfile.gettempdir(), f"{name}.lock")
+
+
+class SharedSegment:
+    """Named shared-memory block visible to every worker, with a cross-process lock.
+
+    The first worker creates the (zero-filled) segment, later ones attach.
+    The first 8 bytes hold an attach count; the last worker to close
+    unlinks it. lock() is a blocking flock: critical sections are a few
+    memory copies, so holding it on the event loop thread is fine.
+    """
+
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.created = False
+        for _ in range(50):
+            try:
+                self.shm = shared_memory.SharedMemory(name=name, create=True, size=_REFCOUNT.size + size)
+                self.created = True
+                break
+            except FileExistsError:
+                try:
+                    self.shm = shared_memory.SharedMemory(name=name)
+                    break
+                except (FileNotFoundError, ValueError):
+                    # Creator has not sized it yet, or the last owner just unlinked it
+                    time.sleep(0.01)
+        else:
+            raise RuntimeError(f"Could not create or attach shared memory segment {name}")
+
+        # Python < 3.13 registers attached segments with the resource tracker too,
+        # which would unlink them when any single worker exits
+        resource_tracker.unregister(self.shm._name, "shared_memory")
+        if self.shm.size < _REFCOUNT.size + size:
+            raise ValueError(f"Shared memory segment {name} is smaller than expected; "
+                             f"was it created with a different capacity?")
+
+        self.data = self.shm.buf[_REFCOUNT.size:_REFCOUNT.size + size]
+        self._lock_fd = os.open(_lock_path(name), os.O_CREAT | os.O_RDWR, 0o600)
+        with self.lock():
+            _REFCOUNT.pack_into(self.shm.buf, 0, _REFCOUNT.unpack_from(self.shm.buf, 0)[0] + 1)
+
+    @contextmanager
+    def lock(self):
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def close(self):
+        with self.lock():
+            remaining = _REFCOUNT.unpack_from(self.shm.buf, 0)[0] - 1
+            _REFCOUNT.pack_into(self.shm.buf, 0, max(remaining, 0))
+            if remaining <= 0:
+                # unlink() unregisters from the resource tracker, so register back first
+                resource_tracker.register(self.shm._name, "shared_memory")
+                self.shm.unlink()
+        self.data.release()
+        self.shm.close()
+        os.close(self._lock_fd)
+
+
+class WorkerState:
+    """Process-wide facts that must agree across workers: start time and leadership.
+
+    In single-process mode there is nothing to share: the start time is
+    the import time and this process is always the leader. With several
+    workers the start time lives in shared memory (set by whichever worker
+    comes first) and leadership is a non-blocking flock on a leader file;
+    the kernel releases it when the leader exits, so another worker takes
+    over on its next attempt. The data version is bumped on every stored
+    submission so any worker can tell whether its cached reads are current.
+    """
+
+    def __init__(self):
+        self.shared = multi_worker_enabled()
+        self._leader = not self.shared
+        self._leader_fd: Optional[int] = None
+        self.segment: Optional[SharedSegment] = None
+        self._data_version = 0
+        started = time.time()
+
+        if self.shared:
+            prefix = state_prefix()
+            self.segment = SharedSegment(f"{prefix}-state", _STATE.size)
+            with self.segment.lock():
+                existing, version = _STATE.unpack_from(self.segment.data, 0)
+                if existing:
+                    started = existing
+                else:
+                    _STATE.pack_into(self.segment.data, 0, started, version)
+            self._leader_fd = os.open(_lock_path(f"{prefix}-leader"), os.O_CREAT | os.O_RDWR, 0o600)
+            logger.info(f"🧩 Worker {os.getpid()} attached to shared state {prefix} ({WORKERS} workers)")
+
+        self.start_time = datetime.fromtimestamp(started, timezone.utc)
+
+    def is_leader(self) -> bool:
+        """True if this worker runs singleton jobs; tries to take over leadership if free"""
+        if self._leader:
+            return True
+        try:
+            fcntl.flock(self._leader_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        self._leader = True
+        logger.info(f"👑 Worker {os.getpid()} is now the leader for singleton background jobs")
+        return True
+
+    def data_version(self) -> int:
+        if self.segment is None:
+            return self._data_version
+        return _STATE.unpack_from(self.segment.data, 0)[1]
+
+    def bump_data_version(self):
+        if self.segment is None:
+            self._data_version += 1
+            return
+        with self.segment.lock():
+            started, version = _STATE.unpack_from(self.segment.data, 0)
+            _STATE.pack_into(self.segment.data, 0, started, version + 1)
+
+    def close(self):
+        if self._leader_fd is not None:
+            os.close(self._leader_fd)
+            self._leader_fd = None
+            self._leader = not self.shared
+        if self.segment is not None:
+            self.segment.close()
+            self.segment = None
+
+
+# Global worker state instance - initialized lazily
+worker_state = None
+
+def get_worker_state() -> WorkerState:
+    """Get or create the worker state instance"""
+    global worker_state
+    if worker_state is None:
+        worker_state = WorkerState()
+    return worker_state
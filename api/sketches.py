@@ -0,0 +1,321 @@
+"""
+Streaming sketches for Random Corp API
+Mergeable log-bucket quantile sketches for processing time, and the per-replica persistence shared by in-process summaries
+"""
+
+import os
+import math
+import json
+import time
+import socket
+import logging
+from typing import Dict, Iterable, List, Optional
+from database import get_db_manager
+
+logger = logging.getLogger(__name__)
+
+# Quantiles reported on /api/stats
+QUANTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99, "p999": 0.999}
+
+# Window name -> minutes (None = since the first recorded submission)
+WINDOWS = {"all_time": None, "last_5m": 5, "last_1h": 60}
+
+class QuantileSketch:
+    """Log-bucketed histogram with bounded relative error (DDSketch-style).
+
+    A value v lands in bucket ceil(log_gamma(v)), gamma = (1 + a) / (1 - a);
+    every quantile estimate is within a relative error a of the true
+    value. Two sketches with the same accuracy merge by adding bucket
+    counts, so per-minute, per-worker and per-replica sketches combine
+    exactly. Processing times span a decade or two, which keeps it to a
+    few hundred buckets.
+    """
+
+    __slots__ = ("relative_accuracy", "_gamma_log", "buckets", "zero_count", "count", "total", "min", "max")
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self._gamma_log = math.log((1 + relative_accuracy) / (1 - relative_accuracy))
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, count: int = 1):
+        if value <= 1e-9:
+            self.zero_count += count
+            value = 0.0
+        else:
+            index = math.ceil(math.log(value) / self._gamma_log)
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "QuantileSketch"):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                # Midpoint (in relative terms) of the bucket, clamped to what was observed
+                estimate = 2 * math.exp(index * self._gamma_log) / (1 + math.exp(self._gamma_log))
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {"a": self.relative_accuracy, "z": self.zero_count, "n": self.count, "s": self.total,
+                "lo": self.min if self.count else None, "hi": self.max if self.count else None,
+                "b": {str(index): count for index, count in self.buckets.items()}}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "QuantileSketch":
+        sketch = cls(data["a"])
+        sketch.buckets = {int(index): count for index, count in data["b"].items()}
+        sketch.zero_count = data["z"]
+        sketch.count = data["n"]
+        sketch.total = data["s"]
+        if sketch.count:
+            sketch.min, sketch.max = data["lo"], data["hi"]
+        return sketch
+
+
+def merged(sketches: Iterable[QuantileSketch], relative_accuracy: float) -> QuantileSketch:
+    result = QuantileSketch(relative_accuracy)
+    for sketch in sketches:
+        result.merge(sketch)
+    return result
+
+
+class WindowedSketch:
+    """An all-time sketch plus one sketch per wall-clock minute for the last hour"""
+
+    def __init__(self, relative_accuracy: float = 0.01, retention_minutes: int = 60):
+        self.relative_accuracy = relative_accuracy
+        self.retention_minutes = retention_minutes
+        self.total = QuantileSketch(relative_accuracy)
+        self.minutes: Dict[int, QuantileSketch] = {}
+
+    def add(self, value: float, count: int = 1, now: Optional[float] = None):
+        minute = int((now or time.time()) // 60)
+        sketch = self.minutes.get(minute)
+        if sketch is None:
+            sketch = self.minutes[minute] = QuantileSketch(self.relative_accuracy)
+            self.prune(minute)
+        sketch.add(value, count)
+        self.total.add(value, count)
+
+    def prune(self, current_minute: int):
+        for minute in [minute for minute in self.minutes if minute <= current_minute - self.retention_minutes]:
+            del self.minutes[minute]
+
+    def merge(self, other: "WindowedSketch"):
+        self.total.merge(other.total)
+        for minute, sketch in other.minutes.items():
+            if minute in self.minutes:
+                self.minutes[minute].merge(sketch)
+            else:
+                self.minutes[minute] = merged([sketch], self.relative_accuracy)
+
+    def window(self, minutes: Optional[int], now: Optional[float] = None) -> QuantileSketch:
+        """Sketch for the last `minutes` minutes (the current, partial minute included)"""
+        if minutes is None:
+            return self.total
+        current = int((now or time.time()) // 60)
+        return merged((sketch for minute, sketch in self.minutes.items() if minute > current - minutes),
+                      self.relative_accuracy)
+
+    def to_dict(self) -> Dict:
+        return {"total": self.total.to_dict(),
+                "minutes": {str(minute): sketch.to_dict() for minute, sketch in self.minutes.items()}}
+
+    @classmethod
+    def from_dict(cls, data: Dict, relative_accuracy: float = 0.01) -> "WindowedSketch":
+        windowed = cls(relative_accuracy)
+        windowed.total = QuantileSketch.from_dict(data["total"])
+        windowed.minutes = {int(minute): QuantileSketch.from_dict(sketch)
+                            for minute, sketch in data.get("minutes", {}).items()}
+        return windowed
+
+
+class ReplicatedSummary:
+    """A mergeable summary kept per process and combined across workers and replicas.
+
+    Recording is an in-process update on the submit path. sync(), a
+    scheduled job on every worker, writes this process's summary to its
+    own app_statistics row (`<stat_prefix><host>:<pid>`) and reads
+    everyone else's into a cached remote view, so reads merge two
+    in-memory summaries without querying. The first sync adopts the row
+    left by a previous run under the same name (pod restarts keep their
+    history). compact(), a cluster-wide job, folds rows not updated for
+    stale_after_seconds into an archive row inside one locked
+    transaction, so totals survive rollouts without rows piling up.
+    Without a database the figures are this process's only.
+
+    Subclasses provide empty(), decode() and encode(); the summaries they
+    return need an in-place merge(other).
+    """
+
+    stat_prefix = ""
+    description = "summary"
+    stale_after_seconds = 3600
+
+    def __init__(self, persist_interval: float = 30.0):
+        self.persist_interval = persist_interval
+        self.process_name = f"{self.stat_prefix}{os.getenv('HOSTNAME') or socket.gethostname()}:{os.getpid()}"
+        self.archive_name = self.stat_prefix + "archive"
+        self.local = self.empty()
+        self.remote = self.empty()
+        self._adopted = False
+
+    def empty(self):
+        raise NotImplementedError
+
+    def decode(self, value: str):
+        raise NotImplementedError
+
+    def encode(self, summary) -> str:
+        raise NotImplementedError
+
+    def expire(self, summary):
+        """Drop parts of a summary that have aged out (called on every sync)"""
+
+    def archived(self, summary):
+        """The part of a departed process's summary kept in the archive row"""
+        return summary
+
+    def combined(self):
+        """Remote view merged with this process's summary"""
+        summary = self.empty()
+        summary.merge(self.remote)
+        summary.merge(self.local)
+        return summary
+
+    def _fold(self, archive_value: Optional[str], stale_values: List[str]) -> str:
+        archive = self.decode(archive_value) if archive_value else self.empty()
+        for value in stale_values:
+            archive.merge(self.archived(self.decode(value)))
+        return self.encode(archive)
+
+    def _database(self):
+        db_manager = get_db_manager()
+        return db_manager if os.getenv('DB_HOST') and db_manager.pool else None
+
+    async def sync(self) -> bool:
+        """Persist this process's row and refresh the merged view of everyone else's"""
+        db_manager = self._database()
+        if db_manager is None:
+            return False
+        rows = await db_manager.get_statistics_by_prefix(self.stat_prefix)
+        if not self._adopted:
+            previous = rows.get(self.process_name)
+            if previous:
+                self.local.merge(self.decode(previous))
+                logger.info(f"📐 Adopted {self.description} from a previous run of {self.process_name}")
+            self._adopted = True
+
+        remote = self.empty()
+        for name, value in rows.items():
+            if name != self.process_name and value:
+                remote.merge(self.decode(value))
+        self.expire(remote)
+        self.expire(self.local)
+        self.remote = remote
+
+        await db_manager.update_statistics({self.process_name: self.encode(self.local)})
+        return True
+
+    async def compact(self) -> int:
+        """Fold the rows of processes gone for stale_after_seconds into the archive row"""
+        db_manager = self._database()
+        if db_manager is None:
+            return 0
+        folded = await db_manager.fold_stale_statistics(
+            self.stat_prefix, self.archive_name,
+            self.stale_after_seconds + 2 * int(self.persist_interval), self._fold)
+        if folded:
+            logger.info(f"📐 Folded {folded} stale {self.description} rows into the archive")
+        return folded
+
+
+class ProcessingTimeSketches(ReplicatedSummary):
+    """Processing time percentiles across every worker and replica (all time, last 5 minutes, last hour).
+
+    Rows of processes gone for over an hour only carry their all-time
+    sketch into the archive; their minute sketches have expired anyway.
+    """
+
+    stat_prefix = "processing_time_sketch:"
+    description = "processing time sketches"
+
+    def __init__(self, persist_interval: float = 30.0, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        super().__init__(persist_interval)
+        self._summary: Optional[Dict] = None
+        self._summary_second = -1
+
+    def empty(self) -> WindowedSketch:
+        return WindowedSketch(self.relative_accuracy)
+
+    def decode(self, value: str) -> WindowedSketch:
+        return WindowedSketch.from_dict(json.loads(value), self.relative_accuracy)
+
+    def encode(self, summary: WindowedSketch) -> str:
+        return json.dumps(summary.to_dict(), separators=(",", ":"))
+
+    def expire(self, summary: WindowedSketch):
+        summary.prune(int(time.time() // 60))
+
+    def archived(self, summary: WindowedSketch) -> WindowedSketch:
+        archive = self.empty()
+        archive.total = summary.total
+        return archive
+
+    def record(self, processing_time: float, count: int = 1):
+        self.local.add(processing_time, count)
+
+    def summary(self) -> Dict[str, Dict]:
+        """count and p50/p90/p99/p999 (seconds) per window, recomputed at most once a second"""
+        now = time.time()
+        if self._summary is not None and int(now) == self._summary_second:
+            return self._summary
+        combined = self.combined()
+        summary = {}
+        for window, minutes in WINDOWS.items():
+            sketch = combined.window(minutes, now)
+            summary[window] = {"count": sketch.count,
+                               **{name: sketch.quantile(q) for name, q in QUANTILES.items()}}
+        self._summary, self._summary_second = summary, int(now)
+        return summary
+
+
+# Global sketches instance - initialized lazily
+processing_time_sketches = None
+
+def get_processing_time_sketches() -> ProcessingTimeSketches:
+    """Get or create the processing time sketches instance"""
+    global processing_time_sketches
+    if processing_time_sketches is None:
+        processing_time_sketches = ProcessingTimeSketches(
+            persist_interval=float(os.getenv('SKETCH_PERSIST_INTERVAL_SECONDS', '30')),
+            relative_accuracy=float(os.getenv('SKETCH_RELATIVE_ACCURACY', '0.01'))
+        )
+    return processing_time_sketches
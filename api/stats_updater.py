@@ -0,0 +1,116 @@
+"""
+Coalescing statistics updater for Random Corp API
+Submissions mark stats dirty; a single task flushes them at most once per interval
+"""
+
+import os
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+from database import get_db_manager
+
+logger = logging.getLogger(__name__)
+
+
+class CoalescingStatsUpdater:
+    """Debounces per-submission statistics updates into one statement per interval.
+
+    mark_dirty() is O(1) and never touches the database. The flush task wakes
+    when something is pending, writes the accumulated delta with a single
+    MERGE and then waits out the rest of the interval, so statistics cost
+    one pool connection per interval regardless of submission volume.
+    """
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self._pending = 0
+        self._last_submission_at: Optional[str] = None
+        self._dirty = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.flushes = 0
+        self.flush_failures = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def mark_dirty(self, count: int = 1):
+        """Record that count submissions were processed"""
+        self._pending += count
+        self._last_submission_at = datetime.now(timezone.utc).isoformat()
+        self._dirty.set()
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="stats-updater")
+            logger.info(f"📊 Stats updater started (flush interval {self.interval * 1000:.0f}ms)")
+
+    async def stop(self):
+        """Stop the flush task and write anything still pending"""
+        if self._task is None:
+            return
+        # Let the task finish a flush in progress instead of cancelling it mid-write
+        self._stopping.set()
+        self._dirty.set()
+        await self._task
+        self._task = None
+        await self.flush()
+
+    async def flush(self) -> bool:
+        """Write the accumulated delta; on failure it is kept for the next flush"""
+        if not self._pending:
+            return True
+
+        if not os.getenv('DB_HOST'):
+            # Demo mode: there is nowhere to write, so don't let the delta grow forever
+            self._pending = 0
+            return False
+        db_manager = get_db_manager()
+        if not db_manager.pool:
+            return False
+
+        delta, last_submission_at = self._pending, self._last_submission_at
+        self._pending = 0
+        try:
+            await db_manager.increment_statistics(
+                counters={"submissions_processed": delta},
+                values={"last_submission_at": last_submission_at}
+            )
+            self.flushes += 1
+            logger.debug(f"📊 Flushed stats for {delta} submissions")
+            return True
+        except Exception as e:
+            self._pending += delta
+            self.flush_failures += 1
+            logger.error(f"❌ Failed to flush stats: {str(e)}")
+            return False
+        except asyncio.CancelledError:
+            # Cancelled mid-write: keep the delta rather than lose it
+            self._pending += delta
+            raise
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            await self._dirty.wait()
+            self._dirty.clear()
+            await self.flush()
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+# Global stats updater instance - initialized lazily
+stats_updater = None
+
+def get_stats_updater() -> CoalescingStatsUpdater:
+    """Get or create the stats updater instance"""
+    global stats_updater
+    if stats_updater is None:
+        stats_updater = CoalescingStatsUpdater(
+            interval=int(os.getenv('STATS_FLUSH_INTERVAL_MS', '1000')) / 1000
+        )
+    return stats_updater
@@ -0,0 +1,293 @@
+"""
+Submission log writer for Random Corp API
+A single background task owns the log file and drains an asyncio queue in batches
+"""
+
+import os
+import time
+import errno
+import json
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from log_segments import SegmentWriter
+from shared_state import per_worker_path
+
+logger = logging.getLogger(__name__)
+
+
+def _fsync(fileno: int):
+    """fsync, ignoring files that cannot be synced (SUBMISSION_LOG_PATH=/dev/null, pipes)"""
+    try:
+        os.fsync(fileno)
+    except OSError as e:
+        if e.errno != errno.EINVAL:
+            raise
+
+
+class SubmissionLogWriter:
+    """Buffered, rotating writer for submissions.log.
+
+    Request handlers call write(), which only enqueues. The writer task keeps
+    the file open, writes queued lines in batches, flushes and fsyncs on
+    configurable intervals and rotates the file by size (in bytes) and age.
+    All file I/O (writes, flushes, fsyncs, rotation) runs in a worker thread
+    so a slow disk never stalls the event loop. When the
+    queue is full new lines are dropped and counted rather than blocking.
+
+    log_format="segment" writes compressed, indexed segments (see
+    log_segments.py) into segment_dir instead of free-form text lines;
+    backup_count then limits how many closed segments are kept.
+    """
+
+    def __init__(self, path: str = "submissions.log", queue_size: int = 10000,
+                 batch_size: int = 256, flush_interval: float = 0.5,
+                 fsync_interval: float = 5.0, max_bytes: int = 50 * 1024 * 1024,
+                 rotate_interval: float = 24 * 3600, backup_count: int = 5,
+                 log_format: str = "text", segment_dir: str = "submission-logs",
+                 segment_codec: Optional[str] = None, segment_block_bytes: int = 256 * 1024):
+        if log_format not in ("text", "segment"):
+            raise ValueError(f"Unknown submission log format: {log_format}")
+        self.path = path
+        self.log_format = log_format
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+
+        self._queue: "asyncio.Queue[Tuple[float, Dict]]" = asyncio.Queue(maxsize=queue_size)
+        self._task: Optional[asyncio.Task] = None
+        self._file = None
+        self._file_size = 0
+        self._opened_at = 0.0
+        self._last_flush = 0.0
+        self._last_fsync = 0.0
+        self._dirty = False
+        self._stopping = False
+        self._segments: Optional[SegmentWriter] = None
+        if log_format == "segment":
+            self._segments = SegmentWriter(
+                segment_dir,
+                codec=segment_codec,
+                block_bytes=segment_block_bytes,
+                segment_max_bytes=max_bytes,
+                segment_max_age=rotate_interval,
+                backup_count=backup_count
+            )
+
+        self.lines_written = 0
+        self.lines_dropped = 0
+        self.rotations = 0
+        self._dropped_reported = 0
+
+    def write(self, entry: Dict) -> bool:
+        """Queue a log entry without blocking; returns False if it was dropped"""
+        try:
+            self._queue.put_nowait((time.time(), entry))
+            return True
+        except asyncio.QueueFull:
+            self.lines_dropped += 1
+            return False
+
+    def stats(self) -> Dict:
+        """Writer counters for health and metrics endpoints"""
+        stats = {
+            "format": self.log_format,
+            "path": self.path,
+            "lines_written": self.lines_written,
+            "lines_dropped": self.lines_dropped,
+            "rotations": self.rotations,
+            "queue_depth": self._queue.qsize()
+        }
+        if self._segments is not None:
+            stats.update({
+                "path": self._segments.segment_path or self._segments.directory,
+                "blocks_written": self._segments.blocks_written,
+                "bytes_raw": self._segments.bytes_raw,
+                "bytes_compressed": self._segments.bytes_compressed,
+                "segments_deleted": self._segments.segments_deleted
+            })
+        return stats
+
+    async def start(self):
+        """Open the log file and start the writer task"""
+        if self._task is not None:
+            return
+        await asyncio.to_thread(self._open)
+        self._task = asyncio.create_task(self._run(), name="submission-log-writer")
+        logger.info(f"📝 Submission log writer started: {self.path}")
+
+    async def stop(self):
+        """Stop the writer task after draining queued entries to disk"""
+        if self._task is None:
+            return
+        # Let the task finish its current cycle rather than cancelling it in the
+        # middle of an offloaded block write
+        self._stopping = True
+        await self._task
+        self._task = None
+
+        # Drain whatever was queued after the task stopped
+        while not self._queue.empty():
+            data = self._write_batch(self._take_batch())
+            if data:
+                await asyncio.to_thread(self._write_text, data, False, False)
+        await asyncio.to_thread(self._close)
+        logger.info(f"📝 Submission log writer stopped ({self.lines_written} lines written, "
+                    f"{self.lines_dropped} dropped)")
+
+    def _open(self):
+        if self._segments is not None:
+            self._opened_at = self._last_flush = self._last_fsync = time.monotonic()
+            return
+        self._file = open(self.path, "ab")
+        self._file_size = self._file.tell()
+        self._opened_at = time.monotonic()
+        self._last_flush = self._last_fsync = self._opened_at
+
+    def _close(self):
+        if self._segments is not None:
+            self._segments.close()
+            return
+        if self._file is None:
+            return
+        file, self._file = self._file, None
+        file.flush()
+        _fsync(file.fileno())
+        file.close()
+
+    def _take_batch(self) -> List[Tuple[float, Dict]]:
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    def _write_batch(self, batch: List[Tuple[float, Dict]]) -> Optional[bytes]:
+        """Hand a batch to the segment writer, or encode it as text lines for _write_text"""
+        if not batch:
+            return None
+        self.lines_written += len(batch)
+        self._dirty = True
+        if self._segments is not None:
+            for timestamp, entry in batch:
+                self._segments.append(timestamp, entry)
+            return None
+        return "".join(f"{datetime.fromtimestamp(timestamp).isoformat()} - {json.dumps(entry)}\n"
+                       for timestamp, entry in batch).encode("utf-8")
+
+    def _write_text(self, data: Optional[bytes], flush: bool, fsync: bool):
+        """Runs in a worker thread; the size counts encoded bytes, as max_bytes does"""
+        if data:
+            self._file.write(data)
+            self._file_size += len(data)
+        if flush:
+            self._file.flush()
+        if fsync:
+            _fsync(self._file.fileno())
+
+    def _should_rotate(self, now: float) -> bool:
+        if self._segments is not None:
+            # Segments roll over on their own when a block is written
+            return False
+        if self.max_bytes and self._file_size >= self.max_bytes:
+            return True
+        return bool(self.rotate_interval) and self._file_size > 0 and now - self._opened_at >= self.rotate_interval
+
+    async def _rotate(self):
+        """Shift submissions.log -> submissions.log.1 -> ... and reopen"""
+        await asyncio.to_thread(self._reopen)
+        self.rotations += 1
+        logger.info(f"🔄 Rotated submission log: {self.path}")
+
+    def _reopen(self):
+        self._close()
+        if self.backup_count > 0:
+            for index in range(self.backup_count - 1, 0, -1):
+                source = f"{self.path}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{index + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                try:
+                    first = await asyncio.wait_for(self._queue.get(), timeout=self.flush_interval)
+                    batch = [first] + self._take_batch()
+                except asyncio.TimeoutError:
+                    batch = []
+
+                data = self._write_batch(batch)
+                now = time.monotonic()
+
+                if self._segments is not None:
+                    if self._segments.pending_bytes >= self._segments.block_bytes or (
+                            self._dirty and now - self._last_flush >= self.flush_interval):
+                        # Compression and the block write run off the event loop
+                        await asyncio.to_thread(self._segments.flush_block)
+                        self._last_flush = now
+                        self._dirty = False
+
+                        if self.fsync_interval and now - self._last_fsync >= self.fsync_interval:
+                            await asyncio.to_thread(self._segments.fsync)
+                            self._last_fsync = now
+
+                else:
+                    flush = self._dirty and now - self._last_flush >= self.flush_interval
+                    fsync = flush and bool(self.fsync_interval) and now - self._last_fsync >= self.fsync_interval
+                    if data or flush:
+                        # One thread hop for the write and any flush/fsync due with it
+                        await asyncio.to_thread(self._write_text, data, flush, fsync)
+                    if flush:
+                        self._last_flush = now
+                        self._dirty = False
+                    if fsync:
+                        self._last_fsync = now
+
+                if self._should_rotate(now):
+                    await self._rotate()
+
+                if self.lines_dropped > self._dropped_reported:
+                    logger.warning(f"⚠️ Submission log queue full, dropped "
+                                   f"{self.lines_dropped - self._dropped_reported} lines "
+                                   f"({self.lines_dropped} total)")
+                    self._dropped_reported = self.lines_dropped
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Submission log writer error: {str(e)}")
+                await asyncio.sleep(self.flush_interval)
+
+
+# Global submission log writer instance - initialized lazily
+submission_log = None
+
+def get_submission_log() -> SubmissionLogWriter:
+    """Get or create the submission log writer instance"""
+    global submission_log
+    if submission_log is None:
+        submission_log = SubmissionLogWriter(
+            path=per_worker_path(os.getenv('SUBMISSION_LOG_PATH', 'submissions.log')),
+            queue_size=int(os.getenv('SUBMISSION_LOG_QUEUE_SIZE', '10000')),
+            batch_size=int(os.getenv('SUBMISSION_LOG_BATCH_SIZE', '256')),
+            flush_interval=int(os.getenv('SUBMISSION_LOG_FLUSH_INTERVAL_MS', '500')) / 1000,
+            fsync_interval=int(os.getenv('SUBMISSION_LOG_FSYNC_INTERVAL_MS', '5000')) / 1000,
+            max_bytes=int(os.getenv('SUBMISSION_LOG_MAX_BYTES', str(50 * 1024 * 1024))),
+            rotate_interval=int(os.getenv('SUBMISSION_LOG_ROTATE_SECONDS', str(24 * 3600))),
+            backup_count=int(os.getenv('SUBMISSION_LOG_BACKUPS', '5')),
+            log_format=os.getenv('SUBMISSION_LOG_FORMAT', 'text'),
+            segment_dir=per_worker_path(os.getenv('SUBMISSION_LOG_SEGMENT_DIR', 'submission-logs')),
+            segment_codec=os.getenv('SUBMISSION_LOG_CODEC') or None,
+            segment_block_bytes=int(os.getenv('SUBMISSION_LOG_BLOCK_BYTES', str(256 * 1024)))
+        )
+    return submission_log
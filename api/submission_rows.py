@@ -0,0 +1,131 @@
+"""
+Submission rows for Random Corp API
+Compact submission records and a column-ordered serializer that writes listing JSON straight from rows
+"""
+
+import math
+from datetime import datetime, timezone
+from json.encoder import encode_basestring_ascii
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+# Column order shared by every submissions SELECT, SubmissionRecord and the serializer
+SUBMISSION_COLUMNS = "submission_id, first_name, last_name, message, batch_id, processing_time, created_at"
+
+
+class SubmissionRecord(NamedTuple):
+    """One submissions row; pyodbc rows convert with SubmissionRecord._make(row)"""
+    submission_id: str
+    first_name: str
+    last_name: str
+    message: Optional[str]
+    batch_id: Optional[str]
+    processing_time: Optional[float]
+    created_at: Optional[datetime]
+
+    def to_dict(self) -> Dict:
+        """Dict form used by the JSON listing (processing_time defaults to 0.0, created_at as ISO 8601)"""
+        return {
+            'submission_id': self.submission_id,
+            'first_name': self.first_name,
+            'last_name': self.last_name,
+            'message': self.message,
+            'batch_id': self.batch_id,
+            'processing_time': float(self.processing_time) if self.processing_time else 0.0,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class SubmissionFilters(NamedTuple):
+    """Optional listing filters; created_from is inclusive, created_to exclusive (both UTC)"""
+    batch_id: Optional[str] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    has_message: Optional[bool] = None
+
+    def active(self) -> bool:
+        return any(value is not None for value in self)
+
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Aware UTC datetime; naive values are taken to be UTC already"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_FIELDS = SubmissionRecord._fields
+
+_ROW_TEMPLATE = (
+    '{"submission_id":%s,"first_name":%s,"last_name":%s,"message":%s,'
+    '"batch_id":%s,"processing_time":%s,"created_at":%s}'
+)
+
+
+def _float_json(value) -> str:
+    """float repr as json.dumps writes it, but null for inf/nan (as orjson does) instead of invalid JSON"""
+    value = float(value) if value else 0.0
+    return float.__repr__(value) if math.isfinite(value) else "null"
+
+
+def _row_dicts(rows: Iterable[Sequence]) -> List[Dict]:
+    """Column-ordered dicts for orjson, which encodes the datetimes natively"""
+    dicts = [dict(zip(_FIELDS, row)) for row in rows]
+    for row in dicts:
+        if not row['processing_time']:
+            row['processing_time'] = 0.0
+    return dicts
+
+
+def rows_to_json(rows: Iterable[Sequence]) -> str:
+    """JSON array of submission objects, the same as json.dumps([record.to_dict(), ...], separators=(",", ":")).
+
+    Stdlib path: formats each column-ordered row (pyodbc row or
+    SubmissionRecord) straight into a template with the C string escaper
+    json.dumps itself uses, skipping the intermediate dict. The one
+    difference from json.dumps is a non-finite processing_time, written
+    as null (like the orjson path) rather than as Infinity/NaN.
+    """
+    encode = encode_basestring_ascii
+    return "[" + ",".join([
+        _ROW_TEMPLATE % (
+            encode(submission_id), encode(first_name), encode(last_name),
+            encode(message) if message is not None else "null",
+            encode(batch_id) if batch_id is not None else "null",
+            _float_json(processing_time),
+            '"' + created_at.isoformat() + '"' if created_at else "null"
+        )
+        for submission_id, first_name, last_name, message, batch_id, processing_time, created_at in rows
+    ]) + "]"
+
+
+def page_json(rows: Sequence[Sequence], total: int, limit: int, offset: int) -> bytes:
+    """Complete /api/submissions response body, skipping the framework's generic encoding pass"""
+    has_more = offset + len(rows) < total
+    if orjson is not None:
+        return orjson.dumps({
+            "submissions": _row_dicts(rows), "count": len(rows), "total": total,
+            "limit": limit, "offset": offset, "has_more": has_more
+        })
+    return (
+        '{"submissions":%s,"count":%d,"total":%d,"limit":%d,"offset":%d,"has_more":%s}' % (
+            rows_to_json(rows), len(rows), total, limit, offset, "true" if has_more else "false"
+        )
+    ).encode("ascii")
+
+
+def search_json(rows: Sequence[Sequence], query: str, limit: int) -> bytes:
+    """Complete /api/submissions/search response body"""
+    if orjson is not None:
+        return orjson.dumps({"submissions": _row_dicts(rows), "count": len(rows), "query": query, "limit": limit})
+    return (
+        '{"submissions":%s,"count":%d,"query":%s,"limit":%d}' % (
+            rows_to_json(rows), len(rows), encode_basestring_ascii(query), limit
+        )
+    ).encode("ascii")
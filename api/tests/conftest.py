@@ -0,0 +1,9 @@
+"""
+Test configuration for Random Corp API
+Makes the flat api/ modules importable when pytest runs from the repository root
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
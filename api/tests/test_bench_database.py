@@ -0,0 +1,79 @@
+"""
+Database micro-benchmark tests for Random Corp API
+The fake ODBC pool, every benchmark case against it and the baseline regression check
+"""
+
+import json
+import os
+import asyncio
+from benchmarks import bench_database, fake_odbc
+from benchmarks.bench_database import build_cases, compare
+
+BASELINE = os.path.join(os.path.dirname(bench_database.__file__), "baselines", "bench_database.json")
+
+
+def results(**cases):
+    return {"results": [{"case": name, "cpu_us": cpu, "peak_bytes": peak} for name, (cpu, peak) in cases.items()]}
+
+
+def test_make_rows_is_deterministic_and_shaped_like_the_selects():
+    rows = fake_odbc.make_rows(30, seed=1)
+    assert [row[:5] for row in rows] == [row[:5] for row in fake_odbc.make_rows(30, seed=1)]
+    assert all(len(row) == 7 for row in rows)
+    assert rows[0][1:3] == ("First0", "Last0")
+    assert [row[4] is None for row in rows[:4]] == [False, True, True, False]
+    assert rows[0][6] > rows[1][6]
+
+
+def test_fake_pool_honours_top_and_fetch_next():
+    async def scenario():
+        pool = fake_odbc.FakePool(rows=fake_odbc.make_rows(20), maxsize=2)
+        conn = await pool.acquire()
+        assert pool.freesize == 1
+        async with conn.cursor() as cursor:
+            await cursor.execute("SELECT TOP 5 * FROM submissions")
+            top = await cursor.fetchall()
+            await cursor.execute("SELECT * FROM submissions ORDER BY created_at DESC "
+                                 "OFFSET 0 ROWS FETCH NEXT 12 ROWS ONLY")
+            page = await cursor.fetchall()
+            await cursor.execute("SELECT COUNT(*) FROM submissions")
+            count = await cursor.fetchone()
+        await pool.release(conn)
+        return pool, len(top), len(page), count
+
+    pool, top, page, count = asyncio.run(scenario())
+    assert (top, page, count) == (5, 12, (pool.total_rows,))
+    assert pool.statements == 3
+    assert pool.freesize == 2
+
+
+def test_every_case_runs_against_the_fake_pool():
+    async def scenario():
+        pool = fake_odbc.FakePool(rows=fake_odbc.make_rows(max(bench_database.PAGE_SIZES)))
+        manager = fake_odbc.fake_manager(pool)
+        outcomes = {name: await factory() for name, factory in build_cases(manager).items()}
+        return pool, outcomes
+
+    pool, outcomes = asyncio.run(scenario())
+    assert pool.statements > 0
+    for size in bench_database.PAGE_SIZES:
+        assert len(outcomes[f"get_recent_submissions[{size}]"]) == size
+        assert len(json.loads(outcomes[f"submissions_page_json[{size}]"])["submissions"]) == size
+
+
+def test_tracked_baseline_covers_every_case():
+    with open(BASELINE) as f:
+        baseline = json.load(f)
+    pool = fake_odbc.FakePool(rows=[])
+    assert {result["case"] for result in baseline["results"]} == set(build_cases(fake_odbc.fake_manager(pool)))
+
+
+def test_compare_flags_cpu_and_memory_growth_beyond_the_threshold():
+    baseline = results(save_submission=(20.0, 4000), get_statistics=(30.0, 3000), is_database_available=(0.0, 0))
+    current = results(save_submission=(24.0, 4400), get_statistics=(30.0, 4500), is_database_available=(5.0, 100),
+                      new_case=(99.0, 99999))
+    assert compare(baseline, current, threshold=25) == ["get_statistics peak_bytes: 3000 -> 4500 (+50.0%)"]
+    assert compare(baseline, current, threshold=10) == [
+        "save_submission cpu_us: 20.0 -> 24.0 (+20.0%)",
+        "get_statistics peak_bytes: 3000 -> 4500 (+50.0%)",
+    ]
@@ -0,0 +1,126 @@
+"""
+Live event broadcast tests for Random Corp API
+Fan-out, Last-Event-ID replay and resets, slow subscriber eviction, stats diffs and shutdown
+"""
+
+import asyncio
+import json
+from broadcast import BroadcastHub
+
+
+def parse(frame: bytes):
+    """(id, event, data) of one SSE frame"""
+    fields = dict(line.split(": ", 1) for line in frame.decode().strip().split("\n"))
+    return fields["id"], fields["event"], json.loads(fields["data"])
+
+
+def events(subscriber):
+    return [parse(frame) for frame in subscriber.drain()]
+
+
+def test_publish_fans_out_one_encoded_frame():
+    hub = BroadcastHub()
+    first, second = hub.subscribe(), hub.subscribe()
+    event_id = hub.publish("submission", {"submission_id": "sub_1"})
+    assert event_id == hub.last_event_id == f"{hub.epoch}-1"
+    assert events(first) == events(second) == [(event_id, "submission", {"submission_id": "sub_1"})]
+    assert (hub.events_published, len(hub)) == (1, 2)
+
+    hub.unsubscribe(first)
+    hub.publish("submission", {"submission_id": "sub_2"})
+    assert first.drain() == []
+    assert len(second.drain()) == 1
+
+
+def test_reconnect_replays_only_what_was_missed():
+    hub = BroadcastHub(replay_size=10)
+    ids = [hub.publish("submission", {"n": n}) for n in range(5)]
+    subscriber = hub.subscribe(last_event_id=ids[1])
+    assert [data["n"] for _, _, data in events(subscriber)] == [2, 3, 4]
+
+    up_to_date = hub.subscribe(last_event_id=ids[-1])
+    assert up_to_date.drain() == []
+
+
+def test_unknown_or_expired_ids_get_a_reset():
+    hub = BroadcastHub(replay_size=3)
+    ids = [hub.publish("submission", {"n": n}) for n in range(6)]
+    for last_event_id in ["someotherepoch-2", ids[0], f"{hub.epoch}-99", f"{hub.epoch}-x", "garbage"]:
+        subscriber = hub.subscribe(last_event_id=last_event_id)
+        assert events(subscriber) == [(hub.last_event_id, "reset", {})], last_event_id
+
+    # The oldest id still in the ring is resumable
+    assert [data["n"] for _, _, data in events(hub.subscribe(last_event_id=ids[2]))] == [3, 4, 5]
+
+
+def test_replay_larger_than_the_buffer_resets():
+    hub = BroadcastHub(replay_size=10, subscriber_buffer=2)
+    first = hub.publish("submission", {"n": 0})
+    for n in range(1, 4):
+        hub.publish("submission", {"n": n})
+    assert [event for _, event, _ in events(hub.subscribe(last_event_id=first))] == ["reset"]
+
+
+def test_slow_subscribers_are_evicted():
+    hub = BroadcastHub(subscriber_buffer=2)
+    slow, fast = hub.subscribe(), hub.subscribe()
+    for n in range(3):
+        hub.publish("submission", {"n": n})
+        fast.drain()
+    assert slow.evicted and slow.closed
+    assert not fast.evicted
+    assert (len(hub), hub.evictions) == (1, 1)
+    assert [data["n"] for _, _, data in events(slow)] == [0, 1]
+
+
+def test_subscriber_limit():
+    hub = BroadcastHub(max_subscribers=1)
+    assert hub.subscribe() is not None
+    assert hub.subscribe() is None
+
+
+def test_wait_wakes_on_publish_and_times_out():
+    async def scenario():
+        hub = BroadcastHub()
+        subscriber = hub.subscribe()
+        assert await subscriber.wait(0.01) is False
+        waiter = asyncio.create_task(subscriber.wait(1))
+        await asyncio.sleep(0)
+        hub.publish("submission", {})
+        assert await waiter is True
+    asyncio.run(scenario())
+
+
+def test_stats_events_carry_only_changed_fields():
+    async def scenario():
+        snapshots = iter([
+            {"total_submissions": 1, "uptime_seconds": 1.0},
+            {"total_submissions": 1, "uptime_seconds": 2.0},
+            {"total_submissions": 2, "uptime_seconds": 3.0},
+        ])
+
+        async def provider():
+            return next(snapshots, {"total_submissions": 2, "uptime_seconds": 4.0})
+
+        hub = BroadcastHub(stats_interval=0.01)
+        hub.set_stats_provider(provider)
+        subscriber = hub.subscribe()
+        await asyncio.sleep(0.05)
+        hub.close()
+        # The first poll is the baseline; uptime alone is not an event
+        assert [(event, data) for _, event, data in events(subscriber)] == \
+            [("stats", {"total_submissions": 2, "uptime_seconds": 3.0})]
+    asyncio.run(scenario())
+
+
+def test_close_ends_streams_and_refuses_new_ones():
+    async def scenario():
+        hub = BroadcastHub()
+        subscriber = hub.subscribe()
+        hub.close()
+        assert subscriber.closed and not subscriber.evicted
+        assert await subscriber.wait(1) is True
+        assert hub.subscribe() is None
+        assert len(hub) == 0
+        hub.close()
+    asyncio.run(scenario())
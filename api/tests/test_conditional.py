@@ -0,0 +1,134 @@
+"""
+Conditional GET tests for Random Corp API
+If-None-Match weak comparison and when the data watermark ETag changes
+"""
+
+import os
+import pytest
+from fastapi.testclient import TestClient
+import conditional
+import shared_state
+from conditional import cache_headers, current_etag, etag_matches, mark_data_changed, not_modified
+from shared_state import WorkerState
+
+ETAG = 'W/"stats-abc-3-7"'
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    """The app in demo mode (no DB_HOST), started once for the endpoint tests"""
+    with pytest.MonkeyPatch.context() as patch:
+        patch.delenv("DB_HOST", raising=False)
+        patch.setenv("SUBMISSION_LOG_PATH", os.devnull)
+        patch.setenv("TRACE_FILE", str(tmp_path_factory.mktemp("traces") / "traces.json"))
+        patch.setenv("TRACE_SAMPLE_RATE", "0")
+        import main
+        with TestClient(main.app) as test_client:
+            yield test_client
+
+
+@pytest.fixture(autouse=True)
+def worker_state(monkeypatch):
+    """A fresh single-process state so data versions start at zero"""
+    state = WorkerState()
+    monkeypatch.setattr(shared_state, "worker_state", state)
+    return state
+
+
+@pytest.mark.parametrize("header", [
+    ETAG,
+    '"stats-abc-3-7"',
+    f'"other", {ETAG}',
+    f'W/"other",W/"stats-abc-3-7" ',
+    "*",
+    " * ",
+])
+def test_matching_headers(header):
+    assert etag_matches(header, ETAG)
+
+
+@pytest.mark.parametrize("header", [
+    None,
+    "",
+    'W/"stats-abc-3-8"',
+    'W/"stats-abc-3"',
+    '"stats-abc-3-7-1"',
+    "stats-abc-3-7",
+])
+def test_non_matching_headers(header):
+    assert not etag_matches(header, ETAG)
+
+
+def test_strong_etag_matches_its_weak_form():
+    assert etag_matches('W/"x"', '"x"')
+
+
+def test_etag_is_stable_until_data_changes(monkeypatch):
+    monkeypatch.setattr(conditional, "MAX_STALENESS_SECONDS", 0)
+    etag = current_etag("stats")
+    assert etag.startswith('W/"stats-') and etag.endswith('-0-0"')
+    assert current_etag("stats") == etag
+    assert current_etag("search") != etag
+
+    mark_data_changed()
+    changed = current_etag("stats")
+    assert changed != etag
+    assert not etag_matches(etag, changed)
+    assert changed.endswith('-1-0"')
+
+
+def test_etag_rolls_over_with_the_staleness_bucket(monkeypatch):
+    monkeypatch.setattr(conditional, "MAX_STALENESS_SECONDS", 5)
+    monkeypatch.setattr(conditional.time, "time", lambda: 1000.0)
+    etag = current_etag("stats")
+    monkeypatch.setattr(conditional.time, "time", lambda: 1004.9)
+    assert current_etag("stats") == etag
+    monkeypatch.setattr(conditional.time, "time", lambda: 1005.0)
+    assert current_etag("stats") != etag
+
+
+def test_another_instance_never_matches(monkeypatch):
+    monkeypatch.setattr(conditional, "MAX_STALENESS_SECONDS", 0)
+    etag = current_etag("stats")
+    restarted = WorkerState()
+    restarted.start_time = restarted.start_time.replace(microsecond=(restarted.start_time.microsecond + 1) % 1_000_000)
+    monkeypatch.setattr(shared_state, "worker_state", restarted)
+    assert not etag_matches(etag, current_etag("stats"))
+
+
+def test_not_modified_response_carries_the_validator():
+    response = not_modified(ETAG)
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == ETAG
+    assert response.headers["cache-control"] == cache_headers(ETAG)["Cache-Control"]
+
+
+@pytest.mark.parametrize("path", ["/api/stats", "/api/submissions", "/api/stats/top-names"])
+def test_endpoints_answer_a_matching_validator_with_304(client, monkeypatch, path):
+    monkeypatch.setattr(conditional, "MAX_STALENESS_SECONDS", 0)
+    first = client.get(path)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == conditional.CACHE_CONTROL
+
+    revalidated = client.get(path, headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+
+    assert client.get(path, headers={"If-None-Match": 'W/"something-else"'}).status_code == 200
+
+
+def test_a_new_submission_invalidates_every_validator(client, monkeypatch):
+    monkeypatch.setattr(conditional, "MAX_STALENESS_SECONDS", 0)
+    stats_etag = client.get("/api/stats").headers["etag"]
+    listing_etag = client.get("/api/submissions").headers["etag"]
+    assert stats_etag != listing_etag
+
+    assert client.post("/api/submit", json={"firstName": "Ada", "lastName": "Lovelace"}).status_code == 200
+
+    listing = client.get("/api/submissions", headers={"If-None-Match": listing_etag})
+    assert listing.status_code == 200
+    assert listing.json()["submissions"][0]["first_name"] == "Ada"
+    assert client.get("/api/stats", headers={"If-None-Match": stats_etag}).status_code == 200
@@ -0,0 +1,147 @@
+"""
+Fallback store tests for Random Corp API
+The per-process ring and the shared-memory ring: running totals, newest-first pages, wrap-around and filters
+"""
+
+import uuid
+import tempfile
+from datetime import datetime, timedelta, timezone
+import pytest
+from fallback_store import MemoryFallbackStore, SharedFallbackStore, batch_summary, filter_page
+from submission_rows import SubmissionFilters
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def submission(index: int, **fields):
+    return {
+        "submission_id": f"sub_{index}",
+        "first_name": f"First{index}",
+        "last_name": f"Last{index}",
+        "message": f"message {index}",
+        "batch_id": None,
+        "processing_time": 0.1 * index,
+        "timestamp": (START + timedelta(minutes=index)).isoformat(),
+        **fields
+    }
+
+
+@pytest.fixture(autouse=True)
+def lock_dir(tmp_path, monkeypatch):
+    """Keep the shared segments' lock files out of the real temp directory"""
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+
+
+@pytest.fixture(params=["memory", "shared"])
+def make_store(request):
+    stores = []
+
+    def make(capacity: int, slot_size: int = 1024):
+        if request.param == "memory":
+            store = MemoryFallbackStore(capacity=capacity)
+        else:
+            store = SharedFallbackStore(f"randomcorp-test-{uuid.uuid4().hex[:12]}", capacity=capacity,
+                                        slot_size=slot_size)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        store.close()
+
+
+def ids(rows):
+    return [row.submission_id for row in rows]
+
+
+def test_stats_are_running_totals_over_every_append(make_store):
+    store = make_store(capacity=3)
+    assert store.stats() == {"count": 0, "avg_processing_time": 0.0, "latest": None}
+    for index in range(1, 6):
+        store.append(submission(index))
+    stats = store.stats()
+    assert stats["count"] == 5
+    assert stats["avg_processing_time"] == pytest.approx(0.3)
+    assert stats["latest"] == {"id": "sub_5", "name": "First5 Last5",
+                               "timestamp": (START + timedelta(minutes=5)).isoformat()}
+    assert len(store) == 3
+
+
+def test_pages_are_newest_first_and_stop_at_the_oldest_retained(make_store):
+    store = make_store(capacity=4)
+    for index in range(1, 7):
+        store.append(submission(index))
+    assert ids(store.page(0, 2)) == ["sub_6", "sub_5"]
+    assert ids(store.page(2, 10)) == ["sub_4", "sub_3"]
+    assert ids(store.page(4, 10)) == []
+    row = store.page(0, 1)[0]
+    assert row.created_at == START + timedelta(minutes=6)
+    assert row.processing_time == pytest.approx(0.6)
+
+
+def test_entries_since_reports_what_fell_off_the_ring(make_store):
+    store = make_store(capacity=3)
+    for index in range(1, 6):
+        store.append(submission(index))
+    oldest, appended, records = store.entries_since(0)
+    assert (oldest, appended) == (2, 5)
+    assert [record[0] for record in records] == ["sub_3", "sub_4", "sub_5"]
+    assert [record[0] for record in store.entries_since(4)[2]] == ["sub_5"]
+
+
+def test_clear(make_store):
+    store = make_store(capacity=3)
+    store.append(submission(1))
+    store.clear()
+    assert store.stats()["count"] == 0
+    assert store.page(0, 10) == []
+
+
+def test_filters_and_batch_summary(make_store):
+    store = make_store(capacity=10)
+    for index in range(1, 7):
+        store.append(submission(index, batch_id="batch_a" if index % 2 else "batch_b",
+                                message=None if index == 3 else f"message {index}"))
+
+    total, rows = filter_page(store, SubmissionFilters(batch_id="batch_a"), 0, 10)
+    assert (total, ids(rows)) == (3, ["sub_5", "sub_3", "sub_1"])
+
+    total, rows = filter_page(store, SubmissionFilters(batch_id="batch_a", has_message=True), 1, 1)
+    assert (total, ids(rows)) == (2, ["sub_1"])
+
+    window = SubmissionFilters(created_from=START + timedelta(minutes=2), created_to=START + timedelta(minutes=4))
+    assert ids(filter_page(store, window, 0, 10)[1]) == ["sub_3", "sub_2"]
+
+    summary = batch_summary(store, "batch_a")
+    assert summary["submissions"] == 3
+    assert summary["with_message"] == 2
+    assert summary["first_submission_at"] == (START + timedelta(minutes=1)).isoformat()
+    assert summary["total_processing_time"] == pytest.approx(0.9)
+    assert batch_summary(store, "missing") is None
+
+
+def test_shared_store_truncates_records_larger_than_a_slot():
+    store = SharedFallbackStore(f"randomcorp-test-{uuid.uuid4().hex[:12]}", capacity=2, slot_size=768)
+    try:
+        store.append(submission(1, message="x" * 5000, first_name="Zoë"))
+        store.append(submission(2))
+        rows = store.page(0, 2)
+        assert ids(rows) == ["sub_2", "sub_1"]
+        assert rows[1].first_name == "Zoë"
+        assert 0 < len(rows[1].message) < 768
+        assert store.stats()["count"] == 2
+    finally:
+        store.close()
+
+
+def test_shared_stores_with_one_name_see_each_others_writes():
+    name = f"randomcorp-test-{uuid.uuid4().hex[:12]}"
+    first, second = SharedFallbackStore(name, capacity=4), SharedFallbackStore(name, capacity=4)
+    try:
+        first.append(submission(1))
+        second.append(submission(2))
+        assert ids(first.page(0, 10)) == ids(second.page(0, 10)) == ["sub_2", "sub_1"]
+        assert first.stats()["count"] == 2
+    finally:
+        first.close()
+        second.close()
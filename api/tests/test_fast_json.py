@@ -0,0 +1,90 @@
+"""
+Fast JSON rendering tests for Random Corp API
+orjson and stdlib encodings agree, and the fast path skips validation but keeps response headers
+"""
+
+import json
+from datetime import date, datetime, timezone
+from typing import List, Optional
+import pytest
+from fastapi import Response
+from pydantic import BaseModel, ValidationError
+import fast_json
+from fast_json import FastJSONResponse, build, dumps, render
+
+
+class Item(BaseModel):
+    name: str
+    created_at: Optional[datetime] = None
+
+
+class Page(BaseModel):
+    items: List[Item]
+    total: int
+
+
+CONTENT = {
+    "text": "Zoë \"quoted\" 名前",
+    "numbers": [1, 2.5, None, True],
+    "created_at": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+    "day": date(2024, 1, 2),
+    "item": Item(name="Ada"),
+}
+
+EXPECTED = {
+    "text": "Zoë \"quoted\" 名前",
+    "numbers": [1, 2.5, None, True],
+    "created_at": "2024-01-02T03:04:05+00:00",
+    "day": "2024-01-02",
+    "item": {"name": "Ada", "created_at": None},
+}
+
+
+@pytest.mark.parametrize("use_orjson", [False, True])
+def test_dumps_agrees_across_encoders(monkeypatch, use_orjson):
+    if use_orjson and fast_json.orjson is None:
+        pytest.skip("orjson is not installed")
+    if not use_orjson:
+        monkeypatch.setattr(fast_json, "orjson", None)
+    encoded = dumps(CONTENT)
+    assert isinstance(encoded, bytes)
+    assert json.loads(encoded) == EXPECTED
+    assert b" " not in dumps({"a": [1, 2]})
+
+    with pytest.raises(TypeError):
+        dumps({"unsupported": object()})
+
+
+def test_models_serialize_like_model_dump():
+    page = Page(items=[Item(name="Ada", created_at=datetime(2024, 1, 1))], total=1)
+    assert json.loads(dumps(page)) == page.model_dump(mode="json")
+
+
+def test_build_validates_unless_the_fast_path_is_on(monkeypatch):
+    monkeypatch.setattr(fast_json, "FAST_JSON_ENABLED", False)
+    with pytest.raises(ValidationError):
+        build(Page, items=[], total="not a number")
+
+    monkeypatch.setattr(fast_json, "FAST_JSON_ENABLED", True)
+    page = build(Page, items=[], total=3)
+    assert isinstance(page, Page) and page.total == 3
+
+
+def test_render_passes_content_through_when_disabled(monkeypatch):
+    monkeypatch.setattr(fast_json, "FAST_JSON_ENABLED", False)
+    assert render(CONTENT) is CONTENT
+
+
+def test_render_copies_the_injected_response_headers(monkeypatch):
+    monkeypatch.setattr(fast_json, "FAST_JSON_ENABLED", True)
+    response = Response()
+    response.headers["ETag"] = 'W/"stats-1"'
+    response.headers["Cache-Control"] = "no-cache"
+
+    rendered = render(Page(items=[Item(name="Ada")], total=1), response)
+    assert isinstance(rendered, FastJSONResponse)
+    assert rendered.headers["etag"] == 'W/"stats-1"'
+    assert rendered.headers["cache-control"] == "no-cache"
+    assert rendered.headers["content-type"] == "application/json"
+    assert int(rendered.headers["content-length"]) == len(rendered.body)
+    assert json.loads(rendered.body) == {"items": [{"name": "Ada", "created_at": None}], "total": 1}
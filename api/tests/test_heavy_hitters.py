@@ -0,0 +1,126 @@
+"""
+Top names tests for Random Corp API
+Space-Saving error bounds, guaranteed top-k, merges and serialization round-trips
+"""
+
+import json
+import random
+from collections import Counter
+from heavy_hitters import SpaceSaving, TopNames, name_key
+
+
+def zipf_names(seed: int, size: int = 20000, distinct: int = 500):
+    rng = random.Random(seed)
+    weights = [1 / rank for rank in range(1, distinct + 1)]
+    return rng.choices([f"Name{rank} Person" for rank in range(distinct)], weights=weights, k=size)
+
+
+def check_bounds(summary: SpaceSaving, exact: Counter):
+    """Every tracked count overestimates by at most its error; untracked names are under the floor"""
+    tracked = {entry["name"]: entry for entry in summary.top(len(summary))}
+    for name, true_count in exact.items():
+        entry = tracked.get(name)
+        if entry is None:
+            assert true_count <= summary.floor
+        else:
+            assert entry["min_count"] <= true_count <= entry["count"]
+
+
+def test_name_key_ignores_case_and_spacing():
+    assert name_key("  Ada   LOVELACE ") == name_key("ada lovelace") == "ada lovelace"
+    assert name_key("Straße") == name_key("STRASSE")
+
+
+def test_exact_while_under_capacity():
+    summary = SpaceSaving(capacity=10)
+    for name in ["Ada Lovelace"] * 3 + ["alan  turing"] * 2 + ["ADA LOVELACE"]:
+        summary.add(name)
+    assert summary.top(2) == [
+        {"name": "Ada Lovelace", "count": 4, "min_count": 4, "guaranteed": True},
+        {"name": "alan turing", "count": 2, "min_count": 2, "guaranteed": True},
+    ]
+    assert (summary.total, summary.floor, len(summary)) == (6, 0, 2)
+
+
+def test_blank_names_are_ignored():
+    summary = SpaceSaving(capacity=10)
+    summary.add("   ")
+    assert (summary.total, len(summary)) == (0, 0)
+
+
+def test_error_bounds_hold_past_capacity():
+    names = zipf_names(1)
+    summary = SpaceSaving(capacity=50)
+    for name in names:
+        summary.add(name)
+    exact = Counter(names)
+    assert len(summary) == 50
+    assert summary.total == len(names)
+    assert summary.floor <= len(names) / 50
+    check_bounds(summary, exact)
+
+
+def test_guaranteed_entries_really_are_in_the_top_k():
+    names = zipf_names(2)
+    summary = SpaceSaving(capacity=50)
+    for name in names:
+        summary.add(name)
+    exact = Counter(names)
+    k = 5
+    true_top = {name for name, _ in exact.most_common(k)}
+    top = summary.top(k)
+    assert len(top) == k
+    assert any(entry["guaranteed"] for entry in top)
+    for entry in top:
+        if entry["guaranteed"]:
+            assert entry["name"] in true_top
+
+
+def test_merge_keeps_the_bounds_of_the_union():
+    first, second = zipf_names(3), zipf_names(4)
+    left, right = SpaceSaving(capacity=50), SpaceSaving(capacity=50)
+    for name in first:
+        left.add(name)
+    for name in second:
+        right.add(name)
+    left.merge(right)
+    assert len(left) == 50
+    assert left.total == len(first) + len(second)
+    check_bounds(left, Counter(first) + Counter(second))
+    left.add("Name0 Person")
+    assert left.total == len(first) + len(second) + 1
+
+
+def test_serialization_round_trip_through_json():
+    summary = SpaceSaving(capacity=20)
+    for name in zipf_names(5, size=2000):
+        summary.add(name)
+    restored = SpaceSaving.from_dict(json.loads(json.dumps(summary.to_dict())))
+    assert (restored.capacity, restored.total, restored.floor) == (summary.capacity, summary.total, summary.floor)
+    assert restored.top(20) == summary.top(20)
+
+    # Further adds after a restore still evict the smallest counter
+    restored.add("Somebody New")
+    assert len(restored) == 20
+    assert restored.top(len(restored))[-1]["count"] >= restored.floor
+
+
+def test_restoring_into_a_smaller_capacity_keeps_the_largest_counters():
+    summary = SpaceSaving(capacity=30)
+    for name in zipf_names(6, size=3000):
+        summary.add(name)
+    restored = SpaceSaving.from_dict(summary.to_dict(), capacity=10)
+    assert len(restored) == 10
+    assert [entry["name"] for entry in restored.top(3)] == [entry["name"] for entry in summary.top(3)]
+    assert restored.floor >= summary.top(11)[10]["count"]
+
+
+def test_top_names_view_merges_local_and_remote():
+    top_names = TopNames(capacity=10)
+    top_names.record("Ada", "Lovelace")
+    remote = top_names.empty()
+    remote.add("ada lovelace", count=2)
+    remote.add("Alan Turing")
+    top_names.remote = top_names.decode(top_names.encode(remote))
+    top = top_names.view().top(2)
+    assert [(name_key(entry["name"]), entry["count"]) for entry in top] == [("ada lovelace", 3), ("alan turing", 1)]
@@ -0,0 +1,90 @@
+"""
+Distinct submitter tests for Random Corp API
+HyperLogLog estimates within the standard error, union merges and compressed round-trips
+"""
+
+import asyncio
+from datetime import datetime, timezone
+import pytest
+from hyperloglog import HyperLogLog, UniqueSubmitters, submitter_key
+
+
+def keys(start: int, stop: int):
+    return [f"submitter-{index}".encode() for index in range(start, stop)]
+
+
+def filled(items, precision: int = 12) -> HyperLogLog:
+    registers = HyperLogLog(precision)
+    for key in items:
+        registers.add(key)
+    return registers
+
+
+def test_submitter_key_ignores_case_and_spacing():
+    assert submitter_key(" Ada ", "LOVELACE") == submitter_key("ada", "lovelace")
+    assert submitter_key("Ada Byron", "King") != submitter_key("Ada", "Byron King")
+
+
+def test_small_counts_are_exact_or_close():
+    registers = filled(keys(0, 100))
+    assert registers.count() == pytest.approx(100, abs=2)
+    assert HyperLogLog().count() == 0
+
+
+@pytest.mark.parametrize("cardinality", [5_000, 50_000])
+def test_count_is_within_three_standard_errors(cardinality):
+    registers = filled(keys(0, cardinality))
+    assert registers.count() == pytest.approx(cardinality, rel=3 * registers.standard_error)
+
+
+def test_add_reports_whether_the_estimate_moved():
+    registers = HyperLogLog()
+    assert registers.add(b"ada") is True
+    assert registers.add(b"ada") is False
+    registers.add(b"ada")
+    assert registers.count() == 1
+
+
+def test_merge_is_a_union_and_idempotent():
+    left, right = filled(keys(0, 20_000)), filled(keys(10_000, 30_000))
+    union = filled(keys(0, 30_000))
+    left.merge(right)
+    assert left.registers == union.registers
+    assert left.count() == union.count()
+    left.merge(right)
+    assert left.registers == union.registers
+
+
+def test_merging_different_precisions_is_rejected():
+    with pytest.raises(ValueError):
+        HyperLogLog(12).merge(HyperLogLog(10))
+
+
+def test_string_round_trip():
+    registers = filled(keys(0, 1_000), precision=10)
+    restored = HyperLogLog.from_string(registers.to_string())
+    assert restored.precision == 10
+    assert restored.registers == registers.registers
+    assert restored.count() == registers.count()
+    assert len(HyperLogLog().to_string()) < 100, "empty registers compress to a few bytes"
+
+
+def test_unique_submitters_counts_name_pairs_per_day():
+    counters = UniqueSubmitters(precision=12)
+    for first, last in [("Ada", "Lovelace"), ("ada ", "LOVELACE"), ("Alan", "Turing")]:
+        counters.record(first, last)
+    assert counters.unique_submitters() == 2
+
+    timeseries = counters.timeseries(3)
+    assert [point["unique_submitters"] for point in timeseries["days"]] == [0, 0, 2]
+    assert timeseries["days"][-1]["date"] == datetime.now(timezone.utc).date().isoformat()
+    assert timeseries["unique_submitters"] == 2
+    assert timeseries["standard_error"] == pytest.approx(0.0163, abs=1e-4)
+
+
+def test_sync_without_a_database_keeps_the_local_counts(monkeypatch):
+    monkeypatch.delenv("DB_HOST", raising=False)
+    counters = UniqueSubmitters()
+    counters.record("Ada", "Lovelace")
+    assert asyncio.run(counters.sync()) is False
+    assert counters.unique_submitters() == 1
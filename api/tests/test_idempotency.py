@@ -0,0 +1,145 @@
+"""
+Idempotency cache tests for Random Corp API
+Replays, key reuse, concurrent duplicates and what happens when the first request fails or is cancelled
+"""
+
+import asyncio
+from typing import Any, Optional
+import pytest
+from idempotency import IdempotencyCache, IdempotencyKeyConflict, scoped_key
+
+
+class Producer:
+    """Counts calls; optionally blocks until released"""
+
+    def __init__(self, value: Any = "response", gate: Optional[asyncio.Event] = None):
+        self.value = value
+        self.gate = gate
+        self.calls = 0
+
+    async def __call__(self) -> Any:
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        if isinstance(self.value, BaseException):
+            raise self.value
+        return self.value
+
+
+def test_replays_the_stored_response():
+    async def scenario():
+        cache = IdempotencyCache()
+        producer = Producer({"submission_id": "sub_1"})
+        fingerprint = cache.fingerprint({"first_name": "Ada"})
+        assert await cache.run("submit:k", fingerprint, producer) == ({"submission_id": "sub_1"}, False)
+        assert await cache.run("submit:k", fingerprint, producer) == ({"submission_id": "sub_1"}, True)
+        assert producer.calls == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+    asyncio.run(scenario())
+
+
+def test_fingerprint_ignores_key_order():
+    assert IdempotencyCache.fingerprint({"a": 1, "b": 2}) == IdempotencyCache.fingerprint({"b": 2, "a": 1})
+    assert IdempotencyCache.fingerprint({"a": 1}) != IdempotencyCache.fingerprint({"a": 2})
+
+
+def test_key_reuse_with_another_body_conflicts():
+    async def scenario():
+        cache = IdempotencyCache()
+        await cache.run("submit:k", cache.fingerprint({"a": 1}), Producer())
+        with pytest.raises(IdempotencyKeyConflict):
+            await cache.run("submit:k", cache.fingerprint({"a": 2}), Producer())
+    asyncio.run(scenario())
+
+
+def test_scoped_keys():
+    assert scoped_key("submit", "abc") == "submit:abc"
+    assert scoped_key("submit", None) is None
+    assert scoped_key("submit", "") is None
+
+
+def test_concurrent_duplicates_share_one_run():
+    async def scenario():
+        cache = IdempotencyCache()
+        gate = asyncio.Event()
+        producer = Producer("response", gate)
+        tasks = [asyncio.create_task(cache.run("submit:k", "f", producer)) for _ in range(4)]
+        await asyncio.sleep(0.01)
+        gate.set()
+        results = await asyncio.gather(*tasks)
+        assert producer.calls == 1
+        assert sorted(replayed for _, replayed in results) == [False, True, True, True]
+    asyncio.run(scenario())
+
+
+def test_cancelled_first_request_hands_over_to_a_duplicate():
+    async def scenario():
+        cache = IdempotencyCache()
+        gate = asyncio.Event()
+        producer = Producer("response", gate)
+        first = asyncio.create_task(cache.run("submit:k", "f", producer))
+        await asyncio.sleep(0.01)
+        duplicates = [asyncio.create_task(cache.run("submit:k", "f", producer)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+
+        first.cancel()
+        await asyncio.sleep(0.01)
+        gate.set()
+
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        results = await asyncio.gather(*duplicates)
+        assert sorted(replayed for _, replayed in results) == [False, True]
+        assert all(value == "response" for value, _ in results)
+        assert producer.calls == 2, "one duplicate re-runs the producer, the other waits for it"
+        assert await cache.run("submit:k", "f", producer) == ("response", True)
+    asyncio.run(scenario())
+
+
+def test_cancelled_duplicate_leaves_the_first_request_running():
+    async def scenario():
+        cache = IdempotencyCache()
+        gate = asyncio.Event()
+        producer = Producer("response", gate)
+        first = asyncio.create_task(cache.run("submit:k", "f", producer))
+        await asyncio.sleep(0.01)
+        duplicate = asyncio.create_task(cache.run("submit:k", "f", producer))
+        await asyncio.sleep(0.01)
+
+        duplicate.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await duplicate
+        gate.set()
+        assert await first == ("response", False)
+        assert producer.calls == 1
+    asyncio.run(scenario())
+
+
+def test_failures_reach_waiters_and_are_not_cached():
+    async def scenario():
+        cache = IdempotencyCache()
+        gate = asyncio.Event()
+        failing = Producer(RuntimeError("enrichment failed"), gate)
+        tasks = [asyncio.create_task(cache.run("submit:k", "f", failing)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        gate.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert len(cache) == 0
+        assert await cache.run("submit:k", "f", Producer("retried")) == ("retried", False)
+    asyncio.run(scenario())
+
+
+def test_entries_expire_and_are_bounded():
+    async def scenario():
+        cache = IdempotencyCache(ttl_seconds=0.05, max_entries=2)
+        for key in ("a", "b", "c"):
+            await cache.run(key, "f", Producer(key))
+        assert len(cache) == 2
+        assert await cache.run("a", "f", Producer("again")) == ("again", False)
+
+        await asyncio.sleep(0.06)
+        producer = Producer("fresh")
+        assert await cache.run("b", "f", producer) == ("fresh", False)
+        assert len(cache) == 1
+    asyncio.run(scenario())
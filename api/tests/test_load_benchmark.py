@@ -0,0 +1,71 @@
+"""
+Load benchmark tests for Random Corp API
+Request mix parsing, latency percentiles and the regression check between two reports
+"""
+
+import json
+import pytest
+from benchmarks import load
+from benchmarks.load import compare_reports, parse_mix, percentile, summarize
+
+
+def report(p50: float = 10.0, p95: float = 20.0, p99: float = 30.0, rps: float = 100.0, errors: int = 0,
+           endpoints=None):
+    stats = {"p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "throughput_rps": rps, "errors": errors}
+    return {"overall": stats, "endpoints": endpoints or {}}
+
+
+def test_parse_mix():
+    assert parse_mix("submit=60, stats=40") == [("submit", 60.0), ("stats", 40.0)]
+    assert parse_mix("submit,,batch=2") == [("submit", 1.0), ("batch", 2.0)]
+    assert [name for name, _ in parse_mix(load.DEFAULT_MIX)] == list(load.ENDPOINTS)
+    with pytest.raises(ValueError, match="Unknown endpoint"):
+        parse_mix("submit=50,delete=50")
+
+
+def test_nearest_rank_percentile():
+    ordered = [float(value) for value in range(1, 101)]
+    assert percentile(ordered, 0.50) == 50.0
+    assert percentile(ordered, 0.99) == 99.0
+    assert percentile(ordered, 1.0) == 100.0
+    assert percentile(ordered, 0.0) == 1.0
+    assert percentile([0.3], 0.95) == 0.3
+    assert percentile([], 0.5) == 0.0
+
+
+def test_summarize():
+    summary = summarize([0.003, 0.001, 0.002, 0.004], errors=1, elapsed=2.0)
+    assert summary == {"requests": 4, "errors": 1, "throughput_rps": 2.0, "p50_ms": 2.0, "p95_ms": 4.0,
+                       "p99_ms": 4.0, "max_ms": 4.0, "mean_ms": 2.5}
+    assert summarize([], errors=0, elapsed=0.0)["throughput_rps"] == 0.0
+
+
+def test_changes_within_the_threshold_pass():
+    assert compare_reports(report(), report(p50=10.9, p99=32.9, rps=91.0), threshold=10) == []
+
+
+def test_regressions_beyond_the_threshold():
+    regressions = compare_reports(report(), report(p95=25.0, rps=80.0, errors=2), threshold=10)
+    assert regressions == [
+        "overall p95_ms: 20.0 -> 25.0 (+25.0%)",
+        "overall throughput_rps: 100.0 -> 80.0 (-20.0%)",
+        "overall errors: 0 -> 2",
+    ]
+
+
+def test_endpoints_are_compared_only_when_both_reports_have_them():
+    baseline = report(endpoints={"stats": report()["overall"], "batch": report()["overall"]})
+    current = report(endpoints={"stats": report(p50=20.0)["overall"]})
+    assert compare_reports(baseline, current, threshold=10) == ["stats p50_ms: 10.0 -> 20.0 (+100.0%)"]
+
+
+def test_compare_command_exit_status(tmp_path, capsys):
+    baseline, current = tmp_path / "baseline.json", tmp_path / "current.json"
+    baseline.write_text(json.dumps(report()))
+    current.write_text(json.dumps(report(p99=60.0)))
+
+    assert load.main(["compare", str(baseline), str(current), "--threshold", "10"]) == 1
+    output = json.loads(capsys.readouterr().out)
+    assert output["passed"] is False and output["regressions"] == ["overall p99_ms: 30.0 -> 60.0 (+100.0%)"]
+
+    assert load.main(["compare", str(baseline), str(baseline)]) == 0
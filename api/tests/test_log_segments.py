@@ -0,0 +1,128 @@
+"""
+Segmented submission log tests for Random Corp API
+Writer/reader round-trips per codec, time-range reads, index recovery and segment retention
+"""
+
+import os
+import pytest
+import log_segments
+from log_segments import INDEX_ENTRY, SegmentReader, SegmentWriter, list_segments, read_log
+
+BASE = 1_700_000_000.0
+
+
+def write(writer: SegmentWriter, start: int, stop: int, per_block: int = 10):
+    """Records at BASE + i seconds, one block per `per_block` records"""
+    for index in range(start, stop):
+        writer.append(BASE + index, {"submission_id": f"sub_{index}", "n": index})
+        if (index + 1) % per_block == 0:
+            writer.flush_block()
+    writer.flush_block()
+
+
+def numbers(records):
+    return [record["n"] for _, record in records]
+
+
+@pytest.mark.parametrize("codec", ["none", "gzip", "zstd"])
+def test_round_trip_per_codec(tmp_path, codec):
+    if codec == "zstd" and log_segments.zstandard is None:
+        pytest.skip("zstandard is not installed")
+    writer = SegmentWriter(str(tmp_path), codec=codec)
+    write(writer, 0, 25)
+    writer.close()
+
+    assert writer.blocks_written == 3
+    with SegmentReader(list_segments(str(tmp_path))[0]) as reader:
+        assert [entry.count for entry in reader.index] == [10, 10, 5]
+        assert (reader.min_ts, reader.max_ts) == (BASE, BASE + 24)
+        records = list(reader.iter_records())
+    assert numbers(records) == list(range(25))
+    assert records[3] == (BASE + 3, {"submission_id": "sub_3", "n": 3})
+
+
+def test_unknown_codec_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        SegmentWriter(str(tmp_path), codec="lz4")
+
+
+def test_time_range_reads_are_half_open(tmp_path):
+    writer = SegmentWriter(str(tmp_path), codec="gzip")
+    write(writer, 0, 50)
+    writer.close()
+    assert numbers(read_log(str(tmp_path), BASE + 15, BASE + 32)) == list(range(15, 32))
+    assert numbers(read_log(str(tmp_path), start=BASE + 45)) == list(range(45, 50))
+    assert numbers(read_log(str(tmp_path), end=BASE + 3)) == [0, 1, 2]
+    assert list(read_log(str(tmp_path), BASE + 100, BASE + 200)) == []
+
+
+def test_range_reads_only_decompress_overlapping_blocks(tmp_path, monkeypatch):
+    writer = SegmentWriter(str(tmp_path), codec="gzip")
+    write(writer, 0, 50)
+    writer.close()
+    decompressed = []
+    real = log_segments._decompress
+    monkeypatch.setattr(log_segments, "_decompress",
+                        lambda codec, data, raw_len: decompressed.append(raw_len) or real(codec, data, raw_len))
+    assert numbers(read_log(str(tmp_path), BASE + 21, BASE + 24)) == [21, 22, 23]
+    assert len(decompressed) == 1
+
+
+def test_reads_span_rolled_segments_in_order(tmp_path):
+    writer = SegmentWriter(str(tmp_path), codec="none", segment_max_bytes=1, backup_count=100)
+    write(writer, 0, 40)
+    writer.close()
+    assert len(list_segments(str(tmp_path))) == 4
+    assert numbers(read_log(str(tmp_path))) == list(range(40))
+    assert numbers(read_log(str(tmp_path), BASE + 18, BASE + 23)) == list(range(18, 23))
+
+
+def test_missing_or_short_index_is_rebuilt_by_scanning(tmp_path):
+    writer = SegmentWriter(str(tmp_path), codec="gzip")
+    write(writer, 0, 30)
+    writer.close()
+    path = list_segments(str(tmp_path))[0]
+
+    # A crash between a block and its index entry leaves the index one entry short
+    with open(path + ".idx", "r+b") as index:
+        index.truncate(INDEX_ENTRY.size * 2 + 5)
+    with SegmentReader(path) as reader:
+        assert [entry.count for entry in reader.index] == [10, 10, 10]
+
+    os.remove(path + ".idx")
+    assert numbers(read_log(str(tmp_path), BASE + 25)) == list(range(25, 30))
+
+
+def test_truncated_last_block_is_ignored(tmp_path):
+    writer = SegmentWriter(str(tmp_path), codec="gzip")
+    write(writer, 0, 20)
+    writer.close()
+    path = list_segments(str(tmp_path))[0]
+    os.remove(path + ".idx")
+    with open(path, "r+b") as segment:
+        segment.truncate(os.path.getsize(path) - 3)
+    assert numbers(read_log(str(tmp_path))) == list(range(10))
+
+
+def test_empty_segment(tmp_path):
+    path = tmp_path / "submissions-20240101T000000-1-0001.seg"
+    path.write_bytes(b"")
+    with SegmentReader(str(path)) as reader:
+        assert reader.index == [] and reader.min_ts is None
+    assert list(read_log(str(tmp_path))) == []
+
+
+def test_retention_keeps_backup_count_closed_segments(tmp_path):
+    (tmp_path / "other-20200101T000000-1-0001.seg").write_bytes(b"")
+    writer = SegmentWriter(str(tmp_path), codec="none", segment_max_bytes=1, backup_count=2)
+    write(writer, 0, 50)
+    writer.close()
+
+    segments = list_segments(str(tmp_path))
+    assert len(segments) == 3
+    assert writer.segments_deleted == 2
+    assert all(os.path.exists(path + ".idx") for path in segments)
+    assert not [name for name in os.listdir(tmp_path)
+                if name.endswith(".idx") and name[:-4] not in map(os.path.basename, segments)]
+    assert (tmp_path / "other-20200101T000000-1-0001.seg").exists()
+    assert numbers(read_log(str(tmp_path))) == list(range(20, 50))
@@ -0,0 +1,66 @@
+"""
+Logging pipeline tests for Random Corp API
+Sampling rule parsing, per-event sampling and rate limits, and the non-blocking queue handler
+"""
+
+import queue
+import logging
+import pytest
+import logging_config
+from logging_config import NonBlockingQueueHandler, SamplingFilter, parse_sampling_rules
+
+
+def record(event=None, level=logging.INFO) -> logging.LogRecord:
+    log_record = logging.LogRecord("test", level, __file__, 1, "message", (), None)
+    if event is not None:
+        log_record.event = event
+    return log_record
+
+
+def test_parse_sampling_rules():
+    assert parse_sampling_rules("submission.processed=0.1:50, batch.saved=1,,x=:5") == {
+        "submission.processed": (0.1, 50),
+        "batch.saved": (1.0, None),
+        "x": (1.0, 5),
+    }
+    assert parse_sampling_rules("") == {}
+
+
+def test_rate_limit_is_per_event_per_second(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(logging_config.time, "monotonic", lambda: now[0])
+    sampling = SamplingFilter({"submission.processed": (1.0, 2), "batch.saved": (1.0, 1)})
+
+    assert [sampling.filter(record("submission.processed")) for _ in range(4)] == [True, True, False, False]
+    assert sampling.filter(record("batch.saved"))
+    assert sampling.suppressed == {"submission.processed": 2}
+
+    now[0] = 101.2
+    assert sampling.filter(record("submission.processed"))
+
+
+def test_sample_rate(monkeypatch):
+    draws = iter([0.05, 0.5, 0.09, 0.99])
+    monkeypatch.setattr(logging_config.random, "random", lambda: next(draws))
+    sampling = SamplingFilter({"submission.received": (0.1, None)})
+    assert [sampling.filter(record("submission.received")) for _ in range(4)] == [True, False, True, False]
+    assert sampling.suppressed == {"submission.received": 2}
+
+
+@pytest.mark.parametrize("log_record", [
+    record(),
+    record("unconfigured.event"),
+    record("submission.processed", level=logging.WARNING),
+    record("submission.processed", level=logging.ERROR),
+])
+def test_records_outside_the_rules_always_pass(log_record):
+    sampling = SamplingFilter({"submission.processed": (0.0, 0)})
+    assert sampling.filter(log_record)
+    assert sampling.suppressed == {}
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=2))
+    for _ in range(5):
+        handler.handle(record())
+    assert (handler.queue.qsize(), handler.dropped) == (2, 3)
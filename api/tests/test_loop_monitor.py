@@ -0,0 +1,59 @@
+"""
+Event loop monitor tests for Random Corp API
+Lag percentiles, blocking callbacks caught with their stack and task, and rate-limited reports
+"""
+
+import time
+import asyncio
+import logging
+from loop_monitor import LOOP_BLOCKED, LoopMonitor
+
+
+def blocking_call(seconds: float):
+    time.sleep(seconds)
+
+
+def test_percentiles_over_the_window():
+    monitor = LoopMonitor(window=4)
+    assert (monitor.percentile(0.5), monitor.max_lag()) == (0.0, 0.0)
+    for lag in (0.5, 0.001, 0.002, 0.003, 0.004):
+        monitor._lags.append(lag)
+    assert monitor.percentile(0.5) == 0.003
+    assert monitor.percentile(0.99) == 0.004
+    assert monitor.max_lag() == 0.004
+
+
+def test_blocking_callback_is_reported_with_its_task_and_stack():
+    async def scenario():
+        monitor = LoopMonitor(interval=0.01, threshold=0.05, log_interval=0)
+        blocked_before = LOOP_BLOCKED.value()
+        await monitor.start()
+        await asyncio.sleep(0.03)
+
+        async def slow_handler():
+            blocking_call(0.2)
+
+        await asyncio.create_task(slow_handler(), name="slow-handler")
+        await asyncio.sleep(0.03)
+        await monitor.stop()
+        return monitor, LOOP_BLOCKED.value() - blocked_before
+
+    monitor, blocked = asyncio.run(scenario())
+    assert blocked == 1
+    [offender] = monitor.recent_offenders()
+    assert offender["blocked_ms"] >= 150
+    assert offender["task"] == "slow-handler"
+    assert "blocking_call" in offender["stack"]
+    assert monitor.max_lag() >= 0.15
+    assert monitor.percentile(0.5) < 0.05
+
+
+def test_reports_are_rate_limited(caplog):
+    monitor = LoopMonitor(log_interval=60)
+    with caplog.at_level(logging.WARNING, logger="loop_monitor"):
+        for _ in range(3):
+            monitor._record_block(0.2)
+    assert len(monitor.recent_offenders()) == 3
+    assert len(caplog.records) == 1
+    assert "stack not captured" in caplog.records[0].getMessage()
+    assert monitor._suppressed_logs == 2
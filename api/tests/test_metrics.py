@@ -0,0 +1,146 @@
+"""
+Metrics tests for Random Corp API
+Text exposition, merging other workers' snapshots, query timing and the background task gauge
+"""
+
+import os
+import json
+import asyncio
+import pytest
+from metrics import (BACKGROUND_TASKS_PENDING, DB_QUERY_DURATION, DB_QUERY_ERRORS, FALLBACK_TO_MEMORY,
+                     HTTP_REQUESTS_IN_FLIGHT, MetricsRegistry, WorkerMetrics, timed_query, tracked_background)
+
+# Far above any pid_max, so never a live process
+DEAD_PID = 999_999_999
+
+
+def test_text_exposition():
+    local = MetricsRegistry()
+    requests = local.counter("test_requests_total", "Requests", ("route",))
+    local.gauge("test_uptime_seconds", "Uptime", callback=lambda: 12.5)
+    latency = local.histogram("test_latency_seconds", "Latency", buckets=(0.1, 1.0))
+    requests.inc(labels=('/api/"x"\n',))
+    requests.inc(2, labels=("/api/y",))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value)
+
+    assert local.render().splitlines() == [
+        "# HELP test_requests_total Requests",
+        "# TYPE test_requests_total counter",
+        'test_requests_total{route="/api/\\"x\\"\\n"} 1',
+        'test_requests_total{route="/api/y"} 2',
+        "# HELP test_uptime_seconds Uptime",
+        "# TYPE test_uptime_seconds gauge",
+        "test_uptime_seconds 12.5",
+        "# HELP test_latency_seconds Latency",
+        "# TYPE test_latency_seconds histogram",
+        'test_latency_seconds_bucket{le="0.1"} 2',
+        'test_latency_seconds_bucket{le="1"} 3',
+        'test_latency_seconds_bucket{le="+Inf"} 4',
+        "test_latency_seconds_sum 3.65",
+        "test_latency_seconds_count 4",
+    ]
+    assert latency.count() == 4
+
+
+def test_unlabelled_series_are_exported_from_zero_and_names_are_unique():
+    local = MetricsRegistry()
+    local.counter("test_total", "Total")
+    assert "test_total 0" in local.render()
+    with pytest.raises(ValueError):
+        local.gauge("test_total", "Again")
+    with pytest.raises(ValueError):
+        local.gauge("test_gauge", "Bad mode", multiprocess_mode="avg")
+
+
+def test_failing_gauge_callback_is_skipped():
+    local = MetricsRegistry()
+    local.gauge("test_broken", "Broken", callback=lambda: 1 / 0)
+    assert local.render().splitlines() == ["# HELP test_broken Broken", "# TYPE test_broken gauge"]
+
+
+def test_merged_rendering_sums_counters_and_drops_dead_workers_gauges():
+    local = MetricsRegistry()
+    local.counter("test_total", "Total").inc(1)
+    local.gauge("test_in_flight", "In flight").set(2)
+    local.gauge("test_lag_seconds", "Lag", multiprocess_mode="max").set(0.5)
+    local.histogram("test_latency_seconds", "Latency", buckets=(1.0,)).observe(0.5)
+
+    other = MetricsRegistry()
+    other.counter("test_total", "Total").inc(10)
+    other.gauge("test_in_flight", "In flight").set(5)
+    other.gauge("test_lag_seconds", "Lag", multiprocess_mode="max").set(0.2)
+    other.histogram("test_latency_seconds", "Latency", buckets=(1.0,)).observe(2.0)
+    other.counter("test_unknown_total", "Only the other worker has this").inc()
+    snapshot = json.loads(json.dumps(other.snapshot()))
+
+    alive = local.render_merged([(snapshot, True)]).splitlines()
+    assert "test_total 11" in alive
+    assert "test_in_flight 7" in alive
+    assert "test_lag_seconds 0.5" in alive
+    assert 'test_latency_seconds_bucket{le="1"} 1' in alive
+    assert "test_latency_seconds_count 2" in alive
+    assert not any(line.startswith("test_unknown_total") for line in alive)
+
+    dead = local.render_merged([(snapshot, False)]).splitlines()
+    assert "test_total 11" in dead
+    assert "test_in_flight 2" in dead
+
+
+def test_worker_snapshots_are_merged(tmp_path):
+    metrics = WorkerMetrics(directory=str(tmp_path))
+    metrics.enabled = True
+
+    asyncio.run(metrics.publish())
+    own = json.loads((tmp_path / f"{os.getpid()}.json").read_text())
+    assert "randomcorp_fallback_to_memory_total" in own
+
+    fallback = dict(own)
+    fallback["randomcorp_fallback_to_memory_total"] = [[[], 4]]
+    fallback["randomcorp_http_requests_in_flight"] = [[[], 3]]
+    (tmp_path / f"{os.getppid()}.json").write_text(json.dumps(fallback))
+    (tmp_path / f"{DEAD_PID}.json").write_text(json.dumps(fallback))
+    (tmp_path / "123.json.tmp").write_text("partial")
+    (tmp_path / "456.json").write_text("{not json")
+
+    rendered = metrics.render().splitlines()
+    assert f"randomcorp_fallback_to_memory_total {int(FALLBACK_TO_MEMORY.value() + 8)}" in rendered
+    assert f"randomcorp_http_requests_in_flight {int(HTTP_REQUESTS_IN_FLIGHT.value() + 3)}" in rendered
+
+
+def test_timed_query_records_latency_and_errors():
+    @timed_query("test_method")
+    async def query(fail: bool):
+        if fail:
+            raise RuntimeError("query failed")
+        return "rows"
+
+    assert asyncio.run(query(False)) == "rows"
+    with pytest.raises(RuntimeError):
+        asyncio.run(query(True))
+    assert DB_QUERY_DURATION.count(("test_method",)) == 2
+    assert DB_QUERY_ERRORS.value(("test_method",)) == 1
+    assert query.__name__ == "query"
+
+
+def test_background_tasks_are_counted_only_while_running():
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def save(fail: bool):
+            await gate.wait()
+            if fail:
+                raise RuntimeError("save failed")
+
+        baseline = BACKGROUND_TASKS_PENDING.value()
+        wrapped = tracked_background(save)
+        scheduled = wrapped(False)
+        assert BACKGROUND_TASKS_PENDING.value() == baseline, "scheduling alone does not count"
+
+        running = [asyncio.create_task(scheduled), asyncio.create_task(wrapped(True))]
+        await asyncio.sleep(0)
+        assert BACKGROUND_TASKS_PENDING.value() == baseline + 2
+        gate.set()
+        await asyncio.gather(*running, return_exceptions=True)
+        assert BACKGROUND_TASKS_PENDING.value() == baseline
+    asyncio.run(scenario())
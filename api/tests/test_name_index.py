@@ -0,0 +1,119 @@
+"""
+Name search tests for Random Corp API
+Query parsing and ranking, and the trigram index over the fallback store as the ring wraps and clears
+"""
+
+import random
+from datetime import datetime, timezone
+import pytest
+from fallback_store import MemoryFallbackStore
+from name_index import EXACT, PREFIX, SUBSTRING, NameIndex, match_rank, name_trigrams, normalize_query
+
+
+def submission(index: int, first_name: str, last_name: str):
+    return {
+        "submission_id": f"sub_{index}",
+        "first_name": first_name,
+        "last_name": last_name,
+        "message": None,
+        "batch_id": None,
+        "processing_time": 0.1,
+        "timestamp": datetime(2024, 1, 1, tzinfo=timezone.utc).isoformat(),
+    }
+
+
+def store_with(names, capacity: int = 100):
+    store = MemoryFallbackStore(capacity=capacity)
+    for index, (first_name, last_name) in enumerate(names):
+        store.append(submission(index, first_name, last_name))
+    return store
+
+
+def ids(records):
+    return [record[0] for record in records]
+
+
+def test_normalize_query():
+    assert normalize_query("  Ada ") == ("ada",)
+    assert normalize_query("Ada LOVELACE") == ("ada", "lovelace")
+    assert normalize_query("Mary Ann Smith") == ("mary", "ann smith")
+    assert normalize_query("   ") == ()
+
+
+@pytest.mark.parametrize("query, first_name, last_name, rank", [
+    ("ada", "Ada", "Lovelace", EXACT),
+    ("lovelace", "Ada", "Lovelace", EXACT),
+    ("ad", "Ada", "Lovelace", PREFIX),
+    ("love", "Ada", "Lovelace", PREFIX),
+    ("vela", "Ada", "Lovelace", SUBSTRING),
+    ("da", "Ada", "Lovelace", None),
+    ("ada lovelace", "Ada", "Lovelace", EXACT),
+    ("a l", "Ada", "Lovelace", PREFIX),
+    ("lovelace ada", "Ada", "Lovelace", None),
+])
+def test_match_rank(query, first_name, last_name, rank):
+    assert match_rank(normalize_query(query), first_name, last_name) == rank
+
+
+def test_name_trigrams():
+    assert name_trigrams("Ann", "Lee") == {"ann", "lee"}
+    assert name_trigrams("Al", "Li") == set()
+
+
+def test_ranked_exact_then_prefix_then_substring_newest_first():
+    store = store_with([("Annabel", "Smith"), ("Ann", "Jones"), ("Joanne", "Ann"), ("Hannah", "Lee"),
+                        ("Annette", "Brown"), ("Bob", "Stone")])
+    index = NameIndex()
+    assert ids(index.search(store, "ann", 10)) == ["sub_2", "sub_1", "sub_4", "sub_0", "sub_3"]
+    assert ids(index.search(store, "ann", 2)) == ["sub_2", "sub_1"]
+    assert ids(index.search(store, "a", 10)) == ["sub_4", "sub_2", "sub_1", "sub_0"]
+    assert ids(index.search(store, "ANN SM", 10)) == ["sub_0"]
+    assert index.search(store, " ", 10) == []
+
+
+def test_new_appends_are_picked_up_on_search():
+    store = store_with([("Ada", "Lovelace")])
+    index = NameIndex()
+    assert ids(index.search(store, "ada", 10)) == ["sub_0"]
+    store.append(submission(1, "Ada", "Byron"))
+    assert ids(index.search(store, "ada", 10)) == ["sub_1", "sub_0"]
+
+
+def test_entries_overwritten_by_the_ring_are_dropped():
+    store = store_with([("Ada", "Lovelace"), ("Alan", "Turing"), ("Grace", "Hopper")], capacity=3)
+    index = NameIndex()
+    assert ids(index.search(store, "ada", 10)) == ["sub_0"]
+    store.append(submission(3, "Edsger", "Dijkstra"))
+    store.append(submission(4, "Ada", "King"))
+    assert ids(index.search(store, "ada", 10)) == ["sub_4"]
+    assert ids(index.search(store, "alan", 10)) == []
+    assert len(index) == 3
+
+
+def test_clearing_the_store_resets_the_index():
+    store = store_with([("Ada", "Lovelace"), ("Alan", "Turing")])
+    index = NameIndex()
+    assert len(index.search(store, "a", 10)) == 2
+    store.clear()
+    store.append(submission(5, "Grace", "Hopper"))
+    assert index.search(store, "a", 10) == []
+    assert ids(index.search(store, "hop", 10)) == ["sub_5"]
+    assert len(index) == 1
+
+
+def test_matches_a_full_scan():
+    rng = random.Random(7)
+    syllables = ["an", "na", "el", "le", "mar", "ia", "jo", "se", "li", "ro"]
+
+    def name():
+        return "".join(rng.choice(syllables) for _ in range(rng.randint(1, 3))).capitalize()
+
+    names = [(name(), name()) for _ in range(300)]
+    store = store_with(names, capacity=200)
+    index = NameIndex()
+    retained = list(enumerate(names))[-200:]
+    for query in ["a", "an", "ann", "mar", "lia", "jo se", "el ro", "rose", "x", "ia li"]:
+        terms = normalize_query(query)
+        expected = sorted(((match_rank(terms, first, last), -position, f"sub_{position}")
+                           for position, (first, last) in retained if match_rank(terms, first, last) is not None))
+        assert ids(index.search(store, query, 500)) == [submission_id for _, _, submission_id in expected], query
@@ -0,0 +1,84 @@
+"""
+Sampling profiler tests for Random Corp API
+Event-loop and thread-pool stacks, task labels, one profile at a time and cancellation
+"""
+
+import time
+import asyncio
+import threading
+from collections import Counter
+import pytest
+import profiler
+from profiler import ProfilerBusy, StackSampler, profile, to_collapsed
+
+
+def busy_loop_work(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def busy_thread_work(seconds: float):
+    busy_loop_work(seconds)
+
+
+def test_collapsed_format_is_most_common_first():
+    counts = Counter({"event-loop;main (a.py:1)": 2, "event-loop;main (a.py:1);work (a.py:5)": 7})
+    assert to_collapsed(counts) == "event-loop;main (a.py:1);work (a.py:5) 7\nevent-loop;main (a.py:1) 2\n"
+    assert to_collapsed(Counter()) == ""
+
+
+def test_samples_the_event_loop_with_task_names_and_pool_threads():
+    async def scenario():
+        loop_thread = threading.get_ident()
+
+        async def request_handler():
+            await asyncio.sleep(0.02)
+            busy_loop_work(0.15)
+
+        offloaded = asyncio.create_task(asyncio.to_thread(busy_thread_work, 0.3))
+        sampling = asyncio.create_task(profile(0.12, 0.002, loop_thread))
+        await asyncio.create_task(request_handler(), name="submit-handler")
+        await offloaded
+        return await sampling
+
+    counts = asyncio.run(scenario())
+    stacks = list(counts.elements())
+    assert any(stack.startswith("event-loop;task:submit-handler;") and "busy_loop_work (test_profiler.py:" in stack
+               for stack in stacks)
+    assert any(stack.startswith("thread:") and "busy_thread_work" in stack for stack in stacks)
+    assert not any("stack-sampler" in stack.split(";")[0] for stack in stacks)
+
+
+def test_frame_labels_never_contain_the_separator():
+    sampler = StackSampler(interval=0.001, loop_thread_id=None)
+    assert sampler._thread_label(123, {123: "odd;name"}) == "thread:odd:name"
+
+
+def test_only_one_profile_runs_at_a_time():
+    async def scenario():
+        first = asyncio.create_task(profile(0.1, 0.01, None))
+        await asyncio.sleep(0.01)
+        with pytest.raises(ProfilerBusy):
+            await profile(0.1, 0.01, None)
+        await first
+        # Free again once the sampler thread has exited
+        while profiler._profile_running:
+            await asyncio.sleep(0.01)
+        await profile(0.01, 0.005, None)
+    asyncio.run(scenario())
+
+
+def test_cancelling_the_request_stops_sampling_early():
+    async def scenario():
+        task = asyncio.create_task(profile(30, 0.01, None))
+        await asyncio.sleep(0.05)
+        started = time.perf_counter()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        while profiler._profile_running:
+            await asyncio.sleep(0.01)
+        return time.perf_counter() - started
+
+    assert asyncio.run(scenario()) < 1.0
@@ -0,0 +1,347 @@
+"""
+Read cache tests for Random Corp API
+RESP parsing, the cross-replica SET NX lock, version-bump invalidation and single-flight loads
+
+Run from api/ (or the repository root): python -m pytest tests
+Each test drives its own event loop with asyncio.run; the Redis side is a
+small in-process RESP server, so no Redis install is needed.
+"""
+
+import time
+import asyncio
+from typing import Dict, List, Optional, Tuple
+import pytest
+from read_cache import MemoryBackend, ReadCache, RedisBackend, RedisError, backend_from_url
+
+
+class RespServer:
+    """Just enough of Redis for RedisBackend: AUTH, SELECT, GET, SET [PX ms] [NX] and INCR"""
+
+    def __init__(self, password: Optional[str] = None):
+        self.password = password
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.commands: List[List[bytes]] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def __aenter__(self) -> "RespServer":
+        self._server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._server.close()
+        await self._server.wait_closed()
+
+    @property
+    def url(self) -> str:
+        return "redis://127.0.0.1:%d" % self._server.sockets[0].getsockname()[1]
+
+    def _live(self, key: bytes) -> Optional[bytes]:
+        value, expires = self.data.get(key, (None, None))
+        if expires is not None and expires <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def _execute(self, args: List[bytes]) -> bytes:
+        name, args = args[0].upper(), args[1:]
+        if name == b"AUTH":
+            return b"+OK\r\n" if args[0].decode() == self.password else b"-WRONGPASS invalid password\r\n"
+        if name == b"SELECT":
+            return b"+OK\r\n"
+        if name == b"GET":
+            value = self._live(args[0])
+            return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+        if name == b"SET":
+            key, value, options = args[0], args[1], [arg.upper() for arg in args[2:]]
+            if b"NX" in options and self._live(key) is not None:
+                return b"$-1\r\n"
+            expires = None
+            if b"PX" in options:
+                expires = time.monotonic() + int(options[options.index(b"PX") + 1]) / 1000
+            self.data[key] = (value, expires)
+            return b"+OK\r\n"
+        if name == b"INCR":
+            value = int(self._live(args[0]) or 0) + 1
+            self.data[args[0]] = (str(value).encode(), None)
+            return b":%d\r\n" % value
+        return b"-ERR unknown command '%s'\r\n" % name
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                header = await reader.readline()
+                if not header:
+                    break
+                args = []
+                for _ in range(int(header[1:-2])):
+                    length = int((await reader.readline())[1:-2])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                self.commands.append(args)
+                writer.write(self._execute(args))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def parse(data: bytes):
+    """Parse one reply from raw bytes with RedisBackend's reader"""
+    async def read():
+        backend = RedisBackend("redis://localhost")
+        backend._reader = asyncio.StreamReader()
+        backend._reader.feed_data(data)
+        backend._reader.feed_eof()
+        return await backend._read_reply()
+    return asyncio.run(read())
+
+
+def test_resp_parser_replies():
+    assert parse(b"+OK\r\n") == b"OK"
+    assert parse(b":42\r\n") == 42
+    assert parse(b":-1\r\n") == -1
+    assert parse(b"$5\r\nhello\r\n") == b"hello"
+    assert parse(b"$0\r\n\r\n") == b""
+    assert parse(b"$-1\r\n") is None
+    # Bulk strings are length-prefixed, so CRLF inside the payload is data
+    assert parse(b"$4\r\na\r\nb\r\n") == b"a\r\nb"
+    assert parse(b"*3\r\n$1\r\na\r\n:1\r\n$-1\r\n") == [b"a", 1, None]
+    assert parse(b"*2\r\n*1\r\n+x\r\n*0\r\n") == [[b"x"], []]
+    assert parse(b"*-1\r\n") is None
+
+
+def test_resp_parser_errors():
+    with pytest.raises(RedisError, match="WRONGTYPE"):
+        parse(b"-WRONGTYPE Operation against a key\r\n")
+    with pytest.raises(ConnectionError):
+        parse(b"")
+    with pytest.raises(ConnectionError):
+        parse(b"+OK")
+    with pytest.raises(ConnectionError):
+        parse(b"!weird\r\n")
+
+
+def test_resp_encoding():
+    assert RedisBackend._encode(["SET", "k", b"v\r\n", "PX", 250]) == (
+        b"*5\r\n$3\r\nSET\r\n$1\r\nk\r\n$3\r\nv\r\n\r\n$2\r\nPX\r\n$3\r\n250\r\n")
+
+
+def test_redis_backend_commands():
+    async def scenario():
+        async with RespServer(password="s3cret") as server:
+            backend = RedisBackend(server.url.replace("redis://", "redis://:s3cret@") + "/2")
+            try:
+                assert await backend.get("missing") is None
+                assert await backend.set("k", b"v", 1000) is True
+                assert await backend.get("k") == b"v"
+                assert await backend.set("k", b"other", 1000, only_if_absent=True) is False
+                assert await backend.get("k") == b"v"
+                assert await backend.incr("n") == 1
+                assert await backend.incr("n") == 2
+                with pytest.raises(RedisError):
+                    await backend.command("FLUSHALL")
+                # An error reply leaves the connection usable
+                assert await backend.get("k") == b"v"
+            finally:
+                await backend.close()
+            assert server.commands[0] == [b"AUTH", b"s3cret"]
+            assert server.commands[1] == [b"SELECT", b"2"]
+    asyncio.run(scenario())
+
+
+def test_backend_from_url():
+    assert backend_from_url("") is None
+    assert isinstance(backend_from_url("memory://"), MemoryBackend)
+    backend = backend_from_url("unix:///run/redis.sock?db=3")
+    assert (backend.unix_path, backend.db) == ("/run/redis.sock", 3)
+    with pytest.raises(ValueError):
+        backend_from_url("memcached://localhost")
+
+
+async def shared_backends(server: Optional[RespServer]):
+    """Two replicas' views of one L2: a shared MemoryBackend, or one connection each to the RESP server"""
+    if server is None:
+        backend = MemoryBackend()
+        return backend, backend
+    return RedisBackend(server.url, timeout=1.0), RedisBackend(server.url, timeout=1.0)
+
+
+async def with_l2(scenario, use_resp: bool):
+    if not use_resp:
+        await scenario(*await shared_backends(None))
+        return
+    async with RespServer() as server:
+        first, second = await shared_backends(server)
+        try:
+            await scenario(first, second)
+        finally:
+            await first.close()
+            await second.close()
+
+
+class Loader:
+    """Counts calls; optionally blocks until released"""
+
+    def __init__(self, value: Optional[bytes], gate: Optional[asyncio.Event] = None):
+        self.value = value
+        self.gate = gate
+        self.calls = 0
+
+    async def __call__(self) -> Optional[bytes]:
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        return self.value
+
+
+@pytest.mark.parametrize("use_resp", [False, True], ids=["memory", "resp"])
+def test_set_nx_lock_loads_once_across_replicas(use_resp):
+    async def scenario(first_backend, second_backend):
+        first = ReadCache(first_backend, lock_wait=1.0)
+        second = ReadCache(second_backend, lock_wait=1.0)
+        gate = asyncio.Event()
+        first_loader, second_loader = Loader(b"page", gate), Loader(b"unused")
+
+        loading = asyncio.create_task(first.get_or_load("submissions", "10", first_loader))
+        while first_loader.calls == 0:
+            await asyncio.sleep(0.01)
+        # The first replica holds the lock, so the second polls L2 instead of loading
+        waiting = asyncio.create_task(second.get_or_load("submissions", "10", second_loader))
+        await asyncio.sleep(0.05)
+        gate.set()
+
+        assert await loading == b"page"
+        assert await waiting == b"page"
+        assert second_loader.calls == 0
+    asyncio.run(with_l2(scenario, use_resp))
+
+
+def test_lock_wait_expires_into_a_local_load():
+    async def scenario():
+        backend = MemoryBackend()
+        await backend.set("randomcorp:read:0:stats::lock", b"1", 10_000, only_if_absent=True)
+        cache = ReadCache(backend, lock_wait=0.05)
+        loader = Loader(b"stats")
+        assert await cache.get_or_load("stats", "", loader) == b"stats"
+        assert loader.calls == 1
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("use_resp", [False, True], ids=["memory", "resp"])
+def test_version_bump_invalidates_other_replicas(use_resp):
+    async def scenario(first_backend, second_backend):
+        writer = ReadCache(first_backend, version_refresh=0.0)
+        reader = ReadCache(second_backend, version_refresh=0.0)
+
+        assert await writer.get_or_load("stats", "", Loader(b"before")) == b"before"
+        stale = Loader(b"unused")
+        assert await reader.get_or_load("stats", "", stale) == b"before"
+        assert stale.calls == 0
+
+        writer.mark_written()
+        writer.mark_written()
+        await writer._bump_task
+        assert writer._l2_version == 1, "a burst of writes is one INCR"
+
+        fresh = Loader(b"after")
+        assert await reader.get_or_load("stats", "", fresh) == b"after"
+        assert fresh.calls == 1
+    asyncio.run(with_l2(scenario, use_resp))
+
+
+def test_unpublished_write_bypasses_l2():
+    async def scenario():
+        backend = MemoryBackend()
+        cache = ReadCache(backend, version_refresh=0.0)
+        await backend.set("randomcorp:read:0:stats:", b"cached", 10_000)
+        cache._bumps_pending = True
+        loader = Loader(b"loaded")
+        assert await cache.get_or_load("stats", "", loader) == b"loaded"
+        assert loader.calls == 1
+    asyncio.run(scenario())
+
+
+def test_single_flight_shares_one_load():
+    async def scenario():
+        cache = ReadCache()
+        gate = asyncio.Event()
+        loader = Loader(b"page", gate)
+        tasks = [asyncio.create_task(cache.get_or_load("submissions", "10", loader)) for _ in range(5)]
+        await asyncio.sleep(0.01)
+        gate.set()
+        assert await asyncio.gather(*tasks) == [b"page"] * 5
+        assert loader.calls == 1
+        assert len(cache) == 1
+    asyncio.run(scenario())
+
+
+def test_cancelled_leader_hands_the_load_to_a_waiter():
+    async def scenario():
+        cache = ReadCache()
+        gate = asyncio.Event()
+        loader = Loader(b"page", gate)
+        leader = asyncio.create_task(cache.get_or_load("submissions", "10", loader))
+        await asyncio.sleep(0.01)
+        waiters = [asyncio.create_task(cache.get_or_load("submissions", "10", loader)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+
+        leader.cancel()
+        await asyncio.sleep(0.01)
+        gate.set()
+
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert await asyncio.gather(*waiters) == [b"page"] * 3
+        assert loader.calls == 2, "one waiter reloads, the others share its load"
+        assert cache._inflight == {}
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_load_running():
+    async def scenario():
+        cache = ReadCache()
+        gate = asyncio.Event()
+        loader = Loader(b"page", gate)
+        leader = asyncio.create_task(cache.get_or_load("submissions", "10", loader))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(cache.get_or_load("submissions", "10", loader))
+        await asyncio.sleep(0.01)
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        gate.set()
+        assert await leader == b"page"
+        assert loader.calls == 1
+    asyncio.run(scenario())
+
+
+def test_loader_errors_reach_waiters_and_are_not_cached():
+    async def scenario():
+        cache = ReadCache()
+        gate = asyncio.Event()
+
+        async def failing():
+            await gate.wait()
+            raise RuntimeError("database down")
+
+        tasks = [asyncio.create_task(cache.get_or_load("stats", "", failing)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        gate.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert len(cache) == 0
+        assert await cache.get_or_load("stats", "", Loader(b"ok")) == b"ok"
+    asyncio.run(scenario())
+
+
+def test_l1_is_bounded():
+    async def scenario():
+        cache = ReadCache(max_entries=2)
+        for params in ("a", "b", "c"):
+            await cache.get_or_load("submissions", params, Loader(params.encode()))
+        assert len(cache) == 2
+        uncacheable = Loader(None)
+        assert await cache.get_or_load("submissions", "d", uncacheable) is None
+        assert len(cache) == 2
+    asyncio.run(scenario())
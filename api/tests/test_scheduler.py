@@ -0,0 +1,231 @@
+"""
+Background job scheduler tests for Random Corp API
+No overlapping runs, overrun and timeout handling, leader-only scopes and cluster leader step-down
+"""
+
+import asyncio
+import pytest
+import scheduler as scheduler_module
+from metrics import SCHEDULER_JOB_SKIPPED
+from scheduler import CLUSTER, HOST, Job, LeaderElection, Scheduler
+
+
+class HostLeader:
+    """Stands in for the worker state's host leader lock"""
+
+    def __init__(self, leader: bool = True):
+        self.leader = leader
+
+    def is_leader(self) -> bool:
+        return self.leader
+
+
+class LockConnection:
+    def __init__(self):
+        self.alive = True
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class LockDatabase:
+    """One session-owned lock shared by every election, like sp_getapplock across replicas"""
+
+    def __init__(self):
+        self.pool = object()
+        self.holder = None
+
+    async def acquire_session_lock(self, resource):
+        if self.holder is not None and self.holder.alive and not self.holder.closed:
+            return None
+        self.holder = LockConnection()
+        return self.holder
+
+    async def session_lock_held(self, conn, resource):
+        if not conn.alive:
+            raise ConnectionError("connection lost")
+        return conn is self.holder
+
+
+@pytest.fixture
+def host_leader(monkeypatch):
+    state = HostLeader()
+    monkeypatch.setattr(scheduler_module, "get_worker_state", lambda: state)
+    return state
+
+
+@pytest.fixture
+def lock_database(monkeypatch):
+    database = LockDatabase()
+    monkeypatch.setenv("DB_HOST", "sqlserver")
+    monkeypatch.setattr(scheduler_module, "get_db_manager", lambda: database)
+    return database
+
+
+def test_unknown_scope_is_rejected():
+    with pytest.raises(ValueError):
+        Job("bad", lambda: None, 1, scope="galaxy")
+
+
+def test_job_names_are_unique():
+    scheduler = Scheduler()
+    with pytest.raises(ValueError):
+        scheduler.add_job("leader-election", lambda: None, 1)
+
+
+def test_a_running_job_is_not_started_again(host_leader):
+    async def scenario():
+        gate = asyncio.Event()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await gate.wait()
+
+        scheduler = Scheduler()
+        job = scheduler.add_job("overlap-test", slow, 60)
+        first = asyncio.create_task(scheduler.run(job))
+        await asyncio.sleep(0)
+        assert job.running
+        assert await scheduler.run(job) is False
+        gate.set()
+        assert await first is True
+        assert (len(calls), job.runs, job.skipped, job.running) == (1, 1, 1, False)
+        assert SCHEDULER_JOB_SKIPPED.value(("overlap-test", "overlap")) == 1
+    asyncio.run(scenario())
+
+
+def test_overrunning_jobs_delay_the_next_run_instead_of_overlapping(host_leader):
+    async def scenario():
+        active, most = 0, 0
+
+        async def overruns():
+            nonlocal active, most
+            active += 1
+            most = max(most, active)
+            await asyncio.sleep(0.03)
+            active -= 1
+
+        scheduler = Scheduler(election_interval=60)
+        job = scheduler.add_job("overrun-test", overruns, 0.01, jitter=0, run_on_start=True)
+        await scheduler.start()
+        await asyncio.sleep(0.2)
+        await scheduler.stop()
+        assert most == 1
+        assert job.runs >= 3
+        assert job.skipped >= job.runs - 1
+        assert SCHEDULER_JOB_SKIPPED.value(("overrun-test", "overrun")) == job.skipped
+    asyncio.run(scenario())
+
+
+def test_timeouts_and_failures_are_recorded(host_leader):
+    async def scenario():
+        async def hangs():
+            await asyncio.sleep(10)
+
+        outcomes = [RuntimeError("database unavailable"), None]
+
+        async def flaky():
+            error = outcomes.pop(0)
+            if error:
+                raise error
+
+        scheduler = Scheduler()
+        hanging = scheduler.add_job("timeout-test", hangs, 60, timeout=0.01)
+        assert await scheduler.run(hanging) is False
+        assert hanging.status()["last_error"].startswith("timed out")
+        assert (hanging.failures, hanging.running) == (1, False)
+
+        job = scheduler.add_job("failure-test", flaky, 60)
+        assert await scheduler.run(job) is False
+        assert job.last_error == "database unavailable"
+        assert await scheduler.run(job) is True
+        assert (job.runs, job.failures, job.last_error) == (2, 1, None)
+    asyncio.run(scenario())
+
+
+def test_leader_scoped_jobs_only_run_on_the_leader(host_leader, monkeypatch):
+    monkeypatch.delenv("DB_HOST", raising=False)
+
+    async def scenario():
+        calls = []
+
+        async def record():
+            calls.append(1)
+
+        scheduler = Scheduler()
+        host_job = scheduler.add_job("host-test", record, 60, scope=HOST)
+        cluster_job = scheduler.add_job("cluster-test", record, 60, scope=CLUSTER)
+
+        host_leader.leader = False
+        await scheduler.election.refresh()
+        assert await scheduler.run(host_job) is False
+        assert await scheduler.run(cluster_job) is False
+        assert SCHEDULER_JOB_SKIPPED.value(("cluster-test", "not_leader")) == 1
+
+        # Without a database the host leader is the cluster leader
+        host_leader.leader = True
+        await scheduler.election.refresh()
+        assert await scheduler.run(host_job) is True
+        assert await scheduler.run(cluster_job) is True
+        assert len(calls) == 2
+    asyncio.run(scenario())
+
+
+def test_one_cluster_leader_and_step_down_when_its_lock_is_lost(host_leader, lock_database):
+    async def scenario():
+        first, second = LeaderElection(), LeaderElection()
+        assert await first.refresh() is True
+        assert await second.refresh() is False
+        assert await first.refresh() is True, "a held lock is kept"
+
+        # A dropped lock connection is noticed on the next refresh; the lock is free, so it is taken again
+        lost = lock_database.holder
+        lost.alive = False
+        assert await first.refresh() is True
+        assert lost.closed
+        assert first.changes == 3
+
+        # This time another replica gets there first, and the old leader steps down
+        lock_database.holder.alive = False
+        assert await second.refresh() is True
+        assert await first.refresh() is False
+        assert (first.leader, second.leader) == (False, True)
+    asyncio.run(scenario())
+
+
+def test_losing_host_leadership_drops_the_cluster_lock(host_leader, lock_database):
+    async def scenario():
+        election = LeaderElection()
+        assert await election.refresh() is True
+        held = lock_database.holder
+        host_leader.leader = False
+        assert await election.refresh() is False
+        assert held.closed
+
+        other = LeaderElection()
+        host_leader.leader = True
+        assert await other.refresh() is True
+    asyncio.run(scenario())
+
+
+def test_stop_gives_run_on_stop_jobs_a_final_run_and_releases_leadership(host_leader, lock_database):
+    async def scenario():
+        calls = []
+
+        async def flush():
+            calls.append(1)
+
+        scheduler = Scheduler(election_interval=60)
+        scheduler.add_job("flush-test", flush, 60, run_on_stop=True)
+        await scheduler.start()
+        await asyncio.sleep(0.01)
+        assert scheduler.election.leader
+        held = lock_database.holder
+        await scheduler.stop()
+        assert calls == [1]
+        assert not scheduler.election.leader
+        assert held.closed
+        assert {job["name"] for job in scheduler.status()} == {"leader-election", "flush-test"}
+    asyncio.run(scenario())
@@ -0,0 +1,84 @@
+"""
+Server entrypoint tests for Random Corp API
+Worker count from the CPU quota, uvicorn options from the environment and the early stream shutdown
+"""
+
+import os
+import signal
+import pytest
+import uvicorn
+import broadcast
+import server
+from broadcast import BroadcastHub
+from server import DrainingServer, build_config, cgroup_cpu_limit, default_workers
+
+
+def cgroup_files(monkeypatch, files):
+    monkeypatch.setattr(server, "_read", lambda path: files.get(path))
+
+
+@pytest.mark.parametrize("files, limit", [
+    ({"/sys/fs/cgroup/cpu.max": "150000 100000"}, 1.5),
+    ({"/sys/fs/cgroup/cpu.max": "max 100000"}, None),
+    ({"/sys/fs/cgroup/cpu/cpu.cfs_quota_us": "50000", "/sys/fs/cgroup/cpu/cpu.cfs_period_us": "100000"}, 0.5),
+    ({"/sys/fs/cgroup/cpu/cpu.cfs_quota_us": "-1", "/sys/fs/cgroup/cpu/cpu.cfs_period_us": "100000"}, None),
+    ({}, None),
+])
+def test_cgroup_cpu_limit(monkeypatch, files, limit):
+    cgroup_files(monkeypatch, files)
+    assert cgroup_cpu_limit() == limit
+
+
+@pytest.mark.parametrize("quota, workers", [("50000 100000", 1), ("250000 100000", 3), ("max 100000", 8)])
+def test_default_workers_round_the_quota_up(monkeypatch, quota, workers):
+    cgroup_files(monkeypatch, {"/sys/fs/cgroup/cpu.max": quota})
+    monkeypatch.setattr(server.os, "sched_getaffinity", lambda pid: set(range(8)), raising=False)
+    assert default_workers() == workers
+
+
+def test_build_config_from_the_environment(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    monkeypatch.setenv("PORT", "9000")
+    monkeypatch.setenv("LIMIT_CONCURRENCY", "500")
+    monkeypatch.setenv("ACCESS_LOG", "false")
+    monkeypatch.delenv("SHARED_STATE_NAME", raising=False)
+
+    config = build_config()
+    assert (config["workers"], config["port"], config["limit_concurrency"]) == (3, 9000, 500)
+    assert config["access_log"] is False
+    assert config["log_config"] is None
+    assert config["loop"] in ("uvloop", "asyncio") and config["http"] in ("httptools", "h11")
+    # Every worker must agree on these, so they are exported for the worker processes
+    assert os.environ["WEB_CONCURRENCY"] == "3"
+    assert os.environ["SHARED_STATE_NAME"] == f"randomcorp-{os.getpid()}"
+
+
+def test_worker_count_defaults_to_the_cpu_quota(monkeypatch):
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    monkeypatch.delenv("LIMIT_CONCURRENCY", raising=False)
+    monkeypatch.delenv("SHARED_STATE_NAME", raising=False)
+    monkeypatch.setattr(server, "default_workers", lambda: 2)
+    config = build_config()
+    assert config["workers"] == 2
+    assert config["limit_concurrency"] is None
+    assert os.environ["WEB_CONCURRENCY"] == "2"
+
+
+def test_first_exit_signal_closes_event_streams(monkeypatch):
+    hub = BroadcastHub()
+    subscriber = hub.subscribe()
+    monkeypatch.setattr(broadcast, "broadcast_hub", hub)
+
+    calls = []
+    real_begin_shutdown = server.begin_shutdown
+    monkeypatch.setattr(server, "begin_shutdown", lambda: calls.append(1) or real_begin_shutdown())
+
+    draining = DrainingServer(uvicorn.Config("main:app"))
+    draining.handle_exit(signal.SIGTERM, None)
+    assert draining.should_exit
+    assert subscriber.closed
+    assert hub.subscribe() is None
+
+    # A repeated signal does not run the shutdown work again
+    draining.handle_exit(signal.SIGTERM, None)
+    assert calls == [1]
@@ -0,0 +1,100 @@
+"""
+Cross-worker shared state tests for Random Corp API
+Shared segments and their attach counts, the shared start time and data version, and host leadership
+"""
+
+import os
+import uuid
+import tempfile
+from multiprocessing import shared_memory
+import pytest
+import shared_state
+from shared_state import SharedSegment, WorkerState, per_worker_path
+
+
+@pytest.fixture(autouse=True)
+def lock_dir(tmp_path, monkeypatch):
+    """Keep lock files out of the real temp directory"""
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+
+
+@pytest.fixture
+def workers(monkeypatch):
+    """Multi-worker mode under a name no other test or server uses"""
+    monkeypatch.setattr(shared_state, "WORKERS", 4)
+    monkeypatch.setenv("SHARED_STATE_NAME", f"randomcorp-test-{uuid.uuid4().hex[:12]}")
+
+
+def segment_exists(name: str) -> bool:
+    try:
+        segment = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return False
+    segment.close()
+    return True
+
+
+def test_segments_are_shared_and_unlinked_by_the_last_close():
+    name = f"randomcorp-test-{uuid.uuid4().hex[:12]}"
+    first, second = SharedSegment(name, 16), SharedSegment(name, 16)
+    assert (first.created, second.created) == (True, False)
+
+    first.data[:5] = b"hello"
+    assert bytes(second.data[:5]) == b"hello"
+
+    first.close()
+    assert segment_exists(name)
+    second.close()
+    assert not segment_exists(name)
+
+
+def test_attaching_with_a_larger_size_is_rejected():
+    name = f"randomcorp-test-{uuid.uuid4().hex[:12]}"
+    segment = SharedSegment(name, 16)
+    try:
+        with pytest.raises(ValueError):
+            SharedSegment(name, 1 << 20)
+    finally:
+        segment.close()
+
+
+def test_single_worker_mode_shares_nothing(monkeypatch):
+    monkeypatch.setattr(shared_state, "WORKERS", 1)
+    state = WorkerState()
+    assert state.segment is None and state.is_leader()
+    state.bump_data_version()
+    assert state.data_version() == 1
+    assert per_worker_path("submissions.log") == "submissions.log"
+
+
+def test_workers_share_start_time_and_data_version(workers):
+    first = WorkerState()
+    second = WorkerState()
+    try:
+        assert first.start_time == second.start_time
+        first.bump_data_version()
+        second.bump_data_version()
+        assert first.data_version() == second.data_version() == 2
+    finally:
+        first.close()
+        second.close()
+
+
+def test_one_host_leader_and_takeover_when_it_exits(workers):
+    first, second = WorkerState(), WorkerState()
+    try:
+        assert first.is_leader()
+        assert not second.is_leader()
+        assert first.is_leader(), "leadership is kept once taken"
+
+        first.close()
+        assert second.is_leader()
+    finally:
+        first.close()
+        second.close()
+
+
+def test_per_worker_paths(workers):
+    assert per_worker_path("logs/submissions.log") == f"logs/submissions.{os.getpid()}.log"
+    assert per_worker_path("traces") == f"traces.{os.getpid()}"
+    assert per_worker_path(os.devnull) == os.devnull
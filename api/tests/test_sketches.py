@@ -0,0 +1,141 @@
+"""
+Quantile sketch tests for Random Corp API
+Relative-error bounds, exact merges, serialization round-trips and minute windows
+"""
+
+import json
+import time
+import random
+import pytest
+from sketches import ProcessingTimeSketches, QuantileSketch, WindowedSketch, merged
+
+ACCURACY = 0.01
+
+
+def exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def sample(seed: int, size: int = 5000):
+    rng = random.Random(seed)
+    return [rng.lognormvariate(-2.0, 0.8) for _ in range(size)]
+
+
+def test_quantiles_are_within_the_relative_accuracy():
+    values = sample(1)
+    sketch = QuantileSketch(ACCURACY)
+    for value in values:
+        sketch.add(value)
+    for q in (0.5, 0.9, 0.99, 0.999):
+        assert sketch.quantile(q) == pytest.approx(exact_quantile(values, q), rel=ACCURACY)
+    assert sketch.count == len(values)
+    assert sketch.total == pytest.approx(sum(values))
+    assert sketch.quantile(0.0) == pytest.approx(min(values), rel=ACCURACY)
+    assert sketch.quantile(1.0) == max(values)
+
+
+def test_empty_and_zero_values():
+    sketch = QuantileSketch(ACCURACY)
+    assert sketch.quantile(0.5) is None
+    sketch.add(0.0, count=3)
+    sketch.add(0.2)
+    assert sketch.quantile(0.5) == 0.0
+    assert sketch.quantile(1.0) == pytest.approx(0.2, rel=ACCURACY)
+
+
+def test_weighted_add_matches_repeated_adds():
+    weighted, repeated = QuantileSketch(ACCURACY), QuantileSketch(ACCURACY)
+    weighted.add(0.15, count=4)
+    for _ in range(4):
+        repeated.add(0.15)
+    assert weighted.to_dict() == repeated.to_dict()
+
+
+def test_merge_equals_one_sketch_over_all_values():
+    first, second = sample(2), sample(3)
+    left, right, whole = QuantileSketch(ACCURACY), QuantileSketch(ACCURACY), QuantileSketch(ACCURACY)
+    for value in first:
+        left.add(value)
+        whole.add(value)
+    for value in second:
+        right.add(value)
+        whole.add(value)
+    combined = merged([left, right], ACCURACY)
+    assert combined.buckets == whole.buckets
+    assert combined.count == whole.count
+    assert (combined.min, combined.max) == (whole.min, whole.max)
+    for q in (0.5, 0.99):
+        assert combined.quantile(q) == whole.quantile(q)
+
+
+def test_merging_different_accuracies_is_rejected():
+    with pytest.raises(ValueError):
+        QuantileSketch(0.01).merge(QuantileSketch(0.02))
+
+
+def test_serialization_round_trip_through_json():
+    sketch = QuantileSketch(ACCURACY)
+    for value in sample(4, 500):
+        sketch.add(value)
+    restored = QuantileSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+    assert restored.buckets == sketch.buckets
+    assert (restored.count, restored.zero_count, restored.min, restored.max) == \
+        (sketch.count, sketch.zero_count, sketch.min, sketch.max)
+    assert restored.quantile(0.9) == sketch.quantile(0.9)
+
+    empty = QuantileSketch.from_dict(QuantileSketch(ACCURACY).to_dict())
+    assert empty.quantile(0.5) is None
+    empty.add(0.1)
+    assert empty.min == 0.1
+
+
+def test_windows_cover_only_recent_minutes():
+    windowed = WindowedSketch(ACCURACY, retention_minutes=60)
+    now = 1_700_000_000.0
+    windowed.add(1.0, now=now - 30 * 60)
+    windowed.add(0.1, count=2, now=now - 2 * 60)
+    windowed.add(0.2, now=now)
+
+    assert windowed.window(None).count == 4
+    assert windowed.window(5, now).count == 3
+    assert windowed.window(60, now).count == 4
+    assert windowed.window(5, now).quantile(1.0) == pytest.approx(0.2, rel=ACCURACY)
+
+
+def test_old_minutes_are_pruned_but_stay_in_the_total():
+    windowed = WindowedSketch(ACCURACY, retention_minutes=60)
+    now = 1_700_000_000.0
+    windowed.add(0.5, now=now - 120 * 60)
+    windowed.add(0.5, now=now)
+    assert len(windowed.minutes) == 1
+    assert windowed.total.count == 2
+
+
+def test_windowed_merge_and_round_trip():
+    now = 1_700_000_000.0
+    first, second = WindowedSketch(ACCURACY), WindowedSketch(ACCURACY)
+    first.add(0.1, now=now)
+    second.add(0.3, now=now)
+    second.add(0.4, now=now - 10 * 60)
+    first.merge(second)
+    assert first.window(5, now).count == 2
+    assert first.window(None).count == 3
+
+    restored = WindowedSketch.from_dict(json.loads(json.dumps(first.to_dict())), ACCURACY)
+    assert restored.window(60, now).count == 3
+    assert restored.window(5, now).quantile(0.5) == first.window(5, now).quantile(0.5)
+
+
+def test_processing_time_summary_merges_local_and_remote():
+    sketches = ProcessingTimeSketches(relative_accuracy=ACCURACY)
+    sketches.record(0.2, count=3)
+    remote = sketches.empty()
+    remote.add(0.4, count=5, now=time.time() - 30 * 60)
+    sketches.remote = sketches.decode(sketches.encode(remote))
+
+    summary = sketches.summary()
+    assert set(summary) == {"all_time", "last_5m", "last_1h"}
+    assert (summary["last_5m"]["count"], summary["last_1h"]["count"], summary["all_time"]["count"]) == (3, 8, 8)
+    assert summary["last_5m"]["p50"] == pytest.approx(0.2, rel=ACCURACY)
+    assert summary["last_1h"]["p50"] == pytest.approx(0.4, rel=ACCURACY)
@@ -0,0 +1,100 @@
+"""
+Coalescing stats updater tests for Random Corp API
+Many submissions become one statistics write per interval; failed deltas are kept for the next flush
+"""
+
+import asyncio
+import pytest
+import stats_updater as stats_updater_module
+from stats_updater import CoalescingStatsUpdater
+
+
+class StatisticsDatabase:
+    """Records increment_statistics calls; fails while `failing` is set"""
+
+    def __init__(self):
+        self.pool = object()
+        self.increments = []
+        self.failing = False
+
+    async def increment_statistics(self, counters, values):
+        if self.failing:
+            raise ConnectionError("database unavailable")
+        self.increments.append(counters["submissions_processed"])
+        assert values["last_submission_at"]
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = StatisticsDatabase()
+    monkeypatch.setenv("DB_HOST", "sqlserver")
+    monkeypatch.setattr(stats_updater_module, "get_db_manager", lambda: database)
+    return database
+
+
+def test_marks_within_an_interval_are_coalesced(database):
+    async def scenario():
+        updater = CoalescingStatsUpdater(interval=0.05)
+        await updater.start()
+        updater.mark_dirty()
+        await asyncio.sleep(0.01)
+        for _ in range(10):
+            updater.mark_dirty()
+        updater.mark_dirty(count=5)
+        await asyncio.sleep(0.02)
+        assert database.increments == [1], "the rest waits out the interval"
+        await asyncio.sleep(0.06)
+        assert database.increments == [1, 15]
+        await updater.stop()
+        assert updater.flushes == 2
+    asyncio.run(scenario())
+
+
+def test_failed_flush_keeps_the_delta(database):
+    async def scenario():
+        updater = CoalescingStatsUpdater()
+        updater.mark_dirty(count=3)
+        database.failing = True
+        assert await updater.flush() is False
+        assert (updater.pending, updater.flush_failures) == (3, 1)
+
+        updater.mark_dirty()
+        database.failing = False
+        assert await updater.flush() is True
+        assert (database.increments, updater.pending) == ([4], 0)
+    asyncio.run(scenario())
+
+
+def test_stop_flushes_what_is_pending(database):
+    async def scenario():
+        updater = CoalescingStatsUpdater(interval=10)
+        await updater.start()
+        updater.mark_dirty()
+        await asyncio.sleep(0.01)
+        updater.mark_dirty(count=2)
+        await updater.stop()
+        assert database.increments == [1, 2]
+        assert updater.pending == 0
+    asyncio.run(scenario())
+
+
+def test_without_a_pool_the_delta_waits(database):
+    async def scenario():
+        database.pool = None
+        updater = CoalescingStatsUpdater()
+        updater.mark_dirty(count=2)
+        assert await updater.flush() is False
+        assert updater.pending == 2
+    asyncio.run(scenario())
+
+
+def test_demo_mode_discards_the_delta(monkeypatch):
+    monkeypatch.delenv("DB_HOST", raising=False)
+
+    async def scenario():
+        updater = CoalescingStatsUpdater()
+        updater.mark_dirty(count=2)
+        assert await updater.flush() is False
+        assert updater.pending == 0
+        assert await updater.flush() is True
+    asyncio.run(scenario())
@@ -0,0 +1,121 @@
+"""
+Submission log writer tests for Random Corp API
+Queued writes drained on stop, drops when full, byte-based rotation, file I/O off the loop and segment mode
+"""
+
+import os
+import json
+import asyncio
+import threading
+import pytest
+from log_segments import read_log
+from submission_log import SubmissionLogWriter
+
+
+def lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line.split(" - ", 1)[1]) for line in f]
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        SubmissionLogWriter(str(tmp_path / "submissions.log"), log_format="csv")
+
+
+def test_entries_are_written_and_drained_on_stop(tmp_path):
+    path = str(tmp_path / "submissions.log")
+
+    async def scenario():
+        writer = SubmissionLogWriter(path, flush_interval=0.01)
+        await writer.start()
+        for index in range(5):
+            assert writer.write({"submission_id": f"sub_{index}"})
+        await asyncio.sleep(0.05)
+        # Queued after the last cycle: written by stop()'s drain
+        writer.write({"submission_id": "sub_5"})
+        await writer.stop()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert [entry["submission_id"] for entry in lines(path)] == [f"sub_{index}" for index in range(6)]
+    assert writer.stats()["lines_written"] == 6
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    writer = SubmissionLogWriter(str(tmp_path / "submissions.log"), queue_size=2)
+    assert [writer.write({"n": n}) for n in range(4)] == [True, True, False, False]
+    assert writer.stats()["lines_dropped"] == 2
+    assert writer.stats()["queue_depth"] == 2
+
+
+def test_rotates_by_encoded_bytes_and_keeps_backup_count(tmp_path):
+    path = str(tmp_path / "submissions.log")
+
+    async def scenario():
+        writer = SubmissionLogWriter(path, flush_interval=0.01, max_bytes=400, backup_count=2)
+        await writer.start()
+        for index in range(12):
+            writer.write({"submission_id": f"sub_{index}", "name": "Zoë Ñandú 名前"})
+            await asyncio.sleep(0.02)
+        await writer.stop()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert writer.rotations >= 3
+    assert sorted(os.listdir(tmp_path)) == ["submissions.log", "submissions.log.1", "submissions.log.2"]
+    for name in ("submissions.log.1", "submissions.log.2"):
+        size = os.path.getsize(tmp_path / name)
+        assert 400 <= size < 400 + 200
+    kept = lines(path + ".2") + lines(path + ".1") + lines(path)
+    ids = [int(entry["submission_id"][4:]) for entry in kept]
+    assert ids == list(range(ids[0], 12))
+
+
+def test_file_io_runs_off_the_event_loop_thread(tmp_path, monkeypatch):
+    path = str(tmp_path / "submissions.log")
+    threads = set()
+    real_write_text = SubmissionLogWriter._write_text
+    real_open = SubmissionLogWriter._open
+
+    def write_text(self, *args):
+        threads.add(threading.get_ident())
+        return real_write_text(self, *args)
+
+    def open_file(self):
+        threads.add(threading.get_ident())
+        return real_open(self)
+
+    monkeypatch.setattr(SubmissionLogWriter, "_write_text", write_text)
+    monkeypatch.setattr(SubmissionLogWriter, "_open", open_file)
+
+    async def scenario():
+        writer = SubmissionLogWriter(path, flush_interval=0.01, max_bytes=100)
+        await writer.start()
+        for index in range(5):
+            writer.write({"submission_id": f"sub_{index}"})
+            await asyncio.sleep(0.02)
+        await writer.stop()
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert threads and loop_thread not in threads
+
+
+def test_segment_format(tmp_path):
+    segment_dir = str(tmp_path / "segments")
+
+    async def scenario():
+        writer = SubmissionLogWriter(str(tmp_path / "unused.log"), flush_interval=0.01,
+                                     log_format="segment", segment_dir=segment_dir, segment_codec="gzip")
+        await writer.start()
+        for index in range(3):
+            writer.write({"submission_id": f"sub_{index}"})
+        await asyncio.sleep(0.05)
+        writer.write({"submission_id": "sub_3"})
+        await writer.stop()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert [record["submission_id"] for _, record in read_log(segment_dir)] == [f"sub_{index}" for index in range(4)]
+    assert writer.stats()["blocks_written"] >= 2
+    assert not os.path.exists(tmp_path / "unused.log")
@@ -0,0 +1,72 @@
+"""
+Submission row serializer tests for Random Corp API
+rows_to_json matches json.dumps byte for byte; page and search bodies agree on the stdlib and orjson paths
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+import submission_rows
+from submission_rows import SubmissionFilters, SubmissionRecord, as_utc, page_json, rows_to_json, search_json
+
+ROWS = [
+    SubmissionRecord("sub_1", "Ada", "Lovelace", "hello", "batch_1", 0.125,
+                     datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc)),
+    SubmissionRecord("sub_2", "Zoë", "O'Brien \"Jr\"", None, None, None, datetime(2024, 1, 2, 3, 4, 5)),
+    SubmissionRecord("sub_3", "名前", "Ñandú 🦤", "line\nbreak\ttab\\slash\x00 ", None, 0,
+                     datetime(2024, 6, 1, tzinfo=timezone(timedelta(hours=2)))),
+    SubmissionRecord("sub_4", "", " ", "", "", 12.5, None),
+    # pyodbc rows are plain sequences in SUBMISSION_COLUMNS order
+    ("sub_5", "Alan", "Turing", "</script>", "b", 1 / 3, datetime(2024, 1, 1)),
+]
+
+
+def expected_json(rows) -> str:
+    return json.dumps([SubmissionRecord._make(row).to_dict() for row in rows], separators=(",", ":"))
+
+
+def test_matches_json_dumps_byte_for_byte():
+    assert rows_to_json(ROWS) == expected_json(ROWS)
+    for row in ROWS:
+        assert rows_to_json([row]) == expected_json([row])
+
+
+def test_empty_and_generator_input():
+    assert rows_to_json([]) == "[]"
+    assert rows_to_json(row for row in ROWS) == expected_json(ROWS)
+
+
+@pytest.mark.parametrize("value", [float("inf"), float("-inf"), float("nan")])
+def test_non_finite_processing_time_is_null(value):
+    row = ROWS[0]._replace(processing_time=value)
+    assert json.loads(rows_to_json([row]))[0]["processing_time"] is None
+    assert json.loads(page_json([row], 1, 10, 0))["submissions"][0]["processing_time"] is None
+
+
+@pytest.mark.parametrize("use_orjson", [False, True])
+def test_page_and_search_bodies(monkeypatch, use_orjson):
+    if use_orjson and submission_rows.orjson is None:
+        pytest.skip("orjson is not installed")
+    if not use_orjson:
+        monkeypatch.setattr(submission_rows, "orjson", None)
+    submissions = json.loads(expected_json(ROWS))
+
+    page = json.loads(page_json(ROWS, total=7, limit=5, offset=0))
+    assert page == {"submissions": submissions, "count": 5, "total": 7, "limit": 5, "offset": 0, "has_more": True}
+    assert json.loads(page_json(ROWS, total=7, limit=5, offset=2))["has_more"] is False
+
+    search = json.loads(search_json(ROWS[:2], query="Zoë \"q\"", limit=10))
+    assert search == {"submissions": submissions[:2], "count": 2, "query": "Zoë \"q\"", "limit": 10}
+
+
+def test_as_utc():
+    naive = datetime(2024, 1, 1, 12)
+    assert as_utc(naive) == naive.replace(tzinfo=timezone.utc)
+    assert as_utc(datetime(2024, 1, 1, 14, tzinfo=timezone(timedelta(hours=2)))).hour == 12
+    assert as_utc(None) is None
+
+
+def test_filters_are_active_when_any_is_set():
+    assert not SubmissionFilters().active()
+    assert SubmissionFilters(has_message=False).active()
+    assert SubmissionFilters(batch_id="batch_1").active()
@@ -0,0 +1,109 @@
+"""
+Request tracing tests for Random Corp API
+Spans and Server-Timing, sampling and slow-request export, and the Chrome trace file
+"""
+
+import json
+import asyncio
+import pytest
+import tracing
+from tracing import TraceSink, finish_trace, mark_since_start, span, start_trace, traced
+
+
+@pytest.fixture
+def sink(tmp_path, monkeypatch):
+    """A sink that exports nothing unless a test changes its thresholds"""
+    trace_sink = TraceSink(str(tmp_path / "traces.json"), sample_rate=0.0, slow_threshold=60.0)
+    monkeypatch.setattr(tracing, "trace_sink", trace_sink)
+    return trace_sink
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.loads(f.read() + "]")
+
+
+def test_spans_outside_a_trace_are_no_ops(sink):
+    with span("db.query"):
+        pass
+    mark_since_start("request_validation")
+    assert tracing.current_trace() is None
+
+
+def test_server_timing_reports_each_span_once_with_its_longest_duration(sink):
+    async def scenario():
+        trace, token = start_trace("POST /api/submit/batch")
+
+        async def item(delay: float):
+            await asyncio.sleep(delay)
+
+        mark_since_start("request_validation")
+        await asyncio.gather(*(traced("item", item(delay)) for delay in (0.001, 0.02)))
+        with span("serialize"):
+            pass
+        header = finish_trace(trace, token)
+        return trace, header
+
+    trace, header = asyncio.run(scenario())
+    entries = [entry.strip() for entry in header.split(",")]
+    assert [entry.split(";")[0] for entry in entries] == ["request_validation", "item", "serialize", "total"]
+    item = entries[1]
+    assert item.endswith(';desc="max of 2"')
+    assert float(item.split("dur=")[1].split(";")[0]) >= 20
+    assert len(trace.spans) == 4
+    assert tracing.current_trace() is None
+
+
+def test_fast_requests_are_not_exported_unless_sampled(sink):
+    trace, token = start_trace("GET /api/stats")
+    finish_trace(trace, token)
+    assert (trace.exported, sink.traces_exported) == (False, 0)
+
+    sink.sample_rate = 1.0
+    trace, token = start_trace("GET /api/stats")
+    finish_trace(trace, token)
+    assert trace.exported and sink.traces_exported == 1
+
+
+def test_slow_requests_are_always_exported_with_late_spans(sink):
+    sink.slow_threshold = 0.0
+    trace, token = start_trace("POST /api/submit")
+    with span("enrich"):
+        pass
+    finish_trace(trace, token)
+    # A background task finishing after the response still lands in the trace
+    trace.add("background.save", trace.end, trace.end + 0.01)
+    sink._write(sink._drain())
+
+    events = load(sink.path)
+    assert [event["name"] for event in events] == ["thread_name", "POST /api/submit", "enrich", "background.save"]
+    assert {event["tid"] for event in events} == {trace.trace_id}
+    assert events[3]["dur"] == pytest.approx(10_000, abs=1)
+
+
+def test_trace_file_stays_loadable_and_rotates(sink):
+    sink.slow_threshold = 0.0
+    sink.max_bytes = 300
+    for _ in range(2):
+        trace, token = start_trace("GET /api/submissions")
+        finish_trace(trace, token)
+        sink._write(sink._drain())
+    assert len(load(sink.path)) == 4
+
+    trace, token = start_trace("GET /api/submissions")
+    finish_trace(trace, token)
+    sink._write(sink._drain())
+    assert len(load(sink.path + ".1")) == 4
+    assert len(load(sink.path)) == 2
+
+
+def test_stop_writes_buffered_events(sink):
+    async def scenario():
+        sink.slow_threshold = 0.0
+        await sink.start()
+        trace, token = start_trace("GET /api/stats")
+        finish_trace(trace, token)
+        await sink.stop()
+
+    asyncio.run(scenario())
+    assert len(load(sink.path)) == 2
@@ -0,0 +1,226 @@
+"""
+Request tracing for Random Corp API
+Lightweight spans exported as a Server-Timing header and sampled Chrome trace files
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+import itertools
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Dict, List, Optional, Tuple, TypeVar
+from shared_state import per_worker_path
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Wall-clock anchor so perf_counter readings can be exported as epoch microseconds
+_EPOCH_ANCHOR = time.time() - time.perf_counter()
+_trace_ids = itertools.count(1)
+
+
+class Trace:
+    """Spans recorded for one request.
+
+    Spans are always collected (a few tuples per request) so Server-Timing
+    can be emitted for every response. Whether the trace is written to the
+    trace file is decided when the request finishes: a random sample plus
+    every request slower than the slow threshold.
+    """
+
+    __slots__ = ("trace_id", "name", "start", "end", "spans", "exported")
+
+    def __init__(self, name: str):
+        self.trace_id = next(_trace_ids)
+        self.name = name
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.spans: List[Tuple[str, float, float]] = []
+        self.exported = False
+
+    def add(self, name: str, start: float, end: float):
+        self.spans.append((name, start, end))
+        if self.exported:
+            # Span finished after the response (background work); export it on its own
+            get_trace_sink().emit(self, [(name, start, end)])
+
+    def server_timing(self) -> str:
+        """Server-Timing header value.
+
+        Spans with the same name (e.g. per-item spans of a batch run under
+        asyncio.gather) are reported once with their longest duration, which
+        approximates their contribution to the critical path.
+        """
+        longest: Dict[str, float] = {}
+        counts: Dict[str, int] = {}
+        for name, start, end in self.spans:
+            longest[name] = max(longest.get(name, 0.0), end - start)
+            counts[name] = counts.get(name, 0) + 1
+        entries = []
+        for name, duration in longest.items():
+            entry = f"{name};dur={duration * 1000:.2f}"
+            if counts[name] > 1:
+                entry += f';desc="max of {counts[name]}"'
+            entries.append(entry)
+        if self.end is not None:
+            entries.append(f"total;dur={(self.end - self.start) * 1000:.2f}")
+        return ", ".join(entries)
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def start_trace(name: str):
+    """Begin a trace for the current context; returns a token for finish_trace()"""
+    trace = Trace(name)
+    return trace, _current_trace.set(trace)
+
+
+def finish_trace(trace: Trace, token) -> str:
+    """End the trace, export it if sampled, and return its Server-Timing value"""
+    trace.end = time.perf_counter()
+    _current_trace.reset(token)
+    get_trace_sink().maybe_export(trace)
+    return trace.server_timing()
+
+
+@contextmanager
+def span(name: str):
+    """Time a block as a span of the current trace (no-op outside a trace)"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, start, time.perf_counter())
+
+
+async def traced(name: str, awaitable: Awaitable[T]) -> T:
+    """Await something inside a span; handy for coroutines passed to asyncio.gather"""
+    with span(name):
+        return await awaitable
+
+
+def mark_since_start(name: str):
+    """Record a span from the start of the trace until now (e.g. routing and validation)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(name, trace.start, time.perf_counter())
+
+
+def _to_epoch_us(perf_value: float) -> int:
+    return int((_EPOCH_ANCHOR + perf_value) * 1_000_000)
+
+
+class TraceSink:
+    """Buffers sampled trace events and appends them to a Chrome trace (JSON array) file.
+
+    The file opens with "[" and each event is written with a leading
+    separator; the closing "]" is optional in the Chrome trace format, so
+    the file can be loaded in chrome://tracing or Perfetto at any time.
+    """
+
+    def __init__(self, path: str = "traces.json", sample_rate: float = 0.01,
+                 slow_threshold: float = 0.5, max_bytes: int = 50 * 1024 * 1024,
+                 buffer_size: int = 10000, flush_interval: float = 1.0):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self._events: deque = deque(maxlen=buffer_size)
+        self._task: Optional[asyncio.Task] = None
+        self._pid = os.getpid()
+        self.traces_exported = 0
+
+    def maybe_export(self, trace: Trace):
+        duration = trace.end - trace.start
+        if not (duration >= self.slow_threshold or random.random() < self.sample_rate):
+            return
+        trace.exported = True
+        self.traces_exported += 1
+        self._events.append({
+            "name": "thread_name", "ph": "M", "pid": self._pid, "tid": trace.trace_id,
+            "args": {"name": f"{trace.name} #{trace.trace_id}"}
+        })
+        self._events.append({
+            "name": trace.name, "cat": "request", "ph": "X", "pid": self._pid, "tid": trace.trace_id,
+            "ts": _to_epoch_us(trace.start), "dur": int(duration * 1_000_000),
+            "args": {"trace_id": trace.trace_id}
+        })
+        self.emit(trace, trace.spans)
+
+    def emit(self, trace: Trace, spans: List[Tuple[str, float, float]]):
+        for name, start, end in spans:
+            self._events.append({
+                "name": name, "cat": "span", "ph": "X", "pid": self._pid, "tid": trace.trace_id,
+                "ts": _to_epoch_us(start), "dur": int((end - start) * 1_000_000),
+                "args": {"trace_id": trace.trace_id}
+            })
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="trace-sink")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._write(self._drain())
+
+    def _drain(self) -> List[Dict]:
+        events = list(self._events)
+        self._events.clear()
+        return events
+
+    def _write(self, events: List[Dict]):
+        if not events:
+            return
+        if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+            os.replace(self.path, self.path + ".1")
+        is_new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(("[\n" if is_new else ",\n") + ",\n".join(json.dumps(event) for event in events))
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                events = self._drain()
+                if events:
+                    await asyncio.to_thread(self._write, events)
+            except Exception as e:
+                logger.error(f"❌ Failed to write traces: {str(e)}")
+
+
+# Global trace sink instance - initialized lazily
+trace_sink = None
+
+def get_trace_sink() -> TraceSink:
+    """Get or create the trace sink instance"""
+    global trace_sink
+    if trace_sink is None:
+        trace_sink = TraceSink(
+            path=per_worker_path(os.getenv('TRACE_FILE', 'traces.json')),
+            sample_rate=float(os.getenv('TRACE_SAMPLE_RATE', '0.01')),
+            slow_threshold=int(os.getenv('TRACE_SLOW_MS', '500')) / 1000
+        )
+    return trace_sink
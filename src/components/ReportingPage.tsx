@@ -23,7 +23,7 @@ import {
 } from '@mui/material';
 import { styled } from '@mui/material/styles';
 import { format } from 'date-fns';
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { buildApiUrl } from '../config/api';
 
 const StyledTableContainer = styled(TableContainer)(({ theme }) => ({
@@ -73,6 +73,9 @@ interface Statistics {
   uptime_seconds: number;
 }
 
+// Coalesces a burst of live events (e.g. a batch) into one refetch
+const LIVE_REFRESH_DELAY_MS = 500;
+
 const ReportingPage: React.FC = () => {
   const [submissions, setSubmissions] = useState<Submission[]>([]);
   const [statistics, setStatistics] = useState<Statistics | null>(null);
@@ -82,9 +85,10 @@ const ReportingPage: React.FC = () => {
   const [rowsPerPage, setRowsPerPage] = useState(10);
   const [totalCount, setTotalCount] = useState(0);
 
-  const fetchSubmissions = async (pageNum: number, limit: number) => {
+  const fetchSubmissions = async (pageNum: number, limit: number, background = false) => {
     try {
-      setLoading(true);
+      // Live refreshes keep the current rows on screen instead of showing the spinner
+      setLoading(!background);
       setError(null);
       
       const offset = pageNum * limit;
@@ -120,6 +124,45 @@ const ReportingPage: React.FC = () => {
     fetchSubmissions(page, rowsPerPage);
     fetchStatistics();  }, [page, rowsPerPage]);
 
+  // Live updates: one Server-Sent Events connection instead of polling. Events are
+  // hints, not a complete feed: a stream only carries the submissions saved by the
+  // worker serving it, while its stats events cover every worker and replica. Either
+  // one triggers a (debounced) refetch of the current page and stats, so the table
+  // and totals always match the API rather than drifting with locally applied events.
+  const viewRef = useRef({ page, rowsPerPage });
+  viewRef.current = { page, rowsPerPage };
+
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') {
+      return;
+    }
+    const source = new EventSource(buildApiUrl('/api/stream/submissions'));
+    let refreshTimer: ReturnType<typeof setTimeout> | null = null;
+
+    const scheduleRefresh = () => {
+      if (refreshTimer !== null) {
+        return;
+      }
+      refreshTimer = setTimeout(() => {
+        refreshTimer = null;
+        fetchSubmissions(viewRef.current.page, viewRef.current.rowsPerPage, true);
+        fetchStatistics();
+      }, LIVE_REFRESH_DELAY_MS);
+    };
+
+    source.addEventListener('submission', scheduleRefresh);
+    source.addEventListener('stats', scheduleRefresh);
+    // The server could not replay what we missed while disconnected
+    source.addEventListener('reset', scheduleRefresh);
+
+    return () => {
+      source.close();
+      if (refreshTimer !== null) {
+        clearTimeout(refreshTimer);
+      }
+    };
+  }, []);
+
   const handleChangePage = (event: unknown, newPage: number) => {
     setPage(newPage);
   };